@@ -0,0 +1,16 @@
+from django.db import migrations
+from apps.core.search import CreateSearchIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0002_rename_created_company_created_at_and_more'),
+    ]
+
+    operations = [
+        CreateSearchIndex(
+            model_name='company',
+            fields=['name', 'code', 'email'],
+        ),
+    ]
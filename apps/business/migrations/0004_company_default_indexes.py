@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0003_company_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['name', 'id'], name='business_co_name_83ccce_act'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at', 'id'], name='business_co_created_6fb200_act'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['modified_at'], name='business_co_modifie_c05437_idx'),
+        ),
+    ]
@@ -8,10 +8,19 @@ class Company(BaseModel):
     phone = models.CharField(blank=True, max_length=20, null=True, verbose_name="Phone")
     address = models.TextField(blank=True, null=True, verbose_name="Address")
 
+    # Campos del índice de búsqueda (migración 0003, apps.core.search)
+    search_index_fields = ('name', 'code', 'email')
+
     class Meta:
         verbose_name = "Company"
         verbose_name_plural = "Companies"
         ordering = ['code']
+        # Índices por defecto de AuditModel (apps.core.models.get_default_indexes)
+        indexes = [
+            models.Index(fields=['name', 'id'], condition=models.Q(is_active=True), name='business_co_name_83ccce_act'),
+            models.Index(fields=['created_at', 'id'], condition=models.Q(is_active=True), name='business_co_created_6fb200_act'),
+            models.Index(fields=['modified_at'], name='business_co_modifie_c05437_idx'),
+        ]
 
     def __str__(self):
         return f"{self.code} - {self.name}"
\ No newline at end of file
@@ -1,4 +1,3 @@
-from rest_framework import serializers
 from apps.core.serializers import BaseModelSerializer
 from apps.business.models import Company
 
@@ -10,13 +9,7 @@ class CompanySerializer(BaseModelSerializer):
     def validate_code(self, value):
         if value:
             value = value.upper().strip()
-
-            if self.instance:
-                if Company.objects.exclude(id=self.instance.id).filter(code=value).exists():
-                    raise serializers.ValidationError("Ya existe una empresa con este código")
-            else:
-                if Company.objects.filter(code=value).exists():
-                    raise serializers.ValidationError('Ya existe una empresa con este código')
+            self.check_unique('code', value, "Ya existe una empresa con este código")
         return value
 
 
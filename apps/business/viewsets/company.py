@@ -15,6 +15,5 @@ class CompanyViewSet(BaseModelViewSet):
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
     filterset_class = CompanyFilterSet
-    search_fields = ['name', 'code', 'email']
     ordering_fields = ['name', 'code', 'created_at']
     ordering = ['name']
\ No newline at end of file
@@ -0,0 +1,175 @@
+from rest_framework import serializers
+from rest_framework.compat import INDENT_SEPARATORS, LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+import json
+import math
+import uuid
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+
+# Acciones cuya respuesta es la salida del serializer del viewset
+SERIALIZER_ACTIONS = ('list', 'retrieve', 'create', 'update', 'partial_update')
+
+# Campos cuya representación nunca es un float (DecimalField depende de coerce_to_string)
+FLOAT_FREE_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.DateTimeField,
+    serializers.DateField,
+    serializers.TimeField,
+    serializers.DurationField,
+    serializers.UUIDField,
+    serializers.ChoiceField,
+    serializers.FileField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.StringRelatedField,
+    serializers.HyperlinkedRelatedField,
+)
+
+_float_fields_cache = {}
+
+
+class EncodedJSON:
+    # JSON ya codificado (p. ej. un listado cacheado): encode_json lo inserta tal cual
+    __slots__ = ('content',)
+
+    def __init__(self, content):
+        self.content = content
+
+    def tolist(self):
+        # El JSONEncoder de DRF recurre a tolist(), así que otros renderers lo decodifican
+        return json.loads(self.content)
+
+
+def has_non_finite_float(data):
+    # orjson escribe NaN e Infinity como null; DRF los rechaza (STRICT_JSON) o los
+    # escribe tal cual, así que esos payloads van por json de la librería estándar
+    pending = [data]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            pending.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            pending.extend(value)
+    return False
+
+
+def field_may_emit_float(field):
+    if isinstance(field, serializers.ListSerializer):
+        return field_may_emit_float(field.child)
+    if isinstance(field, serializers.BaseSerializer):
+        return any(field_may_emit_float(child) for child in field.fields.values() if not child.write_only)
+    if isinstance(field, (serializers.ListField, serializers.DictField)):
+        return field_may_emit_float(field.child)
+    if isinstance(field, serializers.ManyRelatedField):
+        return field_may_emit_float(field.child_relation)
+    if isinstance(field, serializers.DecimalField):
+        return not getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    # FloatField, SerializerMethodField, ReadOnlyField, JSONField o campos propios
+    return not isinstance(field, FLOAT_FREE_FIELDS)
+
+
+def serializer_may_emit_float(serializer_class):
+    # Se calcula una vez por clase; si el serializer no se puede instanciar sin contexto
+    # se asume que sí puede devolver floats
+    if serializer_class not in _float_fields_cache:
+        try:
+            serializer = serializer_class()
+            _float_fields_cache[serializer_class] = field_may_emit_float(serializer)
+        except Exception:
+            _float_fields_cache[serializer_class] = True
+    return _float_fields_cache[serializer_class]
+
+
+def view_may_emit_float(view):
+    # Solo en las acciones estándar el payload sale del serializer; el resto de acciones
+    # (y las vistas sin serializer) se revisan siempre
+    if getattr(view, 'action', None) not in SERIALIZER_ACTIONS:
+        return True
+    try:
+        serializer_class = view.get_serializer_class()
+    except (AttributeError, AssertionError):
+        return True
+    return serializer_may_emit_float(serializer_class)
+
+
+def encode_json(data, indent=None, check_floats=True):
+    # Misma salida que JSONRenderer de DRF (JSONEncoder para UUID, datetime con 'Z',
+    # Decimal, cadenas lazy, etc.); con orjson instalado se usa en el caso compacto y lo
+    # que orjson no codifica igual (NaN, enteros de más de 64 bits, time con zona...) se
+    # codifica con json de la librería estándar. Con check_floats=False el llamador
+    # garantiza que no hay floats y se omite el recorrido en busca de NaN/Infinity.
+    if isinstance(data, EncodedJSON):
+        return data.content
+
+    fragments = []
+    marker = None
+
+    def default(obj):
+        nonlocal marker
+        if isinstance(obj, EncodedJSON):
+            if marker is None:
+                marker = uuid.uuid4().hex
+            fragments.append(obj.content)
+            return f"{marker}:{len(fragments) - 1}"
+        return _encoder.default(obj)
+
+    content = None
+    if orjson is not None and indent is None and api_settings.COMPACT_JSON and api_settings.UNICODE_JSON:
+        try:
+            content = orjson.dumps(
+                data,
+                default=default,
+                option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except TypeError:
+            # orjson.JSONEncodeError; json repite la codificación y lanza el error de DRF si lo hay
+            fragments.clear()
+        else:
+            if check_floats and has_non_finite_float(data):
+                content = None
+                fragments.clear()
+
+    if content is None:
+        if indent is not None:
+            separators = INDENT_SEPARATORS
+        else:
+            separators = SHORT_SEPARATORS if api_settings.COMPACT_JSON else LONG_SEPARATORS
+        content = json.dumps(
+            data,
+            default=default,
+            indent=indent,
+            ensure_ascii=not api_settings.UNICODE_JSON,
+            allow_nan=not api_settings.STRICT_JSON,
+            separators=separators,
+        ).encode()
+
+    for position, fragment in enumerate(fragments):
+        content = content.replace(f'"{marker}:{position}"'.encode(), fragment, 1)
+
+    # Igual que JSONRenderer: U+2028/U+2029 escapados para poder incrustarlo en JS
+    if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        return encode_json(data, indent=indent, check_floats=view_may_emit_float(renderer_context.get('view')))
@@ -1,6 +1,7 @@
 from django.db.models.expressions import result
 from rest_framework.response import  Response
 from rest_framework import status
+from apps.common.renderers import EncodedJSON
 from datetime import datetime
 
 class StandardResponse:
@@ -21,6 +22,12 @@ class StandardResponse:
 
         return Response(response_data, status=status_code)
 
+    @staticmethod
+    def encoded(encoded_data, message="Operación exitosa", status_code=status.HTTP_200_OK):
+        # Igual que success(), pero con data ya codificada en JSON (bytes): el renderer
+        # la inserta en el sobre sin volver a serializarla.
+        return StandardResponse.success(data=EncodedJSON(encoded_data), message=message, status_code=status_code)
+
     @staticmethod
     def error(message="Error en la operación", errors=None, status_code=status.HTTP_400_BAD_REQUEST, extra=None):
         response_data = {
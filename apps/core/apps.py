@@ -4,3 +4,74 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
+
+    def ready(self):
+        from django.contrib.auth.models import Group, User
+        from django.core import checks
+        from django.db.models.signals import post_save, post_delete, post_migrate, m2m_changed
+        from apps.core.models import TimeStampedModel
+        from rest_framework.authtoken.models import Token
+        from apps.core.cache import bump_model_generation, bump_model_generation_on_commit, invalidate_user_groups
+        from apps.core.authentication import affects_user_tokens, invalidate_tokens
+        from apps.core.jobs import check_job_store
+        from apps.core.models import check_default_indexes
+
+        # Los backends no eager necesitan el estado de los jobs en una caché compartida
+        checks.register(check_job_store, checks.Tags.caches)
+        # Índices parciales recomendados que cada modelo de AuditModel declara en su Meta
+        checks.register(check_default_indexes, checks.Tags.models)
+
+        # Escrituras fuera de la API (admin, shell) también invalidan las cachés por modelo
+        def invalidate_model_cache(sender, instance, using, **kwargs):
+            if isinstance(instance, TimeStampedModel):
+                bump_model_generation_on_commit(sender, using=using)
+
+        post_save.connect(invalidate_model_cache, weak=False, dispatch_uid='core_invalidate_model_cache_save')
+        post_delete.connect(invalidate_model_cache, weak=False, dispatch_uid='core_invalidate_model_cache_delete')
+
+
+        # Caché de grupos por usuario (HasGroupPermission)
+        def invalidate_group_membership(sender, instance, action, reverse, pk_set, **kwargs):
+            if action not in ('post_add', 'post_remove', 'post_clear'):
+                return
+            if not reverse:
+                invalidate_user_groups([instance.pk])
+            elif pk_set:
+                invalidate_user_groups(pk_set)
+            else:
+                # group.user_set.clear() no informa qué usuarios cambiaron
+                bump_model_generation(Group)
+
+        def invalidate_groups(sender, **kwargs):
+            bump_model_generation(Group)
+
+        m2m_changed.connect(
+            invalidate_group_membership, sender=User.groups.through, weak=False,
+            dispatch_uid='core_invalidate_group_membership'
+        )
+        post_save.connect(invalidate_groups, sender=Group, weak=False, dispatch_uid='core_invalidate_groups_save')
+        post_delete.connect(invalidate_groups, sender=Group, weak=False, dispatch_uid='core_invalidate_groups_delete')
+
+        # Caché de CachedTokenAuthentication: el usuario cacheado queda obsoleto con cualquier
+        # cambio (desactivación, contraseña, datos) y el token al eliminarse. Un usuario
+        # recién creado no tiene tokens y los guardados de last_login no cambian nada.
+        def invalidate_user_tokens(sender, instance, created, update_fields, **kwargs):
+            if created or not affects_user_tokens(update_fields):
+                return
+            invalidate_tokens(Token.objects.filter(user_id=instance.pk).values_list('key', flat=True))
+
+        def invalidate_token(sender, instance, **kwargs):
+            invalidate_tokens([instance.key])
+
+        post_save.connect(invalidate_user_tokens, sender=User, weak=False, dispatch_uid='core_invalidate_user_tokens')
+        post_delete.connect(invalidate_token, sender=Token, weak=False, dispatch_uid='core_invalidate_token')
+
+        # Índices de búsqueda en SQLite: una migración que rehace la tabla pierde los triggers
+        def repair_search_indexes(sender, using, **kwargs):
+            from django.apps import apps as global_apps
+            from apps.core.search import ensure_search_indexes
+
+            models = [model for model in global_apps.get_models() if getattr(model, 'search_index_fields', None)]
+            ensure_search_indexes(models, using=using)
+
+        post_migrate.connect(repair_search_indexes, sender=self, weak=False, dispatch_uid='core_repair_search_indexes')
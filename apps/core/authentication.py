@@ -0,0 +1,121 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+def get_options():
+    return getattr(settings, 'TOKEN_AUTH_CACHE', {})
+
+
+# Campos de User cuyo guardado no afecta a la autenticación (update_last_login en cada login)
+IGNORED_USER_FIELDS = frozenset({'last_login'})
+
+# Columnas de User que se guardan en la caché compartida: las que usan la autenticación y
+# los permisos. El resto (password, email...) queda diferido y se lee de la BD si se usa.
+CACHED_USER_FIELDS = ('username', 'is_active', 'is_staff', 'is_superuser')
+
+
+def get_token_cache_key(key):
+    # El token nunca se guarda en claro como clave de la caché compartida
+    return f"auth_token:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+class LocalTokenCache:
+    # LRU en memoria del proceso con TTL corto: acota cuánto tarda un worker en ver una
+    # invalidación hecha desde otro proceso.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, cache_key):
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[cache_key]
+                return None
+            self._entries.move_to_end(cache_key)
+            return entry[0]
+
+    def set(self, cache_key, payload):
+        with self._lock:
+            self._entries[cache_key] = (payload, time.monotonic() + get_options().get('LOCAL_TIMEOUT', 5))
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > get_options().get('LOCAL_SIZE', 1024):
+                self._entries.popitem(last=False)
+
+    def delete(self, cache_key):
+        with self._lock:
+            self._entries.pop(cache_key, None)
+
+
+local_cache = LocalTokenCache()
+
+
+def invalidate_tokens(keys):
+    cache_keys = [get_token_cache_key(key) for key in keys]
+    for cache_key in cache_keys:
+        local_cache.delete(cache_key)
+    cache.delete_many(cache_keys)
+
+
+def dump_instance(instance, fields=None):
+    # fields=None: todas las columnas; si no, el pk más las indicadas que tenga el modelo
+    return {
+        field.attname: field.value_from_object(instance)
+        for field in instance._meta.concrete_fields
+        if fields is None or field.primary_key or field.attname in fields
+    }
+
+
+def load_instance(model, values, using):
+    return model.from_db(using, list(values), list(values.values()))
+
+
+def affects_user_tokens(update_fields):
+    return update_fields is None or not IGNORED_USER_FIELDS.issuperset(update_fields)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    # Igual que TokenAuthentication, pero el token (con su usuario) se resuelve desde un
+    # LRU local y la caché compartida. Se guardan los valores de las columnas en un dict
+    # (del usuario solo CACHED_USER_FIELDS) y cada petición reconstruye instancias propias. Las señales en CoreConfig.ready
+    # invalidan al borrar el token o guardar el usuario (desactivación, cambio de contraseña).
+
+    def authenticate_credentials(self, key):
+        cache_key = get_token_cache_key(key)
+        payload = local_cache.get(cache_key)
+        if payload is None:
+            payload = cache.get(cache_key)
+            if payload is None:
+                payload = self.load_token(key)
+                cache.set(cache_key, payload, get_options().get('TIMEOUT', 60))
+            local_cache.set(cache_key, payload)
+
+        token = load_instance(self.get_model(), payload['token'], payload['using'])
+        token.user = load_instance(token._meta.get_field('user').related_model, payload['user'], payload['using'])
+        return (token.user, token)
+
+    def load_token(self, key):
+        model = self.get_model()
+        try:
+            token = model.objects.select_related('user').get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return {
+            'using': token._state.db,
+            'token': dump_instance(token),
+            'user': dump_instance(token.user, CACHED_USER_FIELDS),
+        }
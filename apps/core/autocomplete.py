@@ -0,0 +1,174 @@
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Max
+from apps.core.cache import get_model_generation
+from apps.core.models import get_scope_condition, has_model_field
+
+
+def get_options():
+    return getattr(settings, 'AUTOCOMPLETE', {})
+
+
+def normalize_key(value):
+    # Misma normalización que validate_code/validate_name (upper + strip), sin acentos
+    value = unicodedata.normalize('NFKD', str(value))
+    return ''.join(char for char in value if not unicodedata.combining(char)).upper().strip()
+
+
+def get_prefix_keys(value):
+    # Se indexa el valor completo y cada palabra que contiene: "ÑANDU SUR" -> NANDU SUR, SUR
+    key = normalize_key(value)
+    if not key:
+        return []
+    keys = [key]
+    position = key.find(' ')
+    while position != -1:
+        if key[position + 1:position + 2] not in ('', ' '):
+            keys.append(key[position + 1:])
+        position = key.find(' ', position + 1)
+    return keys
+
+
+class PrefixIndex:
+    # Índice por proceso de (clave normalizada, pk) en una lista ordenada: un prefijo se
+    # resuelve con bisect sin consultar la base de datos. Cada worker guarda su propia
+    # copia (memoria proporcional a los registros activos). Cuando cambia la generación del
+    # modelo en la caché compartida (cualquier escritura del ORM) se aplican solo las filas
+    # con modified_at desde la última lectura, menos DELTA_OVERLAP segundos por las
+    # transacciones que confirman tarde. Se recarga completo cada FULL_REFRESH_INTERVAL
+    # segundos, si el número de activos no cuadra (borrados) o si la generación cambió sin
+    # filas nuevas por modified_at (un update() que no lo toca).
+    # Las búsquedas leen la lista vigente sin bloquear; la nueva se sustituye al terminar.
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = tuple(fields)
+        self._refresh_lock = threading.Lock()
+        self._keys = []
+        self._items = {}
+        self._generation = None
+        self._watermark = None
+        self._checked_at = 0
+        self._loaded_at = 0
+        self._loaded = False
+
+    def get_queryset(self):
+        return self.model._default_manager.filter(get_scope_condition(self.model)).order_by()
+
+    def get_row_keys(self, pk, values):
+        return {(key, pk) for value in values if value for key in get_prefix_keys(value)}
+
+    def search(self, prefix, limit=10):
+        prefix = normalize_key(prefix)
+        if not prefix:
+            return []
+
+        self.refresh()
+        keys, items = self._keys, self._items
+        results = []
+        seen = set()
+        position = bisect_left(keys, (prefix,))
+        while position < len(keys) and len(results) < limit:
+            key, pk = keys[position]
+            if not key.startswith(prefix):
+                break
+            if pk not in seen:
+                seen.add(pk)
+                results.append(items[pk])
+            position += 1
+        return results
+
+    def refresh(self):
+        options = get_options()
+        now = time.monotonic()
+        if self._loaded and now - self._checked_at < options.get('REFRESH_INTERVAL', 1):
+            return
+
+        # Solo un hilo actualiza; el resto sigue respondiendo con el índice actual
+        if not self._refresh_lock.acquire(blocking=not self._loaded):
+            return
+        try:
+            if self._loaded and now - self._checked_at < options.get('REFRESH_INTERVAL', 1):
+                return
+            self._checked_at = now
+
+            # La generación se lee antes de consultar: lo escrito después se verá en la próxima
+            generation = get_model_generation(self.model)
+            if not self._loaded or now - self._loaded_at >= options.get('FULL_REFRESH_INTERVAL', 3600):
+                self.load(generation, now)
+            elif generation != self._generation and not self.apply_delta(generation):
+                self.load(generation, now)
+        finally:
+            self._refresh_lock.release()
+
+    def load(self, generation, now=None):
+        keys = []
+        items = {}
+        # Última modificación de toda la tabla (también inactivos), leída antes de la carga
+        watermark = None
+        if has_model_field(self.model, 'modified_at'):
+            watermark = self.model._default_manager.aggregate(watermark=Max('modified_at'))['watermark']
+
+        for row in self.get_queryset().values_list('pk', *self.fields).iterator(chunk_size=5000):
+            pk, values = row[0], row[1:]
+            items[pk] = {'id': pk, **dict(zip(self.fields, values))}
+            keys.extend(self.get_row_keys(pk, values))
+        keys.sort()
+
+        self._keys, self._items = keys, items
+        self._generation = generation
+        self._watermark = watermark
+        self._loaded_at = time.monotonic() if now is None else now
+        self._loaded = True
+
+    def apply_delta(self, generation):
+        # False si hace falta una recarga completa (también en modelos sin modified_at)
+        if self._watermark is None:
+            return False
+        since = self._watermark - timedelta(seconds=get_options().get('DELTA_OVERLAP', 60))
+        rows = list(
+            self.model._default_manager.filter(modified_at__gte=since).order_by()
+            .values_list('pk', 'modified_at', *self.fields)
+        )
+        if not any(modified_at > self._watermark for _, modified_at, *_ in rows):
+            return False
+
+        alive = set(self.get_queryset().filter(modified_at__gte=since).values_list('pk', flat=True))
+        keys, items = self._keys.copy(), dict(self._items)
+        watermark = self._watermark
+        for pk, modified_at, *values in rows:
+            watermark = max(watermark, modified_at)
+            previous = items.pop(pk, None)
+            if previous is not None:
+                for key in self.get_row_keys(pk, [previous[field] for field in self.fields]):
+                    del keys[bisect_left(keys, key)]
+            if pk in alive:
+                items[pk] = {'id': pk, **dict(zip(self.fields, values))}
+                for key in self.get_row_keys(pk, values):
+                    insort(keys, key)
+
+        # Un borrado (o una escritura sin modified_at) deja el recuento descuadrado
+        if len(items) != self.get_queryset().count():
+            return False
+
+        self._keys, self._items = keys, items
+        self._generation = generation
+        self._watermark = watermark
+        return True
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_prefix_index(model, fields):
+    index_key = (model._meta.label_lower, tuple(fields))
+    index = _indexes.get(index_key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.setdefault(index_key, PrefixIndex(model, fields))
+    return index
@@ -0,0 +1,128 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from urllib.parse import urlencode
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get_generation_key(model):
+    return f"model_generation:{model._meta.label_lower}"
+
+
+def get_model_generation(model):
+    key = get_generation_key(model)
+    generation = cache.get(key)
+    if generation is None:
+        # Se parte de un valor basado en el tiempo para no reutilizar generaciones
+        # anteriores si la clave fue desalojada de la caché.
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+async def aget_model_generation(model):
+    key = get_generation_key(model)
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, int(time.time() * 1000), timeout=None)
+        generation = await cache.aget(key)
+    return generation
+
+
+def bump_model_generation(model):
+    key = get_generation_key(model)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        generation = int(time.time() * 1000)
+        cache.set(key, generation, timeout=None)
+        return generation
+
+
+def bump_model_generation_on_commit(model, using=None):
+    # Al confirmar la transacción (o en el momento, fuera de ella): antes, otra petición
+    # podría cachear con la generación nueva datos que aún no ve o que se revierten
+    transaction.on_commit(partial(bump_model_generation, model), using=using)
+
+
+def get_request_digest(request, ignored_params=(), extra=''):
+    # Ruta y query string normalizada (parámetros ordenados) como clave estable
+    params = sorted(
+        (key, value)
+        for key in request.query_params
+        if key not in ignored_params
+        for value in request.query_params.getlist(key)
+    )
+    return hashlib.md5(f"{request.path}?{urlencode(params)}|{extra}".encode()).hexdigest()
+
+
+def get_queryset_digest(queryset):
+    # El SQL y sus parámetros identifican el alcance: dos peticiones comparten entrada
+    # solo si get_queryset() (usuario, tenant, filtros) produce la misma consulta
+    sql, params = queryset.query.sql_with_params()
+    return hashlib.md5(f"{sql}|{params!r}".encode()).hexdigest()
+
+
+def get_user_groups_key(user_pk):
+    # La generación de Group cambia al renombrar o eliminar grupos
+    return f"user_groups:{get_model_generation(Group)}:{user_pk}"
+
+
+def get_user_group_names(user):
+    # frozenset con los nombres de grupo del usuario: memo en la instancia (vive lo que
+    # la petición) y caché compartida con TTL, invalidada por señales en CoreConfig.ready
+    if not user or not user.is_authenticated:
+        return frozenset()
+
+    names = getattr(user, '_group_names_cache', None)
+    if names is not None:
+        return names
+
+    key = get_user_groups_key(user.pk)
+    names = cache.get(key)
+    if names is None:
+        names = frozenset(user.groups.values_list('name', flat=True))
+        cache.set(key, names, getattr(settings, 'PERMISSION_CACHE_TIMEOUT', 300))
+
+    user._group_names_cache = names
+    return names
+
+
+def invalidate_user_groups(user_pks):
+    cache.delete_many([get_user_groups_key(user_pk) for user_pk in user_pks])
+
+
+class LocalLRU:
+    # Memoria del proceso con un máximo de entradas: al superarlo se descarta la usada
+    # hace más tiempo. Para datos que ya viven en la caché compartida con su TTL.
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,412 @@
+from datetime import timezone as dt_timezone
+from operator import methodcaller
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ObjectDoesNotExist
+from django.db import models
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.fields import SkipField, empty, get_attribute
+from rest_framework.relations import PKOnlyObject
+from rest_framework.settings import api_settings
+from apps.core.serializers import BaseModelSerializer, BulkListSerializer, TimestampMixin, StatusMixin
+
+# Serialización compilada para listados de solo lectura: por cada clase de serializer se
+# genera una función por fila equivalente a Serializer.to_representation más los pasos de
+# BaseModelSerializer, StatusMixin y TimestampMixin, sin el despacho campo a campo de DRF.
+
+_compiled_cache = {}
+
+_SKIP = object()
+
+STRING_FIELDS = (
+    serializers.CharField,
+    serializers.EmailField,
+    serializers.SlugField,
+    serializers.URLField,
+    serializers.RegexField,
+)
+
+SIMPLE_CONVERTERS = {
+    serializers.IntegerField: 'int(v)',
+    serializers.FloatField: 'float(v)',
+    serializers.BooleanField: 'bool(v)',
+    serializers.ReadOnlyField: 'v',
+}
+
+
+class CompilationError(ImproperlyConfigured):
+    pass
+
+
+def get_compiled_serializer(serializer_class, rows=False):
+    # Un serializer que no se puede compilar con salida idéntica es un error de
+    # configuración del viewset: se informa en vez de volver a DRF sin avisar
+    if serializer_class not in _compiled_cache:
+        try:
+            _compiled_cache[serializer_class] = CompiledSerializer(serializer_class)
+        except CompilationError as e:
+            _compiled_cache[serializer_class] = e
+    compiled = _compiled_cache[serializer_class]
+    if isinstance(compiled, CompilationError):
+        raise compiled
+    if rows and not compiled.supports_rows:
+        raise CompilationError(
+            f"{serializer_class.__name__} no admite compiled_serialization = 'values': "
+            f"{compiled.rows_unsupported_reason}"
+        )
+    return compiled
+
+
+def localize_datetime(value, tz):
+    # Mismo resultado que DateTimeField.enforce_timezone
+    if tz is not None:
+        if timezone.is_aware(value):
+            return value.astimezone(tz)
+        return timezone.make_aware(value, tz)
+    if timezone.is_aware(value):
+        return timezone.make_naive(value, dt_timezone.utc)
+    return value
+
+
+def format_datetime(value, tz, output_format):
+    if isinstance(value, str):
+        return value
+    value = localize_datetime(value, tz)
+    if output_format.lower() == 'iso-8601':
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return value.strftime(output_format)
+
+
+DATETIME_DIRECTIVES = {
+    # %Y sin relleno, igual que strftime en glibc
+    'Y': '{v.year}',
+    'm': '{v.month:02d}',
+    'd': '{v.day:02d}',
+    'H': '{v.hour:02d}',
+    'M': '{v.minute:02d}',
+    'S': '{v.second:02d}',
+    '%': '%',
+}
+
+
+def compile_datetime_format(output_format):
+    # f-string equivalente a strftime para formatos numéricos como '%Y-%m-%d %H:%M:%S';
+    # None si el formato usa directivas dependientes del locale
+    parts = []
+    chars = iter(output_format)
+    for char in chars:
+        if char != '%':
+            parts.append(char.replace('{', '{{').replace('}', '}}'))
+            continue
+        directive = DATETIME_DIRECTIVES.get(next(chars, None))
+        if directive is None:
+            return None
+        parts.append(directive)
+
+    namespace = {}
+    exec(f"def format_value(v):\n    return f{''.join(parts)!r}\n", namespace)
+    return namespace['format_value']
+
+
+class CompiledSerializer:
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.model = getattr(getattr(serializer_class, 'Meta', None), 'model', None)
+        if self.model is None:
+            raise CompilationError(f"{serializer_class.__name__} no es un ModelSerializer")
+
+        self.field_names = []
+        self.constants = {}
+        self.value_fields = [self.model._meta.pk.name]
+        self.supports_rows = True
+        self.rows_unsupported_reason = None
+        self._current_field = None
+
+        instance_lines, row_lines = [], []
+        for field in serializer_class()._readable_fields:
+            index = len(self.field_names)
+            self.field_names.append(field.field_name)
+            self._current_field = field.field_name
+            instance_code, row_code = self.compile_field(index, field)
+            instance_lines.extend(instance_code)
+            row_lines.extend(row_code or [])
+
+        for step in self.get_representation_steps():
+            instance_code, row_code = step()
+            instance_lines.extend(instance_code)
+            row_lines.extend(row_code)
+
+        self.value_fields = list(dict.fromkeys(self.value_fields))
+        self.uses_fields = any('F[' in line or 'M[' in line for line in instance_lines + row_lines)
+        self.serialize_instance = self.build_function('serialize_instance', 'obj', instance_lines)
+        self.serialize_row = self.build_function('serialize_row', 'row', row_lines) if self.supports_rows else None
+
+    def serialize(self, serializer, objects):
+        objects = list(objects)
+        if not objects:
+            return []
+
+        # Construir serializer.fields cuesta más que serializar una página; solo se
+        # hace si alguna línea generada usa los campos de DRF
+        fields = methods = None
+        if self.uses_fields:
+            fields = [serializer.fields[name] for name in self.field_names]
+            methods = [
+                getattr(serializer, field.method_name) if isinstance(field, serializers.SerializerMethodField) else None
+                for field in fields
+            ]
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+
+        if isinstance(objects[0], dict):
+            if self.serialize_row is None:
+                raise ValueError(f"{self.serializer_class.__name__} no admite filas de values()")
+            serialize_row = self.serialize_row
+            return [serialize_row(row, fields, methods, tz) for row in objects]
+
+        serialize_instance = self.serialize_instance
+        return [serialize_instance(obj, fields, methods, tz) for obj in objects]
+
+    def build_function(self, name, argument, lines):
+        body = '\n'.join(f"    {line}" for line in lines)
+        source = f"def {name}({argument}, F, M, tz):\n    d = {{}}\n{body}\n    return d\n"
+        namespace = {
+            '_SKIP': _SKIP,
+            '_get_attribute': get_attribute,
+            '_format_datetime': format_datetime,
+            'methodcaller': methodcaller,
+            'PKOnlyObject': PKOnlyObject,
+            'SkipField': SkipField,
+            'ObjectDoesNotExist': ObjectDoesNotExist,
+            **self.constants,
+        }
+        exec(compile(source, f"<compiled {self.serializer_class.__name__}.{name}>", 'exec'), namespace)
+        return namespace[name]
+
+    def constant(self, value):
+        name = f"C{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def disable_rows(self):
+        if self.supports_rows:
+            self.rows_unsupported_reason = f"el campo {self._current_field} necesita la instancia del modelo"
+        self.supports_rows = False
+        return None
+
+    # Campos
+
+    def compile_field(self, index, field):
+        key = repr(field.field_name)
+
+        if isinstance(field, serializers.SerializerMethodField):
+            return [f"d[{key}] = M[{index}](obj)"], self.disable_rows()
+
+        if field.source == '*' or isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField)):
+            return self.compile_drf_field(index, key), self.disable_rows()
+
+        if type(field) is serializers.PrimaryKeyRelatedField and field.pk_field is None:
+            model_field = self.get_model_field(self.model, field.source_attrs[0])
+            if len(field.source_attrs) == 1 and model_field is not None and model_field.many_to_one:
+                self.value_fields.append(model_field.name)
+                return (
+                    [f"d[{key}] = obj.{model_field.attname}"] if model_field.attname.isidentifier()
+                    else self.compile_drf_field(index, key),
+                    [f"d[{key}] = row[{model_field.name!r}]"],
+                )
+
+        converter = self.get_converter(index, field)
+        if converter is None:
+            return self.compile_drf_field(index, key), self.disable_rows()
+
+        if isinstance(field, serializers.FileField):
+            # En filas de values() solo llega el nombre del archivo, no el FieldFile
+            self.disable_rows()
+
+        assign = ["if v is not _SKIP:", f"    d[{key}] = None if v is None else {converter}"]
+        row_getter = self.compile_row_getter(index, field) if self.supports_rows else None
+        return (
+            self.compile_instance_getter(index, field) + assign,
+            row_getter + assign if row_getter is not None else None,
+        )
+
+    def compile_drf_field(self, index, key):
+        # Mismo recorrido que Serializer.to_representation para un campo concreto
+        return [
+            "try:",
+            f"    v = F[{index}].get_attribute(obj)",
+            "except SkipField:",
+            "    v = _SKIP",
+            "if v is not _SKIP:",
+            f"    d[{key}] = None if (v.pk if isinstance(v, PKOnlyObject) else v) is None else F[{index}].to_representation(v)",
+        ]
+
+    def get_converter(self, index, field):
+        field_type = type(field)
+        if field_type in STRING_FIELDS:
+            return 'str(v)'
+        if field_type is serializers.UUIDField:
+            return 'str(v)' if field.uuid_format == 'hex_verbose' else f"F[{index}].to_representation(v)"
+        if field_type is serializers.DateTimeField:
+            output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+            if hasattr(field, 'timezone'):
+                return f"F[{index}].to_representation(v)"
+            if output_format is None:
+                return 'v'
+            output_format = self.constant(output_format)
+            if self.constants[output_format].lower() == 'iso-8601':
+                return f"_format_datetime(v, tz, {output_format})"
+            formatter = compile_datetime_format(self.constants[output_format])
+            formatter = self.constant(formatter) if formatter else f"methodcaller('strftime', {output_format})"
+            # Camino rápido para datetimes con zona (los que devuelve el ORM con USE_TZ)
+            return (
+                f"{formatter}(v.astimezone(tz)) if tz is not None and v.tzinfo is not None "
+                f"else _format_datetime(v, tz, {output_format})"
+            )
+        if field_type in SIMPLE_CONVERTERS:
+            return SIMPLE_CONVERTERS[field_type]
+        if isinstance(field, serializers.RelatedField):
+            return None
+        return f"F[{index}].to_representation(v)"
+
+    def get_missing_policy(self, index, field):
+        # Equivalente a Field.get_attribute ante KeyError/AttributeError
+        if field.default is not empty:
+            return f"v = F[{index}].get_default()"
+        if field.allow_null:
+            return "v = None"
+        if not field.required:
+            return "v = _SKIP"
+        raise CompilationError(f"{field.field_name} es obligatorio y puede faltar")
+
+    def compile_instance_getter(self, index, field):
+        path = self.get_concrete_path(field)
+        if path is not None and all(model_field.attname.isidentifier() for model_field in path):
+            access = 'obj.' + '.'.join(
+                model_field.attname if model_field is path[-1] else model_field.name for model_field in path
+            )
+            if len(path) == 1:
+                return [f"v = {access}"]
+            # Una FK nula produce el AttributeError que Field.get_attribute convierte en la política del campo
+            return [
+                "try:",
+                f"    v = {access}",
+                "except ObjectDoesNotExist:",
+                "    v = None",
+                "except AttributeError:",
+                f"    {self.get_missing_policy(index, field)}",
+            ]
+
+        return [
+            "try:",
+            f"    v = _get_attribute(obj, {self.constant(list(field.source_attrs))})",
+            "except (KeyError, AttributeError):",
+            f"    {self.get_missing_policy(index, field)}",
+        ]
+
+    def compile_row_getter(self, index, field):
+        # Una FK nula en el camino equivale al AttributeError que se produciría sobre la instancia
+        path = self.get_concrete_path(field)
+        if path is None:
+            return self.disable_rows()
+
+        names = [model_field.name for model_field in path]
+        nullable = ['__'.join(names[:position]) for position in range(1, len(names))]
+        lookup = '__'.join(names)
+        self.value_fields.extend(nullable + [lookup])
+        if not nullable:
+            return [f"v = row[{lookup!r}]"]
+
+        missing = ' or '.join(f"row[{name!r}] is None" for name in nullable)
+        return [
+            f"if {missing}:",
+            f"    {self.get_missing_policy(index, field)}",
+            "else:",
+            f"    v = row[{lookup!r}]",
+        ]
+
+    def get_concrete_path(self, field):
+        # Campos del modelo recorridos por source: FKs hacia adelante y una columna final
+        current = self.model
+        path = []
+        for position, attr in enumerate(field.source_attrs):
+            model_field = self.get_model_field(current, attr)
+            if model_field is None or not model_field.concrete:
+                return None
+
+            path.append(model_field)
+            if position == len(field.source_attrs) - 1:
+                return None if model_field.is_relation else path
+            if not model_field.many_to_one:
+                return None
+            current = model_field.related_model
+        return None
+
+    def get_model_field(self, model, name):
+        try:
+            return model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+    # Pasos de to_representation de las clases del repo, de la más interna a la externa
+
+    def get_representation_steps(self):
+        steps = {
+            BaseModelSerializer: self.compile_base_step,
+            StatusMixin: self.compile_status_step,
+            TimestampMixin: self.compile_timestamp_step,
+        }
+        found = []
+        for klass in self.serializer_class.__mro__:
+            if klass is serializers.Serializer:
+                break
+            if 'to_representation' not in klass.__dict__:
+                continue
+            if klass not in steps:
+                raise CompilationError(f"{klass.__name__}.to_representation no es compilable")
+            found.append(steps[klass])
+        return reversed(found)
+
+    def compile_base_step(self):
+        lines = []
+        for name in ('created_at', 'modified_at'):
+            lines += [f"if d.get({name!r}) is None:", f"    d[{name!r}] = None"]
+        return lines, lines
+
+    def compile_status_step(self):
+        if not hasattr(self.model, 'is_active'):
+            return [], []
+        self.value_fields.append('is_active')
+        return (
+            ["d['status_display'] = 'Activo' if obj.is_active else 'Inactivo'"],
+            ["d['status_display'] = 'Activo' if row['is_active'] else 'Inactivo'"],
+        )
+
+    def compile_timestamp_step(self):
+        instance_lines, row_lines = [], []
+        for name in ('created_at', 'modified_at'):
+            if not hasattr(self.model, name):
+                continue
+            self.value_fields.append(name)
+            for lines, getter in ((instance_lines, f"obj.{name}"), (row_lines, f"row[{name!r}]")):
+                lines += [
+                    f"v = {getter}",
+                    "if v:",
+                    f"    d['{name}_formatted'] = v.strftime('%d/%m/%Y %H:%M')",
+                ]
+        return instance_lines, row_lines
+
+
+class CompiledListSerializer(BulkListSerializer):
+    # Solo lectura: to_representation delega en la función compilada del child
+
+    def __init__(self, *args, **kwargs):
+        self.compiled = kwargs.pop('compiled')
+        super().__init__(*args, **kwargs)
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        return self.compiled.serialize(self.child, iterable)
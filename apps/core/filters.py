@@ -1,11 +1,121 @@
 import django_filters
+from datetime import datetime, time, timedelta, timezone as dt_timezone
 from django.db import models
+from django.utils import timezone
+from django_filters.constants import EMPTY_VALUES
+
+
+# Los filtros por fecha comparan el datetime con límites calculados en la zona horaria
+# activa (rango semiabierto [inicio, fin)) en lugar de usar __date, que convierte la
+# columna y no permite usar los índices de created_at/modified_at.
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def get_day_bound(day, days=0):
+    # Inicio del día (más `days`), o None si no es representable: el día siguiente a
+    # 9999-12-31, o una fecha extrema que se sale de rango al pasarla a UTC. Un límite
+    # así no restringe nada, por lo que el filtro simplemente no lo aplica.
+    try:
+        value = start_of_day(day + timedelta(days=days))
+        value.astimezone(dt_timezone.utc)
+    except (OverflowError, ValueError):
+        return None
+    return value
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    return day.replace(year=day.year + month // 12, month=month % 12 + 1, day=1)
+
+
+def get_relative_range(name, today=None):
+    today = today or timezone.localdate()
+    month_start = today.replace(day=1)
+    ranges = {
+        'today': (today, today + timedelta(days=1)),
+        'yesterday': (today - timedelta(days=1), today),
+        'last_7_days': (today - timedelta(days=6), today + timedelta(days=1)),
+        'last_30_days': (today - timedelta(days=29), today + timedelta(days=1)),
+        'this_week': (today - timedelta(days=today.weekday()), today + timedelta(days=1)),
+        'this_month': (month_start, add_months(month_start, 1)),
+        'last_month': (add_months(month_start, -1), month_start),
+        'this_year': (today.replace(month=1, day=1), today.replace(year=today.year + 1, month=1, day=1)),
+    }
+    start, end = ranges[name]
+    return start_of_day(start), start_of_day(end)
+
+
+class LocalDateFilter(django_filters.DateFilter):
+    # Fecha local: 'from' -> >= inicio del día; 'to' -> < inicio del día siguiente
+
+    def __init__(self, *args, bound='from', **kwargs):
+        self.bound = bound
+        kwargs['lookup_expr'] = 'gte' if bound == 'from' else 'lt'
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        bound = get_day_bound(value, days=1 if self.bound == 'to' else 0)
+        if bound is None:
+            return qs
+        return super().filter(qs, bound)
+
+
+class RelativeDateRangeFilter(django_filters.ChoiceFilter):
+    RANGE_CHOICES = (
+        ('today', 'Hoy'),
+        ('yesterday', 'Ayer'),
+        ('last_7_days', 'Últimos 7 días'),
+        ('last_30_days', 'Últimos 30 días'),
+        ('this_week', 'Esta semana'),
+        ('this_month', 'Este mes'),
+        ('last_month', 'Mes anterior'),
+        ('this_year', 'Este año'),
+    )
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('choices', self.RANGE_CHOICES)
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        start, end = get_relative_range(value)
+        return self.get_method(qs)(**{f"{self.field_name}__gte": start, f"{self.field_name}__lt": end})
+
+
+class MonthFilter(django_filters.DateFilter):
+    # Mes local en formato AAAA-MM
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('input_formats', ['%Y-%m'])
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        start = value.replace(day=1)
+        try:
+            end = get_day_bound(add_months(start, 1))
+        except ValueError:
+            # Diciembre de 9999: sin límite superior
+            end = None
+        bounds = {f"{self.field_name}__gte": get_day_bound(start), f"{self.field_name}__lt": end}
+        return self.get_method(qs)(**{lookup: bound for lookup, bound in bounds.items() if bound is not None})
+
 
 class BaseFilterSet(django_filters.FilterSet):
-    created_date_from = django_filters.DateFilter(field_name='created_at', lookup_expr='date__gte')
-    created_date_to = django_filters.DateFilter(field_name='created_at', lookup_expr='date__lte')
-    updated_date_from = django_filters.DateFilter(field_name='modified_at', lookup_expr='date__gte')
-    updated_date_to = django_filters.DateFilter(field_name='modified_at', lookup_expr='date__lte')
+    created_date_from = LocalDateFilter(field_name='created_at', bound='from')
+    created_date_to = LocalDateFilter(field_name='created_at', bound='to')
+    updated_date_from = LocalDateFilter(field_name='modified_at', bound='from')
+    updated_date_to = LocalDateFilter(field_name='modified_at', bound='to')
+    created_within = RelativeDateRangeFilter(field_name='created_at')
+    updated_within = RelativeDateRangeFilter(field_name='modified_at')
+    created_month = MonthFilter(field_name='created_at')
+    updated_month = MonthFilter(field_name='modified_at')
     is_active = django_filters.BooleanFilter()
 
     class Meta:
@@ -19,7 +129,11 @@ class BaseFilterSet(django_filters.FilterSet):
     def qs(self):
         queryset = super().qs
 
-        if hasattr(self._meta.model, 'is_active'):
+        # Los viewsets ya parten de un queryset con alcance (AuditQuerySet.scoped), que
+        # decide is_active según ?include_inactive; solo se filtra aquí si el filterset se
+        # usa por su cuenta. Antes se volvía a filtrar is_active=True y ?include_inactive=1
+        # no tenía efecto sin ?is_active=.
+        if hasattr(self._meta.model, 'is_active') and not getattr(queryset, 'is_scoped', False):
             if 'is_active' not in self.data:
                 queryset = queryset.filter(is_active=True)
 
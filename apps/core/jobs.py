@@ -0,0 +1,228 @@
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import checks
+from django.core.cache import caches
+from django.db import close_old_connections, connections, transaction
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.request import Request
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+def get_options():
+    return getattr(settings, 'BULK_JOBS', {})
+
+
+def get_job_key(job_id):
+    return f"bulk_job:{job_id}"
+
+
+def get_job_cache():
+    # El payload y el resultado viven en una caché compartida por todos los workers
+    return caches[get_options().get('CACHE', 'default')]
+
+
+def get_job(job_id):
+    return get_job_cache().get(get_job_key(job_id))
+
+
+def save_job(job):
+    get_job_cache().set(get_job_key(job['id']), job, timeout=get_options().get('RESULT_TTL', 86400))
+    return job
+
+
+def update_job(job_id, **fields):
+    job = get_job(job_id)
+    if job is None:
+        return None
+    job.update(fields)
+    return save_job(job)
+
+
+def public_job(job):
+    return {key: value for key, value in job.items() if key not in ('payload', 'query_string', 'viewset')}
+
+
+def summarize_result(result):
+    # Del resultado solo se guardan el mensaje, los contadores y los errores; las filas
+    # serializadas (bulk_create) se reducen a su número y a una lista acotada de ids
+    limit = get_options().get('RESULT_MAX_ITEMS', 100)
+    if not isinstance(result, dict):
+        return None
+    summary = {key: value for key, value in result.items() if key not in ('data', 'errors')}
+
+    data = result.get('data')
+    if isinstance(data, list):
+        summary['data'] = {
+            'count': len(data),
+            'ids': [item.get('id') for item in data[:limit] if isinstance(item, dict)],
+            'ids_truncated': len(data) > limit,
+        }
+    elif data is not None:
+        summary['data'] = data
+
+    errors = result.get('errors')
+    if isinstance(errors, dict) and isinstance(errors.get('bulk_errors'), list):
+        summary['errors'] = {
+            'bulk_errors': errors['bulk_errors'][:limit],
+            'errors_truncated': len(errors['bulk_errors']) > limit,
+        }
+    elif errors is not None:
+        summary['errors'] = errors
+    return summary
+
+
+def create_job(viewset, operation, payload, request):
+    total = len(payload.get('ids', [])) if isinstance(payload, dict) else len(payload)
+    job = save_job({
+        'id': uuid.uuid4().hex,
+        'status': PENDING,
+        'operation': operation,
+        'model': viewset.get_queryset().model._meta.label,
+        'viewset': f"{type(viewset).__module__}.{type(viewset).__qualname__}",
+        'user_id': request.user.pk,
+        'query_string': request.META.get('QUERY_STRING', ''),
+        'payload': payload,
+        'progress': {'total': total, 'processed': 0},
+        'result': None,
+        'status_code': None,
+        'error': None,
+        'created_at': timezone.now().isoformat(),
+        'started_at': None,
+        'finished_at': None,
+    })
+    # Se encola tras el commit para que el worker vea los datos de la petición
+    transaction.on_commit(lambda: get_backend().enqueue(job['id']))
+    return job
+
+
+def build_view(job):
+    # Reconstruye la petición original (usuario y query string) fuera del ciclo HTTP
+    http_request = HttpRequest()
+    http_request.method = 'POST'
+    http_request.GET = QueryDict(job['query_string'])
+    request = Request(http_request)
+    request.user = get_user_model().objects.get(pk=job['user_id'])
+
+    view = import_string(job['viewset'])(
+        request=request, action=job['operation'], args=(), kwargs={}, format_kwarg=None
+    )
+    view.request = request
+    view.headers = {}
+    return view
+
+
+def run_job(job_id):
+    job = update_job(job_id, status=RUNNING, started_at=timezone.now().isoformat())
+    if job is None:
+        logger.error(f"Error in run_job: job {job_id} no encontrado")
+        return
+
+    try:
+        view = build_view(job)
+        view.bulk_progress_callback = lambda processed: update_job(
+            job_id, progress={**job['progress'], 'processed': processed}
+        )
+        response = view.run_bulk_operation(job['operation'], job['payload'])
+        # El payload ya no hace falta: se descarta para no ocupar la caché hasta RESULT_TTL
+        update_job(
+            job_id,
+            status=SUCCEEDED if response.status_code < 400 else FAILED,
+            status_code=response.status_code,
+            payload=None,
+            result=summarize_result(response.data),
+            finished_at=timezone.now().isoformat(),
+        )
+    except Exception as e:
+        logger.error(f"Error in run_job: {str(e)}")
+        update_job(
+            job_id,
+            status=FAILED,
+            payload=None,
+            error=str(e),
+            finished_at=timezone.now().isoformat(),
+        )
+
+
+class EagerBackend:
+    # Ejecuta el job en la misma petición; útil en pruebas y desarrollo
+
+    def enqueue(self, job_id):
+        run_job(job_id)
+
+
+class ThreadPoolBackend:
+    # Pool de hilos dentro del proceso; no sobrevive a reinicios del worker
+
+    _executor = None
+    _lock = threading.Lock()
+
+    def get_executor(self):
+        with self._lock:
+            if ThreadPoolBackend._executor is None:
+                ThreadPoolBackend._executor = ThreadPoolExecutor(
+                    max_workers=get_options().get('MAX_WORKERS', 4),
+                    thread_name_prefix='bulk-job',
+                )
+        return ThreadPoolBackend._executor
+
+    def enqueue(self, job_id):
+        self.get_executor().submit(self.run, job_id)
+
+    def run(self, job_id):
+        close_old_connections()
+        try:
+            run_job(job_id)
+        finally:
+            connections.close_all()
+
+
+class CeleryBackend:
+
+    def enqueue(self, job_id):
+        from apps.core.tasks import run_bulk_job
+        run_bulk_job.delay(job_id)
+
+
+def get_backend():
+    return import_string(get_options().get('BACKEND', 'apps.core.jobs.EagerBackend'))()
+
+
+# Cachés que no se comparten entre procesos: un job encolado en un worker no se ve
+# desde otro (consulta de estado) ni desde el proceso de Celery que lo ejecuta
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def check_job_store(app_configs=None, **kwargs):
+    options = get_options()
+    backend = options.get('BACKEND', 'apps.core.jobs.EagerBackend')
+    alias = options.get('CACHE', 'default')
+    if backend == 'apps.core.jobs.EagerBackend':
+        return []
+    if alias not in settings.CACHES:
+        return [checks.Error(
+            f"BULK_JOBS['CACHE'] apunta a la caché '{alias}', que no existe en CACHES.",
+            id='core.E001',
+        )]
+    if settings.CACHES[alias].get('BACKEND') in LOCAL_CACHE_BACKENDS:
+        return [checks.Error(
+            f"{backend} requiere una caché compartida para los jobs; '{alias}' usa "
+            f"{settings.CACHES[alias]['BACKEND']}.",
+            hint="Configure REDIS_URL (o BULK_JOBS_CACHE con una caché compartida) o use apps.core.jobs.EagerBackend.",
+            id='core.E002',
+        )]
+    return []
@@ -0,0 +1,292 @@
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, models, transaction
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.test import APIRequestFactory, force_authenticate
+from apps.core.queries import QueryRecorder
+
+DEFAULT_VIEWSETS = ['apps.business.viewsets.company.CompanyViewSet']
+BULK_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Ejecuta benchmarks de las operaciones CRUD y en lote sobre una base de datos de prueba"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000',
+                            help="Tamaños de tabla separados por coma, p. ej. 10000,100000,1000000")
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--viewset', action='append', dest='viewsets',
+                            help="Ruta del viewset a medir (se puede repetir)")
+        parser.add_argument('--database', default='default',
+                            help="Alias de DATABASES; se crea una base de prueba a partir de él. "
+                                 "Solo se admite default, que es la conexión que usan las vistas; "
+                                 "para PostgreSQL se define DATABASE_URL")
+        parser.add_argument('--output', help="Archivo JSON de resultados")
+        parser.add_argument('--compare', help="Archivo JSON de una ejecución anterior para comparar")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(size) for size in options['sizes'].split(','))
+        except ValueError:
+            raise CommandError("--sizes debe ser una lista de enteros separados por coma")
+
+        random.seed(options['seed'])
+        # Secuencia compartida para que los valores únicos nunca se repitan entre tamaños
+        self.sequence = itertools.count()
+        viewsets = [import_string(path) for path in options['viewsets'] or DEFAULT_VIEWSETS]
+        alias = options['database']
+        # Las vistas consultan siempre la conexión default: con otro alias solo ese tendría
+        # base de prueba y las escrituras del benchmark irían a la base real
+        if alias != 'default':
+            raise CommandError("--database solo admite 'default'; para otro motor define DATABASE_URL")
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={alias})
+        try:
+            user = User.objects.db_manager(alias).create_superuser('benchmark', 'benchmark@example.com', 'benchmark')
+            results = []
+            for viewset in viewsets:
+                for size in sizes:
+                    self.stdout.write(f"{viewset.__name__} con {size} registros...")
+                    results.extend(self.run_viewset(viewset, size, user, options['iterations'], alias))
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = {'meta': self.get_meta(alias, options), 'results': results}
+        output = options['output'] or os.path.join(
+            settings.BASE_DIR, 'benchmark_results',
+            f"{report['meta']['commit'] or 'local'}-{timezone.now():%Y%m%d%H%M%S}.json"
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+
+        self.print_results(results, self.load_previous(options['compare']))
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {output}"))
+
+    def run_viewset(self, viewset, size, user, iterations, alias):
+        model = viewset.queryset.model
+        cache.clear()
+        self.seed(model, size, user, alias)
+
+        factory = APIRequestFactory()
+        pks = list(model._default_manager.using(alias).values_list('pk', flat=True)[:1000])
+        search_term = str(getattr(model._default_manager.using(alias).first(), 'name', ''))[:3]
+        last_page = max(size // 20, 1)
+
+        def call(method, actions, path='/', data=None, **kwargs):
+            request = getattr(factory, method)(path, data, format='json')
+            force_authenticate(request, user=user)
+            return viewset.as_view(actions)(request, **kwargs)
+
+        def rolled_back(run):
+            # Todas las escrituras se revierten para que cada iteración (y cada escenario
+            # posterior) parta de la tabla con el tamaño indicado
+            def wrapper():
+                with transaction.atomic(using=alias):
+                    response = run()
+                    transaction.set_rollback(True, using=alias)
+                return response
+            return wrapper
+
+        delete_ids = [
+            str(pk) for pk in
+            model._default_manager.using(alias).order_by('-created_at').values_list('pk', flat=True)[:BULK_SIZE]
+        ]
+
+        def next_payload(count):
+            rows = []
+            for _ in range(count):
+                rows.append(self.build_payload(model, next(self.sequence)))
+            return rows
+
+        scenarios = [
+            ('list', 'list', 1, lambda: call('get', {'get': 'list'})),
+            ('list_search', 'list', 1, lambda: call('get', {'get': 'list'}, f'/?search={search_term}')),
+            ('list_filter', 'list', 1, lambda: call('get', {'get': 'list'}, '/?is_active=true')),
+            ('list_ordering', 'list', 1, lambda: call('get', {'get': 'list'}, '/?ordering=-created_at')),
+            ('list_deep_page', 'list', 1, lambda: call('get', {'get': 'list'}, f'/?page={last_page}')),
+            ('list_cursor', 'list', 1, lambda: call('get', {'get': 'list'}, '/?pagination=cursor')),
+            ('retrieve', 'retrieve', 1, lambda: call('get', {'get': 'retrieve'}, pk=random.choice(pks))),
+            ('create', 'create', 1, rolled_back(lambda: call('post', {'post': 'create'}, data=next_payload(1)[0]))),
+            ('bulk_create', 'bulk_create', BULK_SIZE, rolled_back(lambda: call(
+                'post', {'post': 'bulk_create'}, data=next_payload(BULK_SIZE)
+            ))),
+            ('bulk_update', 'bulk_update', BULK_SIZE, rolled_back(lambda: call(
+                'patch', {'patch': 'bulk_update'},
+                data=[{'id': str(pk), 'name': f"Bench {random.randint(0, 10 ** 6)}"} for pk in random.sample(pks, min(BULK_SIZE, len(pks)))]
+            ))),
+            ('bulk_delete', 'bulk_delete', len(delete_ids), rolled_back(lambda: call(
+                'delete', {'delete': 'bulk_delete'}, data={'ids': delete_ids}
+            ))),
+        ]
+
+        results = []
+        for name, action, rows_per_call, run in scenarios:
+            if not hasattr(viewset, action):
+                continue
+            results.append(self.measure(viewset, size, name, rows_per_call, run, iterations))
+        return results
+
+    def measure(self, viewset, size, name, rows_per_call, run, iterations):
+        run()  # calentamiento
+        latencies = []
+        query_counts = []
+        status_codes = set()
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            with QueryRecorder(count_only=True) as recorder:
+                start = time.perf_counter()
+                response = run()
+                latencies.append(time.perf_counter() - start)
+            query_counts.append(recorder.count)
+            status_codes.add(response.status_code)
+        elapsed = time.perf_counter() - started
+
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        latencies.sort()
+        return {
+            'viewset': viewset.__name__,
+            'size': size,
+            'scenario': name,
+            'iterations': iterations,
+            'status_codes': sorted(status_codes),
+            'throughput_ops': iterations / elapsed,
+            'throughput_rows': iterations * rows_per_call / elapsed,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'queries_mean': statistics.mean(query_counts),
+            'peak_memory_kb': peak / 1024,
+        }
+
+    def seed(self, model, size, user, alias):
+        manager = model._default_manager.using(alias)
+        existing = manager.count()
+        if existing > size:
+            manager.all().delete()
+            existing = 0
+
+        batch = []
+        audit = {'created_by': user} if hasattr(model, 'created_by') else {}
+        for _ in range(existing, size):
+            batch.append(model(**self.build_payload(model, next(self.sequence)), **audit))
+            if len(batch) >= 5000:
+                manager.bulk_create(batch)
+                batch = []
+        if batch:
+            manager.bulk_create(batch)
+
+    def build_payload(self, model, i):
+        # Valores sintéticos por tipo de campo, únicos cuando el campo lo exige
+        payload = {}
+        for field in model._meta.concrete_fields:
+            if (field.primary_key or field.is_relation or field.has_default()
+                    or getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)):
+                continue
+            if field.null and not field.unique and random.random() < 0.5:
+                continue
+
+            if isinstance(field, models.EmailField):
+                value = f"user{i}@example.com"
+            elif isinstance(field, (models.CharField, models.TextField)):
+                value = f"{field.name[:1].upper()}{to_base36(i)}" if field.unique else f"{random_word()} {to_base36(i)}"
+                if field.max_length:
+                    value = value[:field.max_length]
+            elif isinstance(field, models.BooleanField):
+                value = random.random() < 0.9
+            elif isinstance(field, (models.IntegerField, models.DecimalField, models.FloatField)):
+                value = i if field.unique else random.randint(0, 1000)
+            elif isinstance(field, models.DateTimeField):
+                value = timezone.now()
+            else:
+                continue
+            payload[field.name] = value
+        return payload
+
+    def get_meta(self, alias, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+
+        return {
+            'commit': commit,
+            'timestamp': timezone.now().isoformat(),
+            'database': connections[alias].vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'iterations': options['iterations'],
+        }
+
+    def load_previous(self, path):
+        if not path:
+            return {}
+        with open(path) as previous_file:
+            previous = json.load(previous_file)
+        return {
+            (item['viewset'], item['size'], item['scenario']): item
+            for item in previous['results']
+        }
+
+    def print_results(self, results, previous):
+        header = f"{'escenario':<28}{'tamaño':>10}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'mem KB':>10}"
+        self.stdout.write(header)
+        for item in results:
+            line = (
+                f"{item['viewset'] + '.' + item['scenario']:<28}{item['size']:>10}{item['throughput_ops']:>10.1f}"
+                f"{item['p50_ms']:>10.2f}{item['p95_ms']:>10.2f}{item['p99_ms']:>10.2f}"
+                f"{item['queries_mean']:>9.1f}{item['peak_memory_kb']:>10.0f}"
+            )
+            before = previous.get((item['viewset'], item['size'], item['scenario']))
+            if before and before['p50_ms']:
+                line += f"  p50 {(item['p50_ms'] - before['p50_ms']) / before['p50_ms']:+.1%}"
+            self.stdout.write(line)
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, max(0, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def to_base36(number):
+    digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    result = ''
+    while True:
+        number, remainder = divmod(number, 36)
+        result = digits[remainder] + result
+        if not number:
+            return result
+
+
+def random_word():
+    return random.choice(['ALFA', 'BETA', 'GAMMA', 'DELTA', 'OMEGA', 'SIGMA', 'KAPPA', 'ZETA'])
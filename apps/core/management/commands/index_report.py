@@ -0,0 +1,153 @@
+import re
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import URLResolver, get_resolver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+_SQLITE_SCAN_RE = re.compile(r'^SCAN (\S+)(?: AS \S+)?$')
+
+
+def get_registered_viewsets(patterns=None):
+    # Viewsets con acción list registrados en las URLs (routers de DRF)
+    viewsets = {}
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            viewsets.update(get_registered_viewsets(pattern.url_patterns))
+            continue
+        callback = pattern.callback
+        actions = getattr(callback, 'actions', None) or {}
+        viewset = getattr(callback, 'cls', None)
+        if 'list' in actions.values() and getattr(viewset, 'queryset', None) is not None:
+            viewsets.setdefault(viewset, None)
+    return viewsets
+
+
+def get_plan_issues(connection, sql, params, table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+        plan = [str(row[-1]) for row in cursor.fetchall()]
+
+    issues = []
+    for line in plan:
+        detail = line.strip().lstrip('->').strip()
+        if connection.vendor == 'sqlite':
+            match = _SQLITE_SCAN_RE.match(detail)
+            if match and match.group(1).strip('"') == table:
+                issues.append("recorrido completo de la tabla")
+            elif detail.startswith('USE TEMP B-TREE FOR ORDER BY'):
+                issues.append("ordenación sin índice")
+            elif detail.startswith('USE TEMP B-TREE FOR RIGHT PART OF ORDER BY'):
+                issues.append("desempate del orden sin índice")
+        elif connection.vendor == 'postgresql':
+            if detail.startswith(('Seq Scan on', 'Parallel Seq Scan on')) and f" {table} " in f"{detail} ".replace('"', ''):
+                issues.append("recorrido completo de la tabla")
+            elif detail.startswith(('Sort ', 'Incremental Sort ')):
+                issues.append("ordenación sin índice")
+    return plan, list(dict.fromkeys(issues))
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta los listados de cada viewset registrado, revisa con EXPLAIN las consultas "
+        "que generan e informa de recorridos completos y ordenaciones sin índice. Usar "
+        "contra una base con datos representativos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--viewset', action='append', dest='viewsets',
+                            help="Ruta del viewset a revisar (se puede repetir); por defecto todos los registrados")
+        parser.add_argument('--username', help="Usuario con el que se hacen las peticiones; por defecto el primer superusuario")
+        parser.add_argument('--verbose-plans', action='store_true', help="Muestra el plan completo de cada consulta")
+
+    def handle(self, *args, **options):
+        if options['viewsets']:
+            viewsets = [import_string(path) for path in options['viewsets']]
+        else:
+            viewsets = list(get_registered_viewsets())
+
+        if options['username']:
+            user = User.objects.filter(username=options['username']).first()
+        else:
+            user = User.objects.filter(is_superuser=True, is_active=True).order_by('pk').first()
+        if user is None:
+            raise CommandError("No hay usuario para las peticiones; indique --username")
+
+        missing = 0
+        for viewset in viewsets:
+            missing += self.report_viewset(viewset, user, options['verbose_plans'])
+
+        if missing:
+            self.stdout.write(self.style.WARNING(f"{missing} consultas sin índice adecuado"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Todas las consultas revisadas usan índices"))
+
+    def report_viewset(self, viewset, user, verbose_plans):
+        model = viewset.queryset.model
+        table = model._meta.db_table
+        connection = connections[viewset.queryset.db]
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{viewset.__name__} ({model._meta.label}, {model._default_manager.count()} registros)"
+        ))
+
+        # Sin caché de respuestas para que cada escenario llegue a la base de datos
+        view = type(viewset.__name__, (viewset,), {'cache_response_timeout': None}).as_view({'get': 'list'})
+        factory = APIRequestFactory()
+        missing = 0
+
+        for name, query_string, fields in self.get_scenarios(viewset):
+            captured = []
+
+            def capture(execute, sql, params, many, context):
+                if sql.lstrip().upper().startswith('SELECT') and table in sql:
+                    captured.append((sql, params))
+                return execute(sql, params, many, context)
+
+            request = factory.get(f"/{query_string}")
+            force_authenticate(request, user=user)
+            with connection.execute_wrapper(capture):
+                response = view(request)
+            if response.status_code != 200:
+                self.stdout.write(f"  {name}: respuesta {response.status_code}, se omite")
+                continue
+
+            for sql, params in captured:
+                plan, issues = get_plan_issues(connection, sql, params, table)
+                if verbose_plans:
+                    self.stdout.write(f"  {name}: {sql}")
+                    for line in plan:
+                        self.stdout.write(f"      {line}")
+                if not issues:
+                    continue
+                missing += 1
+                self.stdout.write(self.style.WARNING(f"  {name}: {', '.join(issues)}"))
+                self.stdout.write(f"      {sql[:200]}")
+                if fields:
+                    self.stdout.write(
+                        f"      Sugerencia: índice parcial sobre registros activos para {fields} "
+                        f"(Meta.indexes del modelo; ver apps.core.models.get_default_indexes)"
+                    )
+        return missing
+
+    def get_scenarios(self, viewset):
+        scenarios = [('list', '', list(getattr(viewset, 'ordering', None) or viewset.queryset.model._meta.ordering))]
+
+        ordering_fields = getattr(viewset, 'ordering_fields', None)
+        if isinstance(ordering_fields, (list, tuple)):
+            for field in ordering_fields:
+                scenarios.append((f"ordering={field}", f"?ordering={field}", [field]))
+                scenarios.append((f"ordering=-{field}", f"?ordering=-{field}", [f"-{field}"]))
+
+        filterset_class = getattr(viewset, 'filterset_class', None)
+        base_filters = getattr(filterset_class, 'base_filters', {})
+        since = (timezone.localdate() - timedelta(days=30)).isoformat()
+        for name, field in (('created_date_from', 'created_at'), ('updated_date_from', 'modified_at')):
+            if name in base_filters:
+                scenarios.append((name, f"?{name}={since}", [field]))
+
+        if 'cursor' in getattr(viewset, 'pagination_classes', {}):
+            scenarios.append(('pagination=cursor', '?pagination=cursor', None))
+        return scenarios
@@ -0,0 +1,164 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+METRICS = {
+    'api_requests_total': ('counter', "Requests atendidos por vista y acción", None),
+    'api_request_duration_seconds': ('histogram', "Latencia total del request", LATENCY_BUCKETS),
+    'api_serializer_duration_seconds': ('histogram', "Tiempo de serialización", LATENCY_BUCKETS),
+    'api_render_duration_seconds': ('histogram', "Tiempo de renderizado de la respuesta", LATENCY_BUCKETS),
+    'api_response_size_bytes': ('histogram', "Tamaño del cuerpo de la respuesta", SIZE_BUCKETS),
+    'api_db_queries_total': ('counter', "Consultas SQL ejecutadas", None),
+    'api_db_query_duration_seconds_total': ('counter', "Tiempo acumulado en consultas SQL", None),
+}
+
+
+def get_options():
+    return getattr(settings, 'METRICS', {})
+
+
+class MetricsRegistry:
+    # Métricas en memoria del proceso. Con METRICS['MULTIPROCESS_DIR'] cada worker vuelca
+    # su estado a un archivo propio y el endpoint de scrape suma todos los archivos.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._last_flush = time.monotonic()
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[i] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, list(labels), list(values)] for (name, labels), values in self._histograms.items()],
+            }
+
+    def maybe_flush(self):
+        directory = get_options().get('MULTIPROCESS_DIR')
+        if not directory:
+            return
+        if time.monotonic() - self._last_flush < get_options().get('FLUSH_INTERVAL', 5):
+            return
+        self.flush(directory)
+
+    def flush(self, directory=None):
+        directory = directory or get_options().get('MULTIPROCESS_DIR')
+        if not directory:
+            return
+
+        self._last_flush = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as temp_file:
+            json.dump(self.snapshot(), temp_file)
+        os.replace(temp_path, os.path.join(directory, f"metrics_{os.getpid()}.json"))
+
+    def collect(self):
+        directory = get_options().get('MULTIPROCESS_DIR')
+        if not directory:
+            return [self.snapshot()]
+
+        self.flush(directory)
+        snapshots = []
+        for filename in sorted(os.listdir(directory)):
+            if not (filename.startswith('metrics_') and filename.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as metrics_file:
+                    snapshots.append(json.load(metrics_file))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+
+registry = MetricsRegistry()
+atexit.register(registry.flush)
+
+
+def record_request(labels, status_code, duration, query_count, query_duration,
+                   serializer_duration, render_duration, response_size):
+    registry.inc('api_requests_total', {**labels, 'status': str(status_code)})
+    registry.observe('api_request_duration_seconds', labels, duration)
+    registry.observe('api_render_duration_seconds', labels, render_duration)
+    registry.observe('api_response_size_bytes', labels, response_size)
+    if serializer_duration:
+        registry.observe('api_serializer_duration_seconds', labels, serializer_duration)
+    registry.inc('api_db_queries_total', labels, query_count)
+    registry.inc('api_db_query_duration_seconds_total', labels, query_duration)
+    registry.maybe_flush()
+
+
+def add_serializer_time(request, seconds):
+    if request is not None:
+        request._metrics_serializer_seconds = getattr(request, '_metrics_serializer_seconds', 0) + seconds
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def render_prometheus():
+    counters = {}
+    histograms = {}
+    for snapshot in registry.collect():
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(tuple(label) for label in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, values in snapshot['histograms']:
+            key = (name, tuple(tuple(label) for label in labels))
+            merged = histograms.setdefault(key, [0] * len(values))
+            for i, value in enumerate(values):
+                merged[i] += value
+
+    lines = []
+    for name, (metric_type, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        if metric_type == 'counter':
+            for (metric_name, labels), value in sorted(counters.items()):
+                if metric_name == name:
+                    lines.append(f"{name}{format_labels(labels)} {value}")
+            continue
+
+        for (metric_name, labels), values in sorted(histograms.items()):
+            if metric_name != name:
+                continue
+            for bound, count in zip(buckets, values):
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', repr(float(bound))),))} {count}")
+            lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {values[-1]}")
+            lines.append(f"{name}_sum{format_labels(labels)} {values[-2]}")
+            lines.append(f"{name}_count{format_labels(labels)} {values[-1]}")
+
+    return '\n'.join(lines) + '\n'
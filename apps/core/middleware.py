@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from apps.core.queries import QueryRecorder, format_repeated
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+class QueryInspectorMiddleware:
+    # Detecta consultas repetidas (N+1) por request. Se activa con QUERY_INSPECTOR['ENABLED']
+    # y según MODE registra un warning, agrega cabeceras a la respuesta o lanza NPlusOneError.
+
+    def __init__(self, get_response):
+        options = getattr(settings, 'QUERY_INSPECTOR', {})
+        if not options.get('ENABLED'):
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        self.threshold = options.get('THRESHOLD', 5)
+        self.mode = options.get('MODE', 'log')
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with recorder:
+            response = self.get_response(request)
+
+        if response.streaming and not getattr(response, 'is_async', False):
+            # Las consultas de una respuesta en streaming (export) ocurren al iterarla
+            response.streaming_content = self.inspect_stream(request, response.streaming_content, recorder)
+            return response
+
+        repeated = recorder.repeated(self.threshold)
+
+        if self.mode == 'header':
+            response['X-Query-Count'] = str(recorder.count)
+            if repeated:
+                worst = repeated[0]
+                response['X-N-Plus-One'] = f"{worst['count']}x {worst['call_site']}"
+
+        self.report(request, recorder, repeated, log=self.mode == 'log')
+        return response
+
+    def inspect_stream(self, request, content, recorder):
+        with recorder:
+            yield from content
+        # Las cabeceras ya se enviaron: en modo header se registra como en modo log
+        self.report(request, recorder, recorder.repeated(self.threshold), log=True)
+
+    def report(self, request, recorder, repeated, log):
+        if not repeated:
+            return
+        message = f"N+1 en {request.method} {request.path} ({recorder.count} consultas):\n{format_repeated(repeated)}"
+        if self.mode == 'raise':
+            raise NPlusOneError(message)
+        if log:
+            logger.warning(message)
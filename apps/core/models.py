@@ -1,10 +1,105 @@
+from django.core.exceptions import FieldDoesNotExist
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import RegexValidator
 from django.utils import timezone
 from django.utils.text import slugify
+from apps.core.cache import bump_model_generation_on_commit
 import uuid
 
+def has_model_field(model, name):
+    try:
+        model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def get_scope_condition(model, include_inactive=False, include_deleted=False):
+    # Predicado único de "registros vivos"; los índices parciales usan el mismo
+    condition = models.Q()
+    if not include_inactive and has_model_field(model, 'is_active'):
+        condition &= models.Q(is_active=True)
+    if not include_deleted and has_model_field(model, 'deleted_at'):
+        condition &= models.Q(deleted_at__isnull=True)
+    return condition
+
+
+class AuditQuerySet(models.QuerySet):
+    # El manager por defecto no filtra (admin, validaciones de unicidad, relaciones);
+    # las consultas de la API parten de alive() o scoped().
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._scope = None
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._scope = self._scope
+        return clone
+
+    @property
+    def is_scoped(self):
+        return self._scope is not None
+
+    def scoped(self, include_inactive=False, include_deleted=False):
+        # is_active y deleted_at se deciden por separado, como ?include_inactive e
+        # ?include_deleted. Un filtro ya aplicado no se puede quitar: sobre un queryset con
+        # alcance el resultado es la intersección y solo se añade lo que falte.
+        applied_inactive, applied_deleted = self._scope or (True, True)
+        scope = (include_inactive and applied_inactive, include_deleted and applied_deleted)
+        if scope == self._scope:
+            return self._chain()
+        queryset = self.filter(get_scope_condition(
+            self.model,
+            include_inactive=scope[0] or not applied_inactive,
+            include_deleted=scope[1] or not applied_deleted,
+        ))
+        queryset._scope = scope
+        return queryset
+
+    def alive(self):
+        return self.scoped()
+
+    def with_deleted(self):
+        # Sin filtro de deleted_at ni de is_active: soft_delete() deja los eliminados
+        # inactivos, así que levantar solo deleted_at no los mostraría
+        return self.scoped(include_inactive=True, include_deleted=True)
+
+    def only_deleted(self):
+        if not has_model_field(self.model, 'deleted_at'):
+            return self.none()
+        queryset = self.filter(deleted_at__isnull=False)
+        queryset._scope = (True, True)
+        return queryset
+
+    # update() y bulk_create() no emiten post_save: se invalida aquí la generación del
+    # modelo (conteos y respuestas cacheadas); bulk_update() pasa por update()
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows:
+            bump_model_generation_on_commit(self.model, using=self.db)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs:
+            bump_model_generation_on_commit(self.model, using=self.db)
+        return objs
+
+    def soft_delete(self, user=None):
+        # En una sola sentencia UPDATE; modified_at se actualiza a mano porque update()
+        # no aplica auto_now
+        now = timezone.now()
+        return self.update(deleted_at=now, deleted_by=user, is_active=False, **self.get_touch_values(now))
+
+    def restore(self):
+        return self.update(deleted_at=None, deleted_by=None, is_active=True, **self.get_touch_values(timezone.now()))
+
+    def get_touch_values(self, now):
+        return {'modified_at': now} if has_model_field(self.model, 'modified_at') else {}
+
+
 class TimeStampedModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created")
     modified_at = models.DateTimeField(auto_now=True, verbose_name="Modified")
@@ -34,6 +129,11 @@ class AuditModel(TimeStampedModel):
         verbose_name="Is active?",
     )
 
+    # Campos con índice parcial recomendado sobre registros activos (get_default_indexes)
+    indexed_fields = ('name', 'created_at')
+
+    objects = AuditQuerySet.as_manager()
+
     class Meta:
         abstract = True
 
@@ -184,6 +284,8 @@ class SoftDeleteMixin(models.Model):
         blank=True,
     )
 
+    objects = AuditQuerySet.as_manager()
+
     class Meta:
         abstract = True
 
@@ -191,6 +293,22 @@ class SoftDeleteMixin(models.Model):
     def is_deleted(self):
         return self.deleted_at is not None
 
+    def soft_delete(self, user=None):
+        self.deleted_at = timezone.now()
+        self.deleted_by = user
+        self.is_active = False
+        self.save(update_fields=self.get_soft_delete_fields())
+
+    def restore(self):
+        self.deleted_at = None
+        self.deleted_by = None
+        self.is_active = True
+        self.save(update_fields=self.get_soft_delete_fields())
+
+    def get_soft_delete_fields(self):
+        fields = ['deleted_at', 'deleted_by', 'is_active']
+        return fields + ['modified_at'] if has_model_field(type(self), 'modified_at') else fields
+
     @property
     def soft_deleted_at(self):
         self.deleted_at = timezone.now()
@@ -213,3 +331,82 @@ class SlugMixin(models.Model):
         if not self.slug and hasattr(self, 'name'):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
+
+
+def get_default_indexes(model):
+    # Índices recomendados para las consultas de BaseViewSetMixin: parciales sobre
+    # registros activos (y no eliminados) para el ordering del modelo y cada campo de
+    # indexed_fields, y modified_at completo para los filtros por fecha. No se añaden
+    # solos: cada modelo los declara en Meta.indexes (check_default_indexes avisa si
+    # falta alguno). Se llama con el registro de modelos listo, así que get_field ve
+    # también los campos heredados.
+    condition = get_scope_condition(model)
+
+    def get_field(name):
+        try:
+            return model._meta.get_field(name.lstrip('-'))
+        except FieldDoesNotExist:
+            return None
+
+    candidates = [[field for field in model._meta.ordering if isinstance(field, str) and get_field(field)]]
+    candidates += [[name] for name in getattr(model, 'indexed_fields', ()) if get_field(name)]
+
+    indexes = []
+    seen = set()
+    pk_name = model._meta.pk.name
+    for fields in candidates:
+        if not fields or tuple(fields) in seen:
+            continue
+        seen.add(tuple(fields))
+        # Un campo único ya tiene su índice
+        if len(fields) == 1 and get_field(fields[0]).unique:
+            continue
+        # La pk al final sirve de desempate a KeysetPagination
+        if pk_name not in [field.lstrip('-') for field in fields]:
+            fields = [*fields, f"-{pk_name}" if fields[-1].startswith('-') else pk_name]
+        index = models.Index(fields=fields, condition=condition, name='partial')
+        index.set_name_with_model(model)
+        # Sufijo propio para no coincidir con un índice completo sobre los mismos campos
+        index.name = f"{index.name[:-4]}_act"
+        indexes.append(index)
+
+    if get_field('modified_at'):
+        index = models.Index(fields=['modified_at'])
+        index.set_name_with_model(model)
+        indexes.append(index)
+    return indexes
+
+
+def get_index_declaration(index):
+    arguments = [f"fields={list(index.fields)!r}"]
+    if index.condition is not None:
+        lookups = ', '.join(f"{lookup}={value!r}" for lookup, value in index.condition.children)
+        arguments.append(f"condition=models.Q({lookups})")
+    arguments.append(f"name={index.name!r}")
+    return f"models.Index({', '.join(arguments)})"
+
+
+def check_default_indexes(app_configs=None, **kwargs):
+    from django.apps import apps
+    from django.core import checks
+
+    app_configs = apps.get_app_configs() if app_configs is None else app_configs
+    warnings = []
+    for app_config in app_configs:
+        for model in app_config.get_models():
+            meta = model._meta
+            if meta.proxy or not meta.managed or not issubclass(model, AuditModel):
+                continue
+            declared = {(tuple(index.fields), index.condition) for index in meta.indexes}
+            missing = [
+                index for index in get_default_indexes(model)
+                if (tuple(index.fields), index.condition) not in declared
+            ]
+            if missing:
+                warnings.append(checks.Warning(
+                    f"{meta.label} no declara los índices por defecto de AuditModel.",
+                    hint=f"Añadir a Meta.indexes: {', '.join(get_index_declaration(index) for index in missing)}",
+                    obj=model,
+                    id='core.W001',
+                ))
+    return warnings
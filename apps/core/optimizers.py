@@ -0,0 +1,118 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from apps.core.serializers import TimestampMixin, StatusMixin, NestedRelationMixin
+
+_plan_cache = {}
+
+
+def get_queryset_plan(serializer_class, model):
+    key = (serializer_class, model)
+    if key not in _plan_cache:
+        _plan_cache[key] = build_queryset_plan(serializer_class, model)
+    return _plan_cache[key]
+
+
+def build_queryset_plan(serializer_class, model):
+    # Recorre los campos declarados y sus source para decidir qué relaciones
+    # unir con select_related, cuáles precargar y qué columnas pedir con only().
+    select_related = set()
+    prefetch_related = set()
+    only = {model._meta.pk.name}
+    prunable = not issubclass(serializer_class, NestedRelationMixin)
+
+    if issubclass(serializer_class, TimestampMixin):
+        only.update(name for name in ('created_at', 'modified_at') if has_field(model, name))
+    if issubclass(serializer_class, StatusMixin) and has_field(model, 'is_active'):
+        only.add('is_active')
+
+    for field in serializer_class().fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            prunable = False
+            continue
+
+        current = model
+        path = []
+        for position, attr in enumerate(field.source_attrs):
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                # Propiedad o método del modelo: no se sabe qué columnas necesita
+                prunable = False
+                break
+
+            lookup = '__'.join(path + [attr])
+            if model_field.many_to_many or model_field.one_to_many:
+                prefetch_related.add(lookup)
+                break
+            if not model_field.concrete:
+                prunable = False
+                break
+
+            only.add(lookup)
+            if not model_field.is_relation:
+                break
+
+            is_last = position == len(field.source_attrs) - 1
+            if is_last and not isinstance(field, serializers.BaseSerializer):
+                break
+
+            select_related.add(lookup)
+            if is_last:
+                # Serializer anidado: necesita todas las columnas de la relación
+                prunable = False
+                break
+
+            path.append(attr)
+            current = model_field.related_model
+
+    return {
+        'select_related': sorted(select_related),
+        'prefetch_related': sorted(prefetch_related),
+        'only': sorted(only) if prunable else None,
+    }
+
+
+def has_field(model, name):
+    try:
+        model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def get_value_columns(serializer_class, model):
+    key = ('values', serializer_class, model)
+    if key not in _plan_cache:
+        _plan_cache[key] = build_value_columns(serializer_class, model)
+    return _plan_cache[key]
+
+
+def build_value_columns(serializer_class, model):
+    # Columnas (nombre, lookup para values(), campo del serializer) que se pueden leer
+    # directamente de la base; se omiten propiedades, métodos y relaciones múltiples.
+    columns = []
+    for name, field in serializer_class().fields.items():
+        if field.write_only or field.source == '*' or isinstance(field, serializers.BaseSerializer):
+            continue
+
+        current = model
+        path = []
+        for attr in field.source_attrs:
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                path = None
+                break
+            if model_field.many_to_many or model_field.one_to_many or not model_field.concrete:
+                path = None
+                break
+            path.append(attr)
+            if not model_field.is_relation:
+                break
+            current = model_field.related_model
+
+        if path:
+            columns.append((name, '__'.join(path), field))
+    return columns
@@ -1,5 +1,67 @@
-from rest_framework.pagination import  PageNumberPagination
+import base64
+import json
+from functools import partial
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage, Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import  PageNumberPagination, BasePagination
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
 from apps.common.responses import StandardResponse
+from apps.core.cache import aget_model_generation, get_model_generation, get_queryset_digest
+from asgiref.sync import sync_to_async
+
+
+async def afetch(queryset):
+    # aiterator() no admite prefetch_related en Django 4.2; en ese caso se evalúa el
+    # queryset completo (incluidos los prefetch) fuera del event loop.
+    if queryset._prefetch_related_lookups:
+        return [instance async for instance in queryset]
+    return [instance async for instance in queryset.aiterator()]
+
+
+def estimate_count(queryset):
+    # Estimación del planner de PostgreSQL; None en otros motores
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    queryset = queryset.order_by()
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+            return int(row[0]) if row and row[0] >= 0 else None
+
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class CountingPaginator(DjangoPaginator):
+
+    def __init__(self, object_list, per_page, counter=None, **kwargs):
+        self.counter = counter
+        self.count_is_exact = True
+        super().__init__(object_list, per_page, **kwargs)
+
+    @cached_property
+    def count(self):
+        if self.counter is None:
+            return super().count
+        count, self.count_is_exact = self.counter(self.object_list)
+        return count
+
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 20
@@ -7,12 +69,97 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 100
     page_query_param = 'page'
 
+    # 'exact' o 'cached' (por SQL de la consulta, invalidado en escrituras); el viewset
+    # puede optar por 'cached' con su propio atributo count_strategy
+    count_strategy = 'exact'
+    count_cache_timeout = 30
+    # Con un valor (p. ej. 100000) se usa la estimación del planner por encima del umbral
+    count_estimate_threshold = None
+
+    @property
+    def django_paginator_class(self):
+        return partial(CountingPaginator, counter=self.get_count)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count_strategy(self):
+        return getattr(self.view, 'count_strategy', None) or self.count_strategy
+
+    def get_count(self, queryset):
+        if self.count_estimate_threshold is not None:
+            estimate = estimate_count(queryset)
+            if estimate is not None and estimate >= self.count_estimate_threshold:
+                return estimate, False
+
+        if self.get_count_strategy() != 'cached':
+            return queryset.count(), True
+
+        key = self.get_count_cache_key(queryset)
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, self.count_cache_timeout)
+        return count, True
+
+    def get_count_cache_key(self, queryset, generation=None):
+        # Sin el ordering: el COUNT no depende de él
+        digest = get_queryset_digest(queryset.order_by())
+        model = queryset.model
+        if generation is None:
+            generation = get_model_generation(model)
+        return f"pagination_count:{model._meta.label_lower}:{generation}:{digest}"
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        # Igual que paginate_queryset pero con el conteo y la página resueltos con el ORM async
+        self.request = request
+        self.view = view
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        count, count_is_exact = await self.aget_count(queryset)
+        paginator = CountingPaginator(queryset, page_size, counter=lambda object_list: (count, count_is_exact))
+        page_number = self.get_page_number(request, paginator)
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+
+        self.page.object_list = await afetch(self.page.object_list)
+        return list(self.page)
+
+    async def aget_count(self, queryset):
+        if self.count_estimate_threshold is not None:
+            estimate = await sync_to_async(estimate_count)(queryset)
+            if estimate is not None and estimate >= self.count_estimate_threshold:
+                return estimate, False
+
+        if self.get_count_strategy() != 'cached':
+            return await queryset.acount(), True
+
+        key = self.get_count_cache_key(queryset, await aget_model_generation(queryset.model))
+        count = await cache.aget(key)
+        if count is None:
+            count = await queryset.acount()
+            await cache.aset(key, count, self.count_cache_timeout)
+        return count, True
+
     def get_paginated_response(self, data):
+        count = self.page.paginator.count
         return StandardResponse.success(
             data={
                 'results': data,
                 'pagination': {
-                    'count': self.page.paginator.count,
+                    'count': count,
+                    'count_is_exact': self.page.paginator.count_is_exact,
                     'page_size': self.page_size,
                     'current_page': self.page.number,
                     'total_pages': self.page.paginator.num_pages,
@@ -34,3 +181,195 @@ class LargeResultsSetPagination(PageNumberPagination):
     page_size = 50
     page_size_query_param = 'page_size'
     max_page_size = 200
+
+
+# Paginación por clave sobre el ordering del viewset más el pk como desempate:
+# sin COUNT(*) ni OFFSET, cada página filtra desde los valores del último registro.
+class KeysetPagination(BasePagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.build_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.build_page(await afetch(self.get_page_queryset(queryset, request)))
+
+    def get_page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+
+        self.fields = [self.get_field(queryset.model, field) for field in self.ordering]
+
+        self.cursor = self.decode_cursor(request)
+        self.reverse = False
+        if self.cursor is not None:
+            self.reverse = self.cursor['reverse']
+            queryset = queryset.filter(self.build_keyset_filter(self.cursor['values'], self.reverse))
+
+        order_by = [
+            self.get_order_by(field, model_field, self.reverse)
+            for field, model_field in zip(self.ordering, self.fields)
+        ]
+        return queryset.order_by(*order_by)[:self.page_size + 1]
+
+    def build_page(self, results):
+        cursor, reverse = self.cursor, self.reverse
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.next_cursor = self.encode_cursor(results[-1], reverse=False) if self.has_next and results else None
+        self.previous_cursor = self.encode_cursor(results[0], reverse=True) if self.has_previous and results else None
+
+        return results
+
+    def get_paginated_response(self, data):
+        return StandardResponse.success(
+            data={
+                'results': data,
+                'pagination': {
+                    'count': None,
+                    'page_size': self.page_size,
+                    'current_page': None,
+                    'total_pages': None,
+                    'has_next': self.has_next,
+                    'has_previous': self.has_previous,
+                    'next': self.get_next_link(),
+                    'previous': self.get_previous_link(),
+                    'next_cursor': self.next_cursor,
+                    'previous_cursor': self.previous_cursor,
+                }
+            },
+            message="Datos obtenidos exitosamente"
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_ordering(self, queryset):
+        # El OrderingFilter ya dejó el ordering solicitado (o el del viewset) en la query.
+        # Solo se usan campos del modelo: anotaciones como search_rank (IndexedSearchFilter)
+        # se descartan, así que una búsqueda paginada por cursor no se ordena por relevancia.
+        ordering = [field for field in queryset.query.order_by if isinstance(field, str)]
+        if not ordering:
+            ordering = list(queryset.model._meta.ordering or [])
+
+        ordering = [field for field in ordering if self.is_concrete_field(queryset.model, field)]
+        pk_name = queryset.model._meta.pk.name
+        if not any(field.lstrip('-') in ('pk', pk_name) for field in ordering):
+            last_descending = bool(ordering) and ordering[-1].startswith('-')
+            ordering.append(f"-{pk_name}" if last_descending else pk_name)
+        return ordering
+
+    def is_concrete_field(self, model, field):
+        try:
+            model._meta.get_field(field.lstrip('-'))
+        except FieldDoesNotExist:
+            return field.lstrip('-') == 'pk'
+        return True
+
+    def get_field(self, model, field):
+        name = field.lstrip('-')
+        return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+
+    def get_order_by(self, field, model_field, reverse):
+        if reverse:
+            field = self.invert(field)
+        if not model_field.null:
+            return field
+        # Los NULL van siempre al final en el sentido de avance (el motor decide si no)
+        expression = F(field.lstrip('-'))
+        if field.startswith('-'):
+            return expression.desc(nulls_first=reverse, nulls_last=not reverse)
+        return expression.asc(nulls_first=reverse, nulls_last=not reverse)
+
+    def build_keyset_filter(self, values, reverse):
+        # (f1 > v1) OR (f1 = v1 AND f2 > v2) OR ...; en campos nulables los NULL quedan
+        # después de cualquier valor al avanzar y antes al retroceder
+        keyset_filter = Q()
+        equal = Q()
+        for field, model_field, value in zip(self.ordering, self.fields, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            if value is None:
+                if reverse:
+                    keyset_filter |= equal & Q(**{f"{name}__isnull": False})
+                equal &= Q(**{f"{name}__isnull": True})
+                continue
+
+            after = Q(**{f"{name}__{lookup}": value})
+            if model_field.null and not reverse:
+                after |= Q(**{f"{name}__isnull": True})
+            keyset_filter |= equal & after
+            equal &= Q(**{name: value})
+        return keyset_filter
+
+    def invert(self, field):
+        return field[1:] if field.startswith('-') else f"-{field}"
+
+    def encode_cursor(self, instance, reverse):
+        if isinstance(instance, dict):
+            values = [instance[field.lstrip('-')] for field in self.ordering]
+        else:
+            values = [getattr(instance, field.lstrip('-')) for field in self.ordering]
+        payload = json.dumps(
+            {'o': self.ordering, 'v': values, 'r': reverse},
+            cls=JSONEncoder,
+            separators=(',', ':'),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            ordering, values, reverse = payload['o'], payload['v'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        # Un cursor generado con otro ordering no es aplicable a esta consulta
+        if ordering != self.ordering or not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        try:
+            values = [
+                None if value is None else model_field.to_python(value)
+                for model_field, value in zip(self.fields, values)
+            ]
+        except (DjangoValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return {'values': values, 'reverse': reverse}
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_previous_link(self):
+        if not self.previous_cursor:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.previous_cursor)
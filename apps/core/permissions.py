@@ -1,11 +1,18 @@
 from rest_framework.permissions import BasePermission
 from django.contrib.auth.models import Group
+from apps.core.cache import get_user_group_names
 
 class IsOwnerOrReadOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in ['GET', 'HEAD', 'OPTIONS']:
             return True
 
+        if not request.user or not request.user.is_authenticated:
+            return False
+
+        # Comparar ids evita cargar el usuario creador
+        if hasattr(obj, 'created_by_id'):
+            return obj.created_by_id == request.user.pk
         return obj.created_by == request.user
 
 class IsActiveUser(BasePermission):
@@ -22,8 +29,7 @@ class HasGroupPermission(BasePermission):
         if not self.required_groups:
             return True
 
-        user_groups = request.user.groups.values_list('name', flat=True)
-        return any(group in user_groups for group in self.required_groups)
+        return not get_user_group_names(request.user).isdisjoint(self.required_groups)
 
 class IsRRHH(HasGroupPermission):
     required_groups = ['RRHH', 'Administrator']
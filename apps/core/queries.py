@@ -0,0 +1,94 @@
+import re
+import time
+import traceback
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?|NULL)\s*,?)+\)", re.IGNORECASE)
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    # Forma de la consulta: sin literales y con las listas IN colapsadas
+    sql = _STRING_RE.sub('%s', sql)
+    sql = _NUMBER_RE.sub('%s', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACES_RE.sub(' ', sql).strip()
+
+
+def get_call_site():
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        filename = frame.filename
+        if (filename.startswith(base_dir)
+                and 'site-packages' not in filename
+                and not filename.endswith(('apps/core/queries.py', 'apps/core/middleware.py'))):
+            return f"{filename[len(base_dir):].lstrip('/')}:{frame.lineno}"
+    return 'unknown'
+
+
+class QueryRecorder:
+    # Registra todas las consultas ejecutadas en todas las conexiones, sin requerir DEBUG.
+    # Con count_only=True solo acumula número y duración (métricas por request); la forma
+    # normalizada de cada consulta se calcula únicamente al buscar repetidas.
+
+    def __init__(self, capture_call_site=True, count_only=False):
+        self.capture_call_site = capture_call_site and not count_only
+        self.count_only = count_only
+        self.queries = []
+        self.count = 0
+        self.duration = 0
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            if not self.count_only:
+                self.queries.append({
+                    'sql': sql,
+                    'call_site': get_call_site() if self.capture_call_site else None,
+                    'alias': context['connection'].alias,
+                    'duration': duration,
+                })
+
+    def repeated(self, threshold):
+        groups = {}
+        for query in self.queries:
+            key = (normalize_sql(query['sql']), query['call_site'])
+            groups.setdefault(key, []).append(query)
+
+        repeated = [
+            {
+                'shape': shape,
+                'call_site': call_site,
+                'count': len(queries),
+                'duration': sum(query['duration'] for query in queries),
+            }
+            for (shape, call_site), queries in groups.items()
+            if len(queries) >= threshold
+        ]
+        return sorted(repeated, key=lambda item: item['count'], reverse=True)
+
+
+def format_repeated(repeated):
+    return '\n'.join(
+        f"{item['count']}x {item['call_site']}: {item['shape']}" for item in repeated
+    )
@@ -0,0 +1,329 @@
+import logging
+import operator
+import re
+from functools import reduce
+from django.db import DatabaseError, connections, models, transaction
+from django.db.migrations.operations.base import Operation
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+logger = logging.getLogger(__name__)
+
+# Búsqueda indexada sobre los campos declarados en Model.search_index_fields, con la
+# misma semántica que el SearchFilter de DRF (cada término, como subcadena sin distinguir
+# mayúsculas, en alguno de los campos):
+# - PostgreSQL: índice GIN pg_trgm para el filtro (ILIKE '%término%'); la relevancia es
+#   ts_rank sobre to_tsvector('simple', ...) de las filas ya filtradas. pg_trgm requiere
+#   CREATE EXTENSION, que solo puede ejecutar un superusuario: si no está instalada se
+#   omite el índice y ILIKE recorre la tabla.
+# - SQLite (3.35+): tabla FTS5 "<tabla>_search" con tokenizer trigram y el pk del modelo
+#   en una columna UNINDEXED, sincronizada con triggers (cubren también bulk_create y
+#   queryset.update()). Los términos de menos de 3 caracteres usan icontains sin índice.
+# Otros motores, o modelos sin índice, usan el SearchFilter de DRF.
+
+SEARCH_RANK = 'search_rank'
+
+# Longitud mínima de un término para el tokenizer trigram de FTS5
+TRIGRAM_LENGTH = 3
+
+
+def supports_search_index(connection):
+    if connection.vendor == 'postgresql':
+        return True
+    # trigram (3.34) y WITH ... AS MATERIALIZED (3.35)
+    return connection.vendor == 'sqlite' and connection.Database.sqlite_version_info >= (3, 35)
+
+
+def get_search_table(db_table):
+    return f"{db_table}_search"
+
+
+def get_search_document_sql(connection, columns, table=None):
+    qn = connection.ops.quote_name
+    prefix = f"{qn(table)}." if table else ''
+    return " || ' ' || ".join(f"coalesce({prefix}{qn(column)}, '')" for column in columns)
+
+
+def get_search_vector_sql(connection, columns, table=None):
+    return f"to_tsvector('simple'::regconfig, {get_search_document_sql(connection, columns, table)})"
+
+
+def get_search_keys_table(db_table):
+    return f"{db_table}_search_keys"
+
+
+def get_sqlite_schema_sql(connection, db_table, columns, pk_column='id'):
+    # Nombre -> CREATE de cada objeto, tal como SQLite lo guarda en sqlite_master.
+    # El rowid implícito de una tabla con pk UUID puede cambiar con VACUUM: la tabla FTS
+    # guarda el pk (UNINDEXED) y las búsquedas cruzan por él; el rowid de cada fila FTS
+    # sale de una tabla de claves con INTEGER PRIMARY KEY (estable) y pk único, que usan
+    # los triggers para llegar a la fila sin recorrer la tabla FTS.
+    qn = connection.ops.quote_name
+    search_table = qn(get_search_table(db_table))
+    keys_table = qn(get_search_keys_table(db_table))
+    pk = qn(pk_column)
+    names = ', '.join(qn(column) for column in columns)
+    new_values = ', '.join(f"new.{qn(column)}" for column in columns)
+    assignments = ', '.join(f"{qn(column)} = new.{qn(column)}" for column in columns)
+    search_rowid = f"(SELECT search_rowid FROM {keys_table} WHERE object_pk = old.{pk})"
+    return {
+        get_search_table(db_table): (
+            f"CREATE VIRTUAL TABLE {search_table} USING fts5(object_pk UNINDEXED, {names}, tokenize='trigram')"
+        ),
+        get_search_keys_table(db_table): (
+            f"CREATE TABLE {keys_table} (search_rowid INTEGER PRIMARY KEY, object_pk NOT NULL UNIQUE)"
+        ),
+        f"{db_table}_search_ai": (
+            f"CREATE TRIGGER {qn(db_table + '_search_ai')} AFTER INSERT ON {qn(db_table)} BEGIN "
+            f"INSERT INTO {keys_table}(object_pk) VALUES (new.{pk}); "
+            f"INSERT INTO {search_table}(rowid, object_pk, {names}) VALUES ("
+            f"(SELECT search_rowid FROM {keys_table} WHERE object_pk = new.{pk}), new.{pk}, {new_values}); END"
+        ),
+        f"{db_table}_search_ad": (
+            f"CREATE TRIGGER {qn(db_table + '_search_ad')} AFTER DELETE ON {qn(db_table)} BEGIN "
+            f"DELETE FROM {search_table} WHERE rowid = {search_rowid}; "
+            f"DELETE FROM {keys_table} WHERE object_pk = old.{pk}; END"
+        ),
+        # Solo cuando cambian las columnas indexadas (no en soft_delete, toggle_status...)
+        f"{db_table}_search_au": (
+            f"CREATE TRIGGER {qn(db_table + '_search_au')} AFTER UPDATE OF {names} ON {qn(db_table)} BEGIN "
+            f"UPDATE {search_table} SET {assignments} WHERE rowid = {search_rowid}; END"
+        ),
+    }
+
+
+def get_sqlite_rebuild_sql(connection, db_table, columns, pk_column='id'):
+    qn = connection.ops.quote_name
+    search_table = qn(get_search_table(db_table))
+    keys_table = qn(get_search_keys_table(db_table))
+    pk = qn(pk_column)
+    names = ', '.join(qn(column) for column in columns)
+    values = ', '.join(f"t.{qn(column)}" for column in columns)
+    return [
+        f"DELETE FROM {search_table}",
+        f"DELETE FROM {keys_table}",
+        f"INSERT INTO {keys_table}(object_pk) SELECT {pk} FROM {qn(db_table)}",
+        f"INSERT INTO {search_table}(rowid, object_pk, {names}) "
+        f"SELECT k.search_rowid, t.{pk}, {values} FROM {qn(db_table)} t "
+        f"JOIN {keys_table} k ON k.object_pk = t.{pk}",
+    ]
+
+
+def get_create_search_index_sql(connection, db_table, columns, trigram=True, pk_column='id'):
+    qn = connection.ops.quote_name
+    if not supports_search_index(connection):
+        return []
+    if connection.vendor == 'postgresql':
+        # La relevancia (ts_rank) se calcula sobre las filas ya filtradas por ILIKE, así
+        # que solo hace falta el índice de trigramas
+        if not trigram:
+            return []
+        return [
+            f"CREATE INDEX IF NOT EXISTS {qn(db_table + '_search_trgm')} ON {qn(db_table)} "
+            f"USING gin (({get_search_document_sql(connection, columns)}) gin_trgm_ops)"
+        ]
+    return [
+        *get_sqlite_schema_sql(connection, db_table, columns, pk_column).values(),
+        *get_sqlite_rebuild_sql(connection, db_table, columns, pk_column),
+    ]
+
+
+def ensure_pg_trgm(connection):
+    # CREATE EXTENSION necesita un superusuario (o que un DBA la haya instalado antes);
+    # sin permisos la migración continúa sin el índice de trigramas
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cursor.fetchone():
+            return True
+        try:
+            with transaction.atomic(using=connection.alias):
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        except DatabaseError as e:
+            logger.warning(
+                f"No se pudo instalar pg_trgm ({str(e).strip()}); la búsqueda por subcadena "
+                f"funcionará sin índice. Un superusuario debe ejecutar CREATE EXTENSION pg_trgm."
+            )
+            return False
+    return True
+
+
+def get_drop_search_index_sql(connection, db_table):
+    qn = connection.ops.quote_name
+    if connection.vendor == 'postgresql':
+        return [
+            f"DROP INDEX IF EXISTS {qn(db_table + '_search_fts')}",
+            f"DROP INDEX IF EXISTS {qn(db_table + '_search_trgm')}",
+        ]
+    if connection.vendor == 'sqlite':
+        return [
+            *(f"DROP TRIGGER IF EXISTS {qn(db_table + suffix)}" for suffix in ('_search_ai', '_search_ad', '_search_au')),
+            f"DROP TABLE IF EXISTS {qn(get_search_table(db_table))}",
+            f"DROP TABLE IF EXISTS {qn(get_search_keys_table(db_table))}",
+        ]
+    return []
+
+
+def get_search_columns(model):
+    return [model._meta.get_field(name).column for name in model.search_index_fields]
+
+
+def ensure_search_indexes(models, using='default'):
+    # En SQLite, rehacer una tabla en una migración (ALTER) descarta sus triggers y
+    # cambia los rowid, y una versión anterior del índice puede tener otro tokenizer o
+    # triggers distintos: si algo no coincide se recrea todo y se reconstruye el índice.
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or not supports_search_index(connection):
+        return
+
+    tables = set(connection.introspection.table_names())
+    with connection.cursor() as cursor:
+        for model in models:
+            db_table = model._meta.db_table
+            if get_search_table(db_table) not in tables:
+                continue
+            columns = get_search_columns(model)
+            pk_column = model._meta.pk.column
+            expected = get_sqlite_schema_sql(connection, db_table, columns, pk_column)
+            cursor.execute(
+                f"SELECT name, sql FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(expected))})",
+                list(expected)
+            )
+            if dict(cursor.fetchall()) == expected:
+                continue
+            for sql in [
+                *get_drop_search_index_sql(connection, db_table),
+                *get_create_search_index_sql(connection, db_table, columns, pk_column=pk_column),
+            ]:
+                cursor.execute(sql)
+
+
+class CreateSearchIndex(Operation):
+    reversible = True
+
+    def __init__(self, model_name, fields):
+        self.model_name = model_name
+        self.fields = fields
+
+    def deconstruct(self):
+        return (self.__class__.__name__, [], {'model_name': self.model_name, 'fields': self.fields})
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        columns = [model._meta.get_field(name).column for name in self.fields]
+        connection = schema_editor.connection
+        trigram = connection.vendor == 'postgresql' and (
+            schema_editor.collect_sql or ensure_pg_trgm(connection)
+        )
+        if trigram and schema_editor.collect_sql:
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for sql in get_create_search_index_sql(
+            connection, model._meta.db_table, columns, trigram=trigram, pk_column=model._meta.pk.column
+        ):
+            schema_editor.execute(sql)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        for sql in get_drop_search_index_sql(schema_editor.connection, model._meta.db_table):
+            schema_editor.execute(sql)
+
+    def describe(self):
+        return f"Create search index on {self.model_name} ({', '.join(self.fields)})"
+
+    @property
+    def migration_name_fragment(self):
+        return f"{self.model_name.lower()}_search_index"
+
+
+class IndexedSearchFilter(filters.SearchFilter):
+    # Mismo parámetro ?search= y misma semántica que SearchFilter; anota search_rank
+    # (mayor es más relevante). Si el viewset no declara search_fields se usan los
+    # search_index_fields del modelo; si declara otros campos se usa el SearchFilter de DRF.
+
+    def get_search_fields(self, view, request):
+        search_fields = super().get_search_fields(view, request)
+        if search_fields is None:
+            queryset = getattr(view, 'queryset', None)
+            model = queryset.model if queryset is not None else view.get_queryset().model
+            search_fields = getattr(model, 'search_index_fields', None)
+        return search_fields
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        fields = getattr(queryset.model, 'search_index_fields', None)
+        connection = connections[queryset.db]
+        if (
+            not terms or not fields or not supports_search_index(connection)
+            or set(self.get_search_fields(view, request) or ()) != set(fields)
+        ):
+            return super().filter_queryset(request, queryset, view)
+
+        if connection.vendor == 'postgresql':
+            return self.filter_postgresql(queryset, terms, connection)
+        return self.filter_sqlite(queryset, terms, connection, fields)
+
+    def filter_sqlite(self, queryset, terms, connection, fields):
+        qn = connection.ops.quote_name
+        db_table = qn(queryset.model._meta.db_table)
+        search_table = qn(get_search_table(queryset.model._meta.db_table))
+
+        # Con trigram cada término entre comillas es una subcadena en cualquier columna
+        indexed = [term for term in terms if len(term) >= TRIGRAM_LENGTH]
+        for term in terms:
+            if len(term) < TRIGRAM_LENGTH:
+                queryset = queryset.filter(
+                    reduce(operator.or_, (models.Q(**{f"{field}__icontains": term}) for field in fields))
+                )
+        if not indexed:
+            return queryset.annotate(**{SEARCH_RANK: models.Value(0.0, output_field=models.FloatField())})
+
+        pk = f"{db_table}.{qn(queryset.model._meta.pk.column)}"
+        match = ' '.join('"{}"'.format(term.replace('"', '""')) for term in indexed)
+        queryset = queryset.filter(RawSQL(
+            f"{pk} IN (SELECT object_pk FROM {search_table} WHERE {search_table} MATCH %s)",
+            [match], output_field=models.BooleanField()
+        ))
+        # bm25() solo existe dentro de la consulta FTS: se materializa una vez y cada fila
+        # lo busca por pk (una subconsulta correlacionada con MATCH repetiría la búsqueda)
+        return queryset.annotate(**{SEARCH_RANK: RawSQL(
+            f"WITH ranks AS MATERIALIZED (SELECT object_pk, -bm25({search_table}) AS rank "
+            f"FROM {search_table} WHERE {search_table} MATCH %s) "
+            f"SELECT rank FROM ranks WHERE ranks.object_pk = {pk}",
+            [match], output_field=models.FloatField()
+        )})
+
+    def filter_postgresql(self, queryset, terms, connection):
+        # El filtro es solo ILIKE (índice de trigramas): misma semántica de subcadena que
+        # SearchFilter. to_tsquery solo ordena; como filtro, "foo-bar" coincidiría con
+        # filas que tienen "foo" y "bar" por separado.
+        db_table = queryset.model._meta.db_table
+        columns = get_search_columns(queryset.model)
+        document = get_search_document_sql(connection, columns, db_table)
+        vector = get_search_vector_sql(connection, columns, db_table)
+
+        lexemes = []
+        for term in terms:
+            like = '%{}%'.format(re.sub(r'([\\%_])', r'\\\1', term))
+            queryset = queryset.filter(RawSQL(f"{document} ILIKE %s", [like], output_field=models.BooleanField()))
+            lexemes += [f"{lexeme}:*" for lexeme in re.findall(r'\w+', term)]
+
+        if lexemes:
+            rank = RawSQL(
+                f"ts_rank({vector}, to_tsquery('simple'::regconfig, %s))",
+                [' | '.join(lexemes)], output_field=models.FloatField()
+            )
+        else:
+            rank = models.Value(0.0, output_field=models.FloatField())
+        return queryset.annotate(**{SEARCH_RANK: rank})
+
+
+class RankedOrderingFilter(filters.OrderingFilter):
+    # Con una búsqueda indexada y sin ?ordering= explícito, primero los más relevantes
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if SEARCH_RANK in queryset.query.annotations and ordering == self.get_default_ordering(view):
+            return [f"-{SEARCH_RANK}", *(ordering or [])]
+        return ordering
@@ -1,6 +1,24 @@
 from rest_framework import serializers
+from rest_framework.serializers import LIST_SERIALIZER_KWARGS
+from rest_framework.validators import UniqueValidator
 from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
 from django.utils import timezone
+from apps.core.metrics import add_serializer_time
+import time
+import uuid
+
+
+def get_matching_keys(values, value):
+    # Con colaciones que no distinguen mayúsculas (MySQL, citext) la base de datos
+    # devuelve el valor guardado, que puede no coincidir con el enviado
+    if value in values:
+        return [value]
+    if not isinstance(value, str):
+        return []
+    folded = value.casefold()
+    return [key for key in values if isinstance(key, str) and key.casefold() == folded]
 
 
 class BaseModelSerializer(serializers.ModelSerializer):
@@ -14,6 +32,48 @@ class BaseModelSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('id', 'created_at', 'modified_at', 'created_by', 'updated_by')
 
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        # Igual que ModelSerializer.many_init, pero usando BulkListSerializer
+        # cuando el Meta de la subclase no declara list_serializer_class.
+        list_kwargs = {
+            key: kwargs.pop(key) for key in ('allow_empty', 'max_length', 'min_length')
+            if kwargs.get(key) is not None
+        }
+        list_kwargs['child'] = cls(*args, **kwargs)
+        list_kwargs.update({
+            key: value for key, value in kwargs.items()
+            if key in LIST_SERIALIZER_KWARGS
+        })
+        meta = getattr(cls, 'Meta', None)
+        list_serializer_class = getattr(meta, 'list_serializer_class', BulkListSerializer)
+        return list_serializer_class(*args, **list_kwargs)
+
+    def check_unique(self, field_name, value, message):
+        # Bajo many=True la comprobación se difiere al BulkListSerializer, que la
+        # resuelve con una sola consulta por campo para todo el lote.
+        if isinstance(self.parent, BulkListSerializer):
+            if self.parent.defer_unique_check(field_name, value, message):
+                return value
+
+        if value in (None, ''):
+            return value
+
+        queryset = self.Meta.model._default_manager.filter(**{field_name: value})
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+        if queryset.exists():
+            raise serializers.ValidationError(message)
+
+        return value
+
+    @property
+    def data(self):
+        start = time.perf_counter()
+        data = super().data
+        add_serializer_time(self.context.get('request'), time.perf_counter() - start)
+        return data
+
     def to_representation(self, instance):
         data = super().to_representation(instance)
 
@@ -33,14 +93,7 @@ class CatalogSerializer(BaseModelSerializer):
     def validate_code(self, value):
         if value:
             value = value.upper().strip()
-
-            model = self.Meta.model
-            if self.instance:
-                if model.objects.exclude(id=self.instance.id).filter(code=value).exists():
-                    raise serializers.ValidationError("Ya existe un registro con este código.")
-            else:
-                if model.objects.filter(code=value).exists():
-                    raise serializers.ValidationError("Ya existe un registro con este código.")
+            self.check_unique('code', value, "Ya existe un registro con este código.")
 
         return value
 
@@ -80,13 +133,7 @@ class PersonSerializer(BaseModelSerializer):
 
     def validate_email(self, value):
         if value:
-            model = self.Meta.model
-            if self.instance:
-                if model.objects.exclude(id=self.instance.id).filter(email=value).exists():
-                    raise serializers.ValidationError("Ya existe una persona con este email.")
-            else:
-                if model.objects.filter(email=value).exists():
-                    raise serializers.ValidationError("Ya existe una persona con este email.")
+            self.check_unique('email', value, "Ya existe una persona con este email.")
         return value
 
     def validate(self, attrs):
@@ -136,51 +183,299 @@ class ReadOnlySerializer(serializers.ModelSerializer):
 
 
 class BulkListSerializer(serializers.ListSerializer):
+    batch_size = 500
 
-    def create(self, validated_data):
-        instances = []
-        errors = []
+    @property
+    def data(self):
+        start = time.perf_counter()
+        data = super().data
+        add_serializer_time(self.context.get('request'), time.perf_counter() - start)
+        return data
 
-        for i, item_data in enumerate(validated_data):
-            try:
-                instance = self.child.Meta.model(**item_data)
-                instance.full_clean()
-                instances.append(instance)
-            except Exception as e:
-                errors.append({
-                    'index': i,
-                    'data': item_data,
-                    'error': str(e)
-                })
-
-        if errors:
-            raise serializers.ValidationError({
-                'bulk_errors': errors
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        instances = [model(**item_data) for item_data in validated_data]
+        on_conflict = self.get_on_conflict()
+
+        pending_fields = [
+            field for field in self.get_unique_fields()
+            if field.name not in getattr(self, '_resolved_unique_fields', set())
+        ]
+        errors = self.check_unique_values(instances, pending_fields, check_existing=on_conflict is None)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        options = {'batch_size': self.get_batch_size()}
+        if on_conflict == 'ignore':
+            # ignore_conflicts no informa qué filas se omitieron: se consultan después
+            # por pk, que debe generarse en la aplicación (p. ej. UUID con default)
+            if not model._meta.pk.has_default():
+                raise ImproperlyConfigured(
+                    f"bulk_create_on_conflict='ignore' requiere que la pk de {model.__name__} tenga un default"
+                )
+            options['ignore_conflicts'] = True
+        elif on_conflict == 'update':
+            unique_fields = self.context.get('bulk_conflict_fields') or [
+                field.name for field in self.get_unique_fields()
+            ]
+            options.update({
+                'update_conflicts': True,
+                'unique_fields': unique_fields,
+                'update_fields': self.get_conflict_update_fields(validated_data, unique_fields),
             })
 
-        return self.child.Meta.model.objects.bulk_create(instances)
+        instances = model.objects.bulk_create(instances, **options)
+        if on_conflict == 'ignore':
+            instances = self.get_inserted_instances(instances)
+        return instances
+
+    def get_inserted_instances(self, instances):
+        model = self.child.Meta.model
+        batch_size = self.get_batch_size()
+        inserted = set()
+        for start in range(0, len(instances), batch_size):
+            inserted.update(model._default_manager.filter(
+                pk__in=[instance.pk for instance in instances[start:start + batch_size]]
+            ).values_list('pk', flat=True))
+        return [instance for instance in instances if instance.pk in inserted]
+
+    def check_unique_values(self, instances, fields, check_existing=True):
+        # Red de seguridad para campos únicos que no pasaron por la validación
+        # (p. ej. de solo lectura): una consulta IN por campo para todo el lote.
+        model = self.child.Meta.model
+        errors = [{} for _ in instances]
+
+        for field in fields:
+            seen = {}
+            for i, instance in enumerate(instances):
+                value = getattr(instance, field.attname)
+                if value in (None, ''):
+                    continue
+                if value in seen:
+                    errors[i][field.name] = ["Valor duplicado dentro del lote."]
+                else:
+                    seen[value] = i
+
+            if not check_existing or not seen:
+                continue
+
+            values = list(seen)
+            batch_size = self.get_batch_size()
+            for start in range(0, len(values), batch_size):
+                existing = model._default_manager.filter(
+                    **{f'{field.attname}__in': values[start:start + batch_size]}
+                ).values_list(field.attname, flat=True)
+                for value in existing:
+                    for key in get_matching_keys(seen, value):
+                        errors[seen[key]][field.name] = ["Ya existe un registro con este valor."]
+
+        return errors
+
+    def get_unique_fields(self):
+        return [
+            field for field in self.child.Meta.model._meta.concrete_fields
+            if field.unique and not field.primary_key
+        ]
+
+    def get_conflict_update_fields(self, validated_data, unique_fields):
+        model = self.child.Meta.model
+        excluded = set(unique_fields) | {'created_by'}
+        update_fields = set()
+
+        for field in model._meta.concrete_fields:
+            if field.primary_key or field.name in excluded or getattr(field, 'auto_now_add', False):
+                continue
+            if getattr(field, 'auto_now', False) or any(field.name in item for item in validated_data):
+                update_fields.add(field.name)
+
+        return sorted(update_fields)
+
+    def get_on_conflict(self):
+        return self.context.get('bulk_on_conflict')
 
     def update(self, instances, validated_data):
-        instance_mapping = {instance.id: instance for instance in instances}
-        data_mapping = {item['id']: item for item in validated_data if 'id' in item}
+        model = self.child.Meta.model
+        instance_mapping = {instance.pk: instance for instance in instances}
+        concrete_fields = {field.name for field in model._meta.concrete_fields if not field.primary_key}
+        auto_now_fields = [field for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)]
+
+        unique_fields = {field.name for field in self.get_unique_fields()}
+
+        # Por pk: un id repetido actualiza la misma instancia y se cuenta una sola vez
+        updated_instances = {}
+        update_fields = set()
+        previous_values = {}
+
+        for data in validated_data:
+            instance = instance_mapping.get(data.get('id'))
+            if instance is None:
+                continue
+
+            for attr, value in data.items():
+                if attr in concrete_fields:
+                    if attr in unique_fields:
+                        previous_values.setdefault(instance.pk, {}).setdefault(attr, getattr(instance, attr))
+                    setattr(instance, attr, value)
+                    update_fields.add(attr)
 
-        updated_instances = []
+            # bulk_update no llama a save(), por lo que auto_now debe aplicarse a mano
+            for field in auto_now_fields:
+                field.pre_save(instance, add=False)
+                update_fields.add(field.name)
 
-        for instance_id, data in data_mapping.items():
-            instance = instance_mapping.get(instance_id)
-            if instance:
-                for attr, value in data.items():
-                    setattr(instance, attr, value)
-                updated_instances.append(instance)
+            updated_instances[instance.pk] = instance
 
-        if updated_instances:
-            self.child.Meta.model.objects.bulk_update(
+        updated_instances = list(updated_instances.values())
+        if updated_instances and update_fields:
+            self.release_unique_values(updated_instances, previous_values)
+            model.objects.bulk_update(
                 updated_instances,
-                [field.name for field in self.child.Meta.model._meta.fields if not field.primary_key]
+                sorted(update_fields),
+                batch_size=self.get_batch_size()
             )
 
         return updated_instances
 
+    def release_unique_values(self, instances, previous_values):
+        # La unicidad se comprueba fila a fila dentro del UPDATE, así que un intercambio
+        # (A toma el código de B y B el de A) fallaría: los registros cuyo valor anterior
+        # pasa a otro del lote reciben antes un valor temporal.
+        model = self.child.Meta.model
+        field_names = {name for values in previous_values.values() for name in values}
+
+        for field_name in sorted(field_names):
+            field = model._meta.get_field(field_name)
+            if not isinstance(field, models.CharField):
+                continue
+
+            claimed = {
+                getattr(instance, field_name): instance.pk
+                for instance in instances if field_name in previous_values.get(instance.pk, {})
+            }
+            released = [
+                model(pk=instance.pk, **{field.attname: uuid.uuid4().hex[:field.max_length]})
+                for instance in instances
+                if claimed.get(previous_values.get(instance.pk, {}).get(field_name), instance.pk) != instance.pk
+            ]
+            if released:
+                model.objects.bulk_update(released, [field_name], batch_size=self.get_batch_size())
+
+    def to_internal_value(self, data):
+        if (not isinstance(data, list)
+                or (not self.allow_empty and not data)
+                or (self.max_length is not None and len(data) > self.max_length)
+                or (self.min_length is not None and len(data) < self.min_length)):
+            # ListSerializer genera el error correspondiente
+            return super().to_internal_value(data)
+
+        # La unicidad se resuelve para todo el lote en resolve_unique_checks(),
+        # así que se omiten los UniqueValidator que harían una consulta por item.
+        self.disable_unique_validators()
+        self._unique_checks = {}
+        self._resolved_unique_fields = set()
+
+        # En actualizaciones cada item se valida contra su propia instancia para que
+        # los validate_<campo> excluyan el registro que se actualiza.
+        instance_mapping = {}
+        if self.instance is not None:
+            instance_mapping = {str(instance.pk): instance for instance in self.instance}
+        unique_fields = [field.name for field in self.get_unique_fields()]
+        original_instance = self.child.instance
+
+        ret = []
+        errors = []
+
+        try:
+            for index, item in enumerate(data):
+                instance = None
+                if self.instance is not None and isinstance(item, dict):
+                    instance = instance_mapping.get(str(item.get('id')))
+                self.child.instance = instance
+                self._current_index = index
+                try:
+                    validated = self.child.run_validation(item)
+                except serializers.ValidationError as exc:
+                    errors.append(exc.detail)
+                else:
+                    for field_name in unique_fields:
+                        if field_name in validated:
+                            self.defer_unique_check(field_name, validated[field_name])
+                    if instance is not None:
+                        validated['id'] = instance.pk
+                    ret.append(validated)
+                    errors.append({})
+        finally:
+            self.child.instance = original_instance
+            self._current_index = None
+
+        self.resolve_unique_checks(errors)
+        self._unique_checks = None
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        return ret
+
+    def defer_unique_check(self, field_name, value, message=None):
+        if getattr(self, '_unique_checks', None) is None or self._current_index is None:
+            return False
+
+        if value in (None, ''):
+            return True
+
+        check = self._unique_checks.setdefault(field_name, {'message': None, 'entries': {}})
+        if message:
+            check['message'] = message
+        instance = self.child.instance
+        check['entries'][self._current_index] = (value, instance.pk if instance is not None else None)
+        return True
+
+    def resolve_unique_checks(self, errors):
+        model = self.child.Meta.model
+        check_existing = self.instance is not None or self.get_on_conflict() is None
+        batch_size = self.get_batch_size()
+
+        for field_name, check in self._unique_checks.items():
+            message = check['message'] or "Ya existe un registro con este valor."
+            by_value = {}
+            for index, (value, pk) in check['entries'].items():
+                by_value.setdefault(value, []).append((index, pk))
+
+            # Un mismo registro repetido con el mismo valor no es un duplicado
+            for entries in by_value.values():
+                owner = entries[0][1]
+                for index, pk in entries[1:]:
+                    if pk is None or pk != owner:
+                        errors[index] = {**errors[index], field_name: ["Valor duplicado dentro del lote."]}
+
+            if check_existing:
+                # Se valida el estado final: los registros que el lote actualiza toman el
+                # valor enviado, así que su valor actual no cuenta (permite intercambios)
+                updating = {pk for _, pk in check['entries'].values() if pk is not None}
+                values = list(by_value)
+                for start in range(0, len(values), batch_size):
+                    existing = model._default_manager.filter(
+                        **{f'{field_name}__in': values[start:start + batch_size]}
+                    ).values_list(field_name, 'pk')
+                    for value, pk in existing:
+                        if pk in updating:
+                            continue
+                        for key in get_matching_keys(by_value, value):
+                            for index, _ in by_value[key]:
+                                errors[index] = {**errors[index], field_name: [message]}
+
+            self._resolved_unique_fields.add(field_name)
+
+    def disable_unique_validators(self):
+        for field in self.child.fields.values():
+            field.validators = [
+                validator for validator in field.validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+
+    def get_batch_size(self):
+        return self.context.get('bulk_batch_size', self.batch_size)
+
 
 class TimestampMixin:
 
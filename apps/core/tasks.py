@@ -0,0 +1,7 @@
+from celery import shared_task
+from apps.core.jobs import run_job
+
+
+@shared_task(name='core.run_bulk_job', ignore_result=True)
+def run_bulk_job(job_id):
+    run_job(job_id)
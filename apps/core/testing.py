@@ -0,0 +1,24 @@
+from contextlib import contextmanager
+from django.conf import settings
+from apps.core.queries import QueryRecorder, format_repeated
+
+
+@contextmanager
+def assert_no_n_plus_one(threshold=None):
+    if threshold is None:
+        threshold = getattr(settings, 'QUERY_INSPECTOR', {}).get('THRESHOLD', 5)
+
+    with QueryRecorder() as recorder:
+        yield recorder
+
+    repeated = recorder.repeated(threshold)
+    if repeated:
+        raise AssertionError(
+            f"Se detectaron consultas repetidas ({recorder.count} en total):\n{format_repeated(repeated)}"
+        )
+
+
+class QueryAssertionsMixin:
+
+    def assertNoNPlusOne(self, threshold=None):
+        return assert_no_n_plus_one(threshold)
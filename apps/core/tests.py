@@ -1,3 +1,1563 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import tempfile
+import time
+from datetime import date, datetime, time as dt_time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+import uuid
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser, Group, User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.apps import apps
+from django.db import IntegrityError, connection, models
+from django.http import StreamingHttpResponse
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from apps.common import renderers
+from apps.common.renderers import EncodedJSON, FastJSONRenderer
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import BasePermission, IsAuthenticated
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from apps.business.models import Company
+from apps.business.serializers.company import CompanySerializer
+from apps.business.viewsets.company import CompanyViewSet
+from apps.core.autocomplete import PrefixIndex
+from apps.core.authentication import CachedTokenAuthentication, get_token_cache_key, local_cache
+from apps.core.cache import get_model_generation, get_user_group_names, invalidate_user_groups
+from apps.core.compiled import CompilationError, CompiledSerializer, get_compiled_serializer
+from apps.core.jobs import check_job_store, get_job
+from apps.core.filters import BaseFilterSet
+from apps.core.models import check_default_indexes, get_default_indexes, get_scope_condition
+from apps.core.middleware import NPlusOneError, QueryInspectorMiddleware
+from apps.core.optimizers import get_queryset_plan
+from apps.core.pagination import KeysetPagination
+from apps.core.permissions import HasGroupPermission, IsRRHH
+from apps.core.queries import QueryRecorder
+from apps.core import search
+from apps.core.search import SEARCH_RANK, IndexedSearchFilter, ensure_search_indexes, get_create_search_index_sql
+from apps.core.serializers import BulkListSerializer, StatusMixin, TimestampMixin, get_matching_keys
+from apps.core.testing import QueryAssertionsMixin
+from apps.core.viewset import AsyncCatalogViewSet, AsyncViewSetMixin, CatalogViewSet
 
-# Create your tests here.
+COMPANY_URL = '/api/v1company/'
+
+
+class APITestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('tester', password='secret', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_companies(self, count, start=0, **kwargs):
+        return Company.objects.bulk_create([
+            Company(code=f"C{i:04d}", name=f"EMPRESA {i:04d}", email=f"empresa{i}@example.com", **kwargs)
+            for i in range(start, start + count)
+        ])
+
+
+class BulkUpdateTests(APITestCase):
+
+    def test_bulk_update_counts_updated_records(self):
+        companies = self.create_companies(3)
+        response = self.client.patch(f"{COMPANY_URL}bulk_update/", [
+            {'id': str(company.pk), 'name': f"nuevo {i}"} for i, company in enumerate(companies)
+        ], format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['message'], "3 registros actualizados exitosamente")
+        self.assertEqual(
+            list(Company.objects.order_by('code').values_list('name', flat=True)),
+            ['NUEVO 0', 'NUEVO 1', 'NUEVO 2']
+        )
+
+    def test_bulk_update_rejects_duplicate_ids(self):
+        company = self.create_companies(1)[0]
+        response = self.client.patch(f"{COMPANY_URL}bulk_update/", [
+            {'id': str(company.pk), 'name': 'uno'},
+            {'id': str(company.pk), 'name': 'dos'},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors']['bulk_errors'][0]['index'], 1)
+        company.refresh_from_db()
+        self.assertEqual(company.name, 'EMPRESA 0000')
+
+
+class BulkDeleteTests(APITestCase):
+
+    def test_bulk_delete_deduplicates_ids(self):
+        companies = self.create_companies(3)
+        ids = [str(company.pk) for company in companies[:2]]
+        response = self.client.delete(f"{COMPANY_URL}bulk_delete/", {'ids': ids + ids[:1]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['deleted_count'], 2)
+        self.assertEqual(list(Company.objects.values_list('code', flat=True)), ['C0002'])
+
+    def test_bulk_delete_runs_one_statement_per_chunk(self):
+        companies = self.create_companies(10)
+        ids = [str(company.pk) for company in companies]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(f"{COMPANY_URL}bulk_delete/", {'ids': ids}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        deletes = [query for query in queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 1)
+        self.assertFalse(Company.objects.exists())
+
+    def test_bulk_delete_requires_ids(self):
+        response = self.client.delete(f"{COMPANY_URL}bulk_delete/", {'ids': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkCreateTests(APITestCase):
+
+    def bulk_create_view(self, **attrs):
+        return type('CompanyViewSet', (CompanyViewSet,), attrs).as_view({'post': 'bulk_create'})
+
+    def post_bulk_create(self, view, data):
+        request = APIRequestFactory().post(f"{COMPANY_URL}bulk_create/", data, format='json')
+        force_authenticate(request, user=self.user)
+        return view(request)
+
+    def test_bulk_create_inserts_in_batches(self):
+        data = [{'code': f"n{i}", 'name': f"nueva {i}"} for i in range(5)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f"{COMPANY_URL}bulk_create/", data, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['message'], "5 registros creados exitosamente")
+        inserts = [query for query in queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Company.objects.filter(created_by=self.user).count(), 5)
+
+    def test_bulk_create_reports_duplicates_by_index(self):
+        self.create_companies(1)
+        response = self.client.post(f"{COMPANY_URL}bulk_create/", [
+            {'code': 'c0000', 'name': 'existente'},
+            {'code': 'nueva', 'name': 'uno'},
+            {'code': 'NUEVA', 'name': 'dos'},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.data['errors']['bulk_errors']], [0, 2])
+        self.assertEqual(Company.objects.count(), 1)
+
+    def test_bulk_create_ignore_conflicts_returns_inserted_rows(self):
+        self.create_companies(2)
+        view = self.bulk_create_view(bulk_create_on_conflict='ignore')
+        response = self.post_bulk_create(view, [
+            {'code': 'c0000', 'name': 'existente'},
+            {'code': 'nueva', 'name': 'nueva'},
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['message'], "1 registros creados exitosamente")
+        self.assertEqual([item['code'] for item in response.data['data']], ['NUEVA'])
+        self.assertEqual(Company.objects.count(), 3)
+
+    def test_matching_keys_fall_back_to_case_insensitive_match(self):
+        self.assertEqual(get_matching_keys({'abc': 0}, 'abc'), ['abc'])
+        self.assertEqual(get_matching_keys({'abc': 0}, 'ABC'), ['abc'])
+        self.assertEqual(get_matching_keys({1: 0}, 2), [])
+
+
+class BulkUniquenessTests(APITestCase):
+
+    def test_bulk_update_allows_swapping_unique_values(self):
+        first, second = self.create_companies(2)
+        response = self.client.patch(f"{COMPANY_URL}bulk_update/", [
+            {'id': str(first.pk), 'code': second.code},
+            {'id': str(second.pk), 'code': first.code},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 200)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.code, second.code), ('C0001', 'C0000'))
+
+    def test_bulk_update_rejects_value_held_by_record_outside_batch(self):
+        first, second = self.create_companies(2)
+        response = self.client.patch(f"{COMPANY_URL}bulk_update/", [
+            {'id': str(first.pk), 'code': second.code},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('code', response.data['errors']['bulk_errors'][0]['errors'])
+
+    def test_same_record_with_same_value_is_not_a_duplicate(self):
+        company = self.create_companies(1)[0]
+        serializer = CompanySerializer(
+            [company],
+            data=[{'id': str(company.pk), 'code': 'nuevo'}, {'id': str(company.pk), 'code': 'NUEVO'}],
+            many=True,
+            partial=True,
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_uniqueness_is_checked_with_one_query_per_field(self):
+        self.create_companies(1)
+        serializer = CompanySerializer(data=[{'code': f"n{i}", 'name': 'nueva'} for i in range(20)], many=True)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(len(queries), 1)
+
+
+class KeysetPaginationTests(APITestCase):
+
+    def list_view(self, **attrs):
+        attrs.setdefault('cache_response_timeout', None)
+        return type('CompanyViewSet', (CompanyViewSet,), attrs).as_view({'get': 'list'})
+
+    def get_list(self, view, params):
+        request = APIRequestFactory().get(COMPANY_URL, params)
+        force_authenticate(request, user=self.user)
+        response = view(request)
+        response.render()
+        return response
+
+    def collect_pages(self, view, params):
+        pages = []
+        cursor = None
+        while True:
+            response = self.get_list(view, {**params, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data['data'])
+            cursor = response.data['data']['pagination']['next_cursor']
+            if cursor is None:
+                return pages
+
+    def test_cursor_pages_cover_every_record_once(self):
+        self.create_companies(7)
+        pages = self.collect_pages(self.list_view(), {'pagination': 'cursor', 'page_size': 3})
+
+        codes = [item['code'] for page in pages for item in page['results']]
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(codes, [f"C{i:04d}" for i in range(7)])
+        self.assertIsNone(pages[0]['pagination']['count'])
+
+    def test_previous_cursor_returns_previous_page(self):
+        self.create_companies(5)
+        view = self.list_view()
+        first = self.get_list(view, {'pagination': 'cursor', 'page_size': 2}).data['data']
+        second = self.get_list(view, {'pagination': 'cursor', 'page_size': 2, 'cursor': first['pagination']['next_cursor']}).data['data']
+        previous = self.get_list(view, {'pagination': 'cursor', 'page_size': 2, 'cursor': second['pagination']['previous_cursor']}).data['data']
+
+        self.assertEqual([item['code'] for item in previous['results']], [item['code'] for item in first['results']])
+
+    def test_nullable_ordering_field_keeps_nulls_last(self):
+        companies = self.create_companies(6)
+        Company.objects.filter(pk__in=[companies[1].pk, companies[4].pk]).update(email=None)
+        view = self.list_view(ordering_fields=['email'])
+
+        for ordering in ('email', '-email'):
+            pages = self.collect_pages(view, {'pagination': 'cursor', 'page_size': 2, 'ordering': ordering})
+            emails = [item['email'] for page in pages for item in page['results']]
+            self.assertEqual(len(emails), 6)
+            self.assertEqual(emails[-2:], [None, None])
+            self.assertEqual(emails[:4], sorted(emails[:4], reverse=ordering.startswith('-')))
+
+    def test_invalid_cursor_values_return_404(self):
+        self.create_companies(3)
+        view = self.list_view()
+        paginator = KeysetPagination()
+        paginator.ordering = ['code', 'id']
+        cursor = paginator.encode_cursor({'code': 'C0001', 'id': 'no-es-un-uuid'}, reverse=False)
+
+        for value in (cursor, 'basura'):
+            response = self.get_list(view, {'pagination': 'cursor', 'cursor': value})
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response.data['message'], "Cursor inválido")
+
+
+class CountCacheTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.view = type('CompanyViewSet', (CompanyViewSet,), {
+            'cache_response_timeout': None,
+            'count_strategy': 'cached',
+        }).as_view({'get': 'list'})
+        self.create_companies(3)
+
+    def get_count(self, view=None, user=None):
+        request = APIRequestFactory().get(COMPANY_URL)
+        force_authenticate(request, user=user or self.user)
+        view = view or self.view
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request)
+        counts = [query for query in queries if 'COUNT(' in query['sql']]
+        return response.data['data']['pagination']['count'], len(counts)
+
+    def test_count_is_cached_between_requests(self):
+        self.assertEqual(self.get_count(), (3, 1))
+        self.assertEqual(self.get_count(), (3, 0))
+
+    def test_count_is_exact_unless_the_viewset_opts_in(self):
+        view = type('CompanyViewSet', (CompanyViewSet,), {'cache_response_timeout': None}).as_view({'get': 'list'})
+        self.assertEqual(self.get_count(view), (3, 1))
+        self.assertEqual(self.get_count(view), (3, 1))
+
+    def test_cached_count_is_scoped_by_queryset(self):
+        other = User.objects.create_user('otro', password='secret', is_staff=True)
+        self.create_companies(2, start=10, created_by=other)
+
+        def get_queryset(viewset):
+            return super(viewset.__class__, viewset).get_queryset().filter(created_by=viewset.request.user)
+
+        view = type('CompanyViewSet', (CompanyViewSet,), {
+            'cache_response_timeout': None,
+            'count_strategy': 'cached',
+            'get_queryset': get_queryset,
+        }).as_view({'get': 'list'})
+        self.assertEqual(self.get_count(view), (0, 1))
+        self.assertEqual(self.get_count(view, other), (2, 1))
+        self.assertEqual(self.get_count(view, other), (2, 0))
+
+    def test_queryset_update_invalidates_cached_count(self):
+        self.get_count()
+        with self.captureOnCommitCallbacks(execute=True):
+            Company.objects.filter(code='C0000').update(is_active=False)
+        self.assertEqual(self.get_count(), (2, 1))
+
+    def test_bulk_create_invalidates_cached_count(self):
+        self.get_count()
+        with self.captureOnCommitCallbacks(execute=True):
+            Company.objects.bulk_create([Company(code='NUEVA', name='NUEVA')])
+        self.assertEqual(self.get_count(), (4, 1))
+
+    def test_generation_is_not_bumped_before_commit(self):
+        generation = get_model_generation(Company)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Company.objects.filter(code='C0000').update(name='OTRO')
+            self.assertEqual(get_model_generation(Company), generation)
+        self.assertTrue(callbacks)
+
+
+class QuerysetPlanTests(APITestCase):
+
+    def test_plan_joins_audit_users_and_limits_columns(self):
+        plan = get_queryset_plan(CompanySerializer, Company)
+
+        self.assertEqual(plan['select_related'], ['created_by', 'updated_by'])
+        self.assertEqual(plan['prefetch_related'], [])
+        self.assertIn('created_by__username', plan['only'])
+        self.assertIn('code', plan['only'])
+
+    def test_list_query_count_does_not_grow_with_audit_users(self):
+        other = User.objects.create_user('otro')
+        self.create_companies(2, created_by=self.user, updated_by=other)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(f"{COMPANY_URL}?page_size=50")
+
+        cache.clear()
+        self.create_companies(12, start=2, created_by=other, updated_by=self.user)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(f"{COMPANY_URL}?page_size=50")
+
+        results = response.json()['data']['results']
+        self.assertEqual(len(results), 14)
+        self.assertEqual(len(many), len(few))
+        self.assertEqual({item['created_by_name'] for item in results}, {'tester', 'otro'})
+
+
+class QueryCountTests(QueryAssertionsMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        other = User.objects.create_user('otro')
+        self.companies = self.create_companies(12, created_by=self.user, updated_by=other)
+
+    def test_list_has_no_repeated_queries(self):
+        with self.assertNoNPlusOne(threshold=3) as recorder:
+            response = self.client.get(f"{COMPANY_URL}?page_size=50")
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(recorder.count, 3)
+
+    def test_retrieve_has_no_repeated_queries(self):
+        with self.assertNoNPlusOne(threshold=2) as recorder:
+            response = self.client.get(f"{COMPANY_URL}{self.companies[0].pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(recorder.count, 1)
+
+    def test_export_reads_rows_with_one_query(self):
+        with self.assertNoNPlusOne(threshold=2) as recorder:
+            response = self.client.get(f"{COMPANY_URL}export/?export_format=ndjson")
+            lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 12)
+        self.assertEqual(recorder.count, 1)
+
+    def test_guard_fails_on_repeated_queries(self):
+        with self.assertRaises(AssertionError):
+            with self.assertNoNPlusOne(threshold=3):
+                for company in Company.objects.all():
+                    company.created_by.username
+
+    @override_settings(QUERY_INSPECTOR={'ENABLED': True, 'THRESHOLD': 2, 'MODE': 'raise'})
+    def test_middleware_inspects_streamed_queries(self):
+        def export(request):
+            def rows():
+                for company in Company.objects.all()[:3]:
+                    yield f"{company.created_by.username}\n"
+            return StreamingHttpResponse(rows())
+
+        middleware = QueryInspectorMiddleware(export)
+        response = middleware(APIRequestFactory().get('/export/'))
+        with self.assertRaises(NPlusOneError):
+            b''.join(response.streaming_content)
+
+
+METRICS_OPTIONS = {'ENABLED': True, 'TOKEN': 'secreto', 'ALLOWED_IPS': ['10.0.0.1'], 'MULTIPROCESS_DIR': ''}
+
+
+class MetricsTests(APITestCase):
+
+    def test_metrics_endpoint_is_disabled_by_default(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 404)
+
+    @override_settings(METRICS=METRICS_OPTIONS)
+    def test_metrics_endpoint_requires_staff_token_or_allowed_ip(self):
+        anonymous = APIClient()
+        self.assertEqual(anonymous.get('/metrics/').status_code, 403)
+        self.assertEqual(anonymous.get('/metrics/', HTTP_AUTHORIZATION='Bearer otro').status_code, 403)
+        self.assertEqual(anonymous.get('/metrics/', HTTP_AUTHORIZATION='Bearer secreto').status_code, 200)
+        self.assertEqual(anonymous.get('/metrics/', REMOTE_ADDR='10.0.0.1').status_code, 200)
+
+        staff = APIClient()
+        staff.force_login(self.user)
+        self.assertEqual(staff.get('/metrics/').status_code, 200)
+
+    @override_settings(METRICS=METRICS_OPTIONS)
+    def test_requests_are_recorded_with_query_counts(self):
+        self.create_companies(2)
+        self.client.get(COMPANY_URL)
+        content = APIClient().get('/metrics/', HTTP_AUTHORIZATION='Bearer secreto').content.decode()
+
+        self.assertIn('api_requests_total{action="list",status="200",view="CompanyViewSet"}', content)
+        self.assertIn('api_db_queries_total{action="list",view="CompanyViewSet"}', content)
+
+    def test_count_only_recorder_keeps_no_queries(self):
+        with QueryRecorder(count_only=True) as recorder:
+            list(Company.objects.all())
+            list(Company.objects.all())
+        self.assertEqual(recorder.count, 2)
+        self.assertEqual(recorder.queries, [])
+
+
+class BenchmarkCommandTests(TestCase):
+
+    def test_rejects_databases_the_views_do_not_use(self):
+        with self.assertRaisesMessage(CommandError, "--database solo admite 'default'"):
+            call_command('benchmark', database='replica', sizes='10')
+
+    def test_write_scenarios_do_not_change_the_table_size(self):
+        from apps.core.management.commands.benchmark import Command
+
+        sizes = []
+        measure = Command.measure
+
+        def measure_and_count(command, viewset, size, name, rows_per_call, run, iterations):
+            result = measure(command, viewset, size, name, rows_per_call, run, iterations)
+            sizes.append((name, Company.objects.count()))
+            return result
+
+        # La base de prueba del test hace de base del benchmark
+        environment = mock.patch.multiple(
+            'apps.core.management.commands.benchmark',
+            setup_test_environment=mock.DEFAULT, teardown_test_environment=mock.DEFAULT,
+            setup_databases=mock.DEFAULT, teardown_databases=mock.DEFAULT,
+        )
+        with environment, mock.patch.object(Command, 'measure', measure_and_count), mock.patch.object(Command, 'print_results'):
+            with tempfile.TemporaryDirectory() as directory:
+                call_command('benchmark', sizes='30', iterations=2, output=f"{directory}/results.json", stdout=io.StringIO())
+
+        self.assertIn(('bulk_create', 30), sizes)
+        self.assertEqual({size for _, size in sizes}, {30})
+
+
+class DenyBlockedObjectPermission(BasePermission):
+
+    def has_object_permission(self, request, view, obj):
+        return request.user.username != 'bloqueado'
+
+
+class ResponseCacheTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = self.create_companies(3)[0]
+
+    def cached_view(self, actions, **attrs):
+        attrs.setdefault('cache_response_timeout', 60)
+        return type('CompanyViewSet', (CompanyViewSet,), attrs).as_view(actions)
+
+    def get(self, view, user=None, path=COMPANY_URL, **kwargs):
+        headers = kwargs.pop('headers', {})
+        request = APIRequestFactory().get(path, **headers)
+        force_authenticate(request, user=user or self.user)
+        response = view(request, **kwargs)
+        response.render()
+        return response
+
+    def test_cache_is_opt_in(self):
+        response = self.client.get(COMPANY_URL)
+        self.assertNotIn('X-Cache', response)
+
+    def test_hit_serves_same_payload_with_fresh_naive_timestamp(self):
+        view = self.cached_view({'get': 'list'})
+        miss = self.get(view)
+        with CaptureQueriesContext(connection) as queries:
+            hit = self.get(view)
+
+        self.assertEqual((miss['X-Cache'], hit['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(json.loads(miss.content)['data'], json.loads(hit.content)['data'])
+        self.assertEqual(miss['ETag'], hit['ETag'])
+        self.assertIsNone(datetime.fromisoformat(json.loads(hit.content)['timestamp']).tzinfo)
+
+    def test_if_none_match_returns_304(self):
+        view = self.cached_view({'get': 'list'})
+        etag = self.get(view)['ETag']
+        response = self.get(view, headers={'HTTP_IF_NONE_MATCH': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_ignores_if_modified_since(self):
+        view = self.cached_view({'get': 'list'})
+        self.assertNotIn('Last-Modified', self.get(view))
+
+        since = {'HTTP_IF_MODIFIED_SINCE': http_date(time.time() + 60)}
+        with self.captureOnCommitCallbacks(execute=True):
+            Company.objects.filter(pk=self.company.pk).delete()
+        response = self.get(view, headers=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.content)['data']['results']), 2)
+
+    def test_retrieve_honors_if_modified_since(self):
+        view = self.cached_view({'get': 'retrieve'})
+        path = f"{COMPANY_URL}{self.company.pk}/"
+        response = self.get(view, path=path, pk=self.company.pk)
+        self.assertEqual(response['Last-Modified'], http_date(int(self.company.modified_at.timestamp())))
+
+        since = {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']}
+        self.assertEqual(self.get(view, path=path, pk=self.company.pk, headers=since).status_code, 304)
+
+    def test_entries_are_per_user_by_default(self):
+        view = self.cached_view({'get': 'list'})
+        self.get(view)
+        other = User.objects.create_user('otro')
+        self.assertEqual(self.get(view, user=other)['X-Cache'], 'MISS')
+
+    def test_committed_write_invalidates_entries(self):
+        view = self.cached_view({'get': 'list'})
+        self.get(view)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"{COMPANY_URL}{self.company.pk}/", {'name': 'otro nombre'}, format='json')
+        response = self.get(view)
+
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn('OTRO NOMBRE', [item['name'] for item in json.loads(response.content)['data']['results']])
+
+    def test_hit_still_checks_object_permissions(self):
+        view = self.cached_view(
+            {'get': 'retrieve'},
+            cache_response_per_user=False,
+            permission_classes=[IsAuthenticated, DenyBlockedObjectPermission],
+        )
+        path = f"{COMPANY_URL}{self.company.pk}/"
+        self.assertEqual(self.get(view, path=path, pk=self.company.pk).status_code, 200)
+
+        blocked = User.objects.create_user('bloqueado')
+        response = self.get(view, user=blocked, path=path, pk=self.company.pk)
+        self.assertEqual(response.status_code, 403)
+
+
+class CompanyCatalogViewSet(CatalogViewSet):
+    queryset = Company.objects.all()
+    serializer_class = CompanySerializer
+    ordering = ['code']
+    ordering_fields = ['code', 'name']
+    search_fields = ['code', 'name']
+
+
+class OwnCompanyCatalogViewSet(CompanyCatalogViewSet):
+
+    def get_queryset(self):
+        return super().get_queryset().filter(created_by=self.request.user)
+
+
+class ActiveListTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        CatalogViewSet._active_list_snapshots.clear()
+        self.create_companies(3, created_by=self.user)
+        Company.objects.filter(code='C0001').update(is_active=False)
+
+    def get(self, viewset, user=None, headers=None):
+        request = APIRequestFactory().get('/active_list/', **(headers or {}))
+        force_authenticate(request, user=user or self.user)
+        response = viewset.as_view({'get': 'active_list'})(request)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def codes(self, response):
+        return [item['code'] for item in json.loads(response.content)['data']]
+
+    def test_snapshot_lists_active_records_and_is_reused(self):
+        self.assertEqual(self.codes(self.get(CompanyCatalogViewSet)), ['C0000', 'C0002'])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(CompanyCatalogViewSet)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(self.get(CompanyCatalogViewSet, headers={'HTTP_IF_NONE_MATCH': response['ETag']}).status_code, 304)
+
+    def test_snapshot_follows_get_queryset_scope(self):
+        other = User.objects.create_user('otro')
+        self.create_companies(1, start=10, created_by=other)
+
+        self.assertEqual(self.codes(self.get(OwnCompanyCatalogViewSet)), ['C0000', 'C0002'])
+        self.assertEqual(self.codes(self.get(OwnCompanyCatalogViewSet, user=other)), ['C0010'])
+        self.assertEqual(self.codes(self.get(CompanyCatalogViewSet)), ['C0000', 'C0002', 'C0010'])
+
+    def test_local_snapshots_are_bounded(self):
+        users = [User.objects.create_user(f"usuario{i}") for i in range(3)]
+        with mock.patch.object(CatalogViewSet._active_list_snapshots, 'max_size', 2):
+            for user in users:
+                self.assertEqual(self.codes(self.get(OwnCompanyCatalogViewSet, user=user)), [])
+            self.assertEqual(len(CatalogViewSet._active_list_snapshots), 2)
+
+            # El descartado se vuelve a leer de la caché compartida, sin consultar la BD
+            with CaptureQueriesContext(connection) as queries:
+                self.get(OwnCompanyCatalogViewSet, user=users[0])
+            self.assertFalse([query for query in queries if 'business_company' in query['sql']])
+
+    def test_committed_write_rebuilds_snapshot(self):
+        self.get(CompanyCatalogViewSet)
+        with self.captureOnCommitCallbacks(execute=True):
+            Company.objects.filter(code='C0001').update(is_active=True)
+        self.assertEqual(self.codes(self.get(CompanyCatalogViewSet)), ['C0000', 'C0001', 'C0002'])
+
+
+class ExportTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.create_companies(3, created_by=self.user)
+        Company.objects.filter(code='C0002').update(is_active=False)
+
+    def export(self, params):
+        response = self.client.get(f"{COMPANY_URL}export/", params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_export_streams_filtered_rows_with_header(self):
+        response, content = self.export({'export_format': 'csv'})
+        rows = list(csv.DictReader(io.StringIO(content)))
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="company.csv"', response['Content-Disposition'])
+        self.assertEqual([row['code'] for row in rows], ['C0000', 'C0001'])
+        self.assertEqual(rows[0]['created_by_name'], 'tester')
+
+    def test_ndjson_export_matches_serializer_output(self):
+        _, content = self.export({'export_format': 'ndjson', 'code': 'C0000'})
+        rows = [json.loads(line) for line in content.splitlines()]
+        expected = json.loads(json.dumps(CompanySerializer(Company.objects.get(code='C0000')).data))
+
+        # Columnas fijas: lo que el serializer omite (updated_by_name sin updated_by) sale como null
+        self.assertEqual(len(rows), 1)
+        self.assertEqual({key: expected.get(key) for key in rows[0]}, rows[0])
+        self.assertIsNone(rows[0]['updated_by_name'])
+
+    def export_with(self, serializer_class, params):
+        view = type('CompanyViewSet', (CompanyViewSet,), {'serializer_class': serializer_class}).as_view({'get': 'export'})
+        request = APIRequestFactory().get(f"{COMPANY_URL}export/", params)
+        force_authenticate(request, user=self.user)
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_fields_without_column_fall_back_to_the_compiled_serializer(self):
+        serializer_class = type('StatusCompanySerializer', (StatusMixin, TimestampMixin, CompanySerializer), {})
+        content = self.export_with(serializer_class, {'export_format': 'csv'})
+        rows = list(csv.DictReader(io.StringIO(content)))
+
+        self.assertEqual([row['status_display'] for row in rows], ['Activo', 'Activo'])
+        self.assertTrue(rows[0]['created_at_formatted'])
+        self.assertIn('updated_by_name', rows[0])
+
+    def test_uncompilable_serializer_falls_back_to_drf(self):
+        content = self.export_with(LabelledCompanySerializer, {'export_format': 'ndjson', 'code': 'C0000'})
+        rows = [json.loads(line) for line in content.splitlines()]
+
+        self.assertEqual(rows[0]['label'], str(Company.objects.get(code='C0000')))
+        self.assertIsNone(rows[0]['updated_by_name'])
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get(f"{COMPANY_URL}export/", {'export_format': 'xlsx'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ImportTests(APITestCase):
+
+    def post_import(self, body, content_type, params='', **attrs):
+        view = type('CompanyViewSet', (CompanyViewSet,), attrs).as_view({'post': 'bulk_import'})
+        request = APIRequestFactory().post(f"{COMPANY_URL}import/{params}", data=body, content_type=content_type)
+        force_authenticate(request, user=self.user)
+        return view(request)
+
+    def test_csv_with_charset_parameter_is_accepted(self):
+        body = '\ufeffcode,name\na1,uno\na2,dos\n'.encode()
+        response = self.post_import(body, 'text/csv; charset=utf-8')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['inserted'], 2)
+        self.assertEqual(sorted(Company.objects.values_list('code', flat=True)), ['A1', 'A2'])
+
+    def test_rows_are_validated_and_reported_by_line(self):
+        body = b'{"code": "a1", "name": "uno"}\n{"name": "sin codigo"}\nno es json\n{"code": "A1", "name": "repetido"}\n'
+        response = self.post_import(body, 'application/x-ndjson')
+
+        summary = response.data['data']
+        self.assertEqual((summary['inserted'], summary['failed']), (1, 3))
+        self.assertEqual(sorted(error['line'] for error in summary['errors']), [2, 3, 4])
+
+    def test_invalid_utf8_lines_are_reported_without_stopping(self):
+        body = b'{"code": "a1", "name": "uno"}\n{"code": "a2", "name": "\xff"}\n{"code": "a3", "name": "tres"}\n'
+        response = self.post_import(body, 'application/x-ndjson')
+        self.assertEqual(response.data['data']['errors'][0]['line'], 2)
+        self.assertEqual(response.data['data']['inserted'], 2)
+
+        body = b'code,name\nb1,uno\nb2,\xff\nb3,tres\n'
+        response = self.post_import(body, 'text/csv')
+        self.assertEqual(response.data['data']['errors'][0]['line'], 3)
+        self.assertEqual(response.data['data']['inserted'], 2)
+
+    def test_undecodable_csv_header_rejects_the_import(self):
+        body = b'code,n\xffme\nb1,uno\nb2,dos\n'
+        response = self.post_import(body, 'text/csv')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('encabezado', response.data['errors']['non_field_errors'][0])
+        self.assertFalse(Company.objects.exists())
+
+    def test_integrity_error_in_a_later_chunk_keeps_earlier_chunks(self):
+        create = BulkListSerializer.create
+        calls = []
+
+        def failing_create(serializer, validated_data):
+            calls.append(len(validated_data))
+            if len(calls) == 2:
+                raise IntegrityError("UNIQUE constraint failed")
+            return create(serializer, validated_data)
+
+        body = b'{"code": "a1", "name": "uno"}\n{"code": "a2", "name": "dos"}\n{"code": "a3", "name": "tres"}\n'
+        with mock.patch.object(BulkListSerializer, 'create', failing_create), \
+                self.captureOnCommitCallbacks() as callbacks:
+            response = self.post_import(body, 'application/x-ndjson', import_chunk_size=1)
+
+        summary = response.data['data']
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((summary['inserted'], summary['failed']), (2, 1))
+        self.assertEqual(summary['errors'][0]['line'], 2)
+        self.assertTrue(callbacks)
+
+    def test_atomic_import_rolls_back_on_any_error(self):
+        body = b'{"code": "a1", "name": "uno"}\n{"name": "sin codigo"}\n'
+        response = self.post_import(body, 'application/x-ndjson', params='?atomic=true')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Company.objects.exists())
+
+    def test_unsupported_content_type_returns_415(self):
+        response = self.post_import(b'<xml/>', 'application/xml')
+        self.assertEqual(response.status_code, 415)
+
+
+SHARED_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379/0'}}
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class JobStoreTests(APITestCase):
+
+    @override_settings(BULK_JOBS={'BACKEND': 'apps.core.jobs.ThreadPoolBackend'}, CACHES=LOCAL_CACHES)
+    def test_check_fails_for_threadpool_with_locmem_cache(self):
+        self.assertEqual([error.id for error in check_job_store()], ['core.E002'])
+
+    @override_settings(BULK_JOBS={'BACKEND': 'apps.core.jobs.CeleryBackend', 'CACHE': 'jobs'}, CACHES=LOCAL_CACHES)
+    def test_check_fails_for_unknown_cache_alias(self):
+        self.assertEqual([error.id for error in check_job_store()], ['core.E001'])
+
+    @override_settings(BULK_JOBS={'BACKEND': 'apps.core.jobs.CeleryBackend'}, CACHES=SHARED_CACHES)
+    def test_check_passes_with_shared_cache(self):
+        self.assertEqual(check_job_store(), [])
+
+    @override_settings(BULK_JOBS={'BACKEND': 'apps.core.jobs.EagerBackend'}, CACHES=LOCAL_CACHES)
+    def test_check_passes_for_eager_backend(self):
+        self.assertEqual(check_job_store(), [])
+
+    @override_settings(BULK_JOBS={'BACKEND': 'apps.core.jobs.EagerBackend'})
+    def test_eager_job_runs_after_commit_and_reports_result(self):
+        companies = self.create_companies(3)
+        ids = [str(company.pk) for company in companies[:2]]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"{COMPANY_URL}bulk_delete/?async=true", {'ids': ids}, format='json')
+
+        self.assertEqual(response.status_code, 202)
+        job_id = response.data['data']['job_id']
+        self.assertEqual(Company.objects.count(), 1)
+
+        response = self.client.get(f"{COMPANY_URL}jobs/{job_id}/")
+        job = response.data['data']
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['result']['data']['deleted_count'], 2)
+        self.assertNotIn('payload', job)
+        self.assertIsNone(get_job(job_id)['payload'])
+
+    @override_settings(BULK_JOBS={'BACKEND': 'apps.core.jobs.EagerBackend', 'RESULT_MAX_ITEMS': 2})
+    def test_job_result_keeps_counts_and_capped_ids(self):
+        rows = [{'code': f"N{i:03d}", 'name': f"NUEVA {i}"} for i in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"{COMPANY_URL}bulk_create/?async=true", rows, format='json')
+
+        job = get_job(response.data['data']['job_id'])
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertIsNone(job['payload'])
+        self.assertEqual(job['result']['message'], "3 registros creados exitosamente")
+        self.assertEqual(job['result']['data']['count'], 3)
+        self.assertEqual(len(job['result']['data']['ids']), 2)
+        self.assertTrue(job['result']['data']['ids_truncated'])
+        self.assertEqual(
+            set(job['result']['data']['ids']) - {str(pk) for pk in Company.objects.values_list('pk', flat=True)},
+            set(),
+        )
+
+    @override_settings(BULK_JOBS={'BACKEND': 'apps.core.jobs.EagerBackend', 'RESULT_MAX_ITEMS': 2})
+    def test_job_errors_are_capped(self):
+        rows = [{'code': ''} for _ in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"{COMPANY_URL}bulk_create/?async=true", rows, format='json')
+
+        job = get_job(response.data['data']['job_id'])
+        self.assertEqual(job['status'], 'failed')
+        self.assertEqual(len(job['result']['errors']['bulk_errors']), 2)
+        self.assertTrue(job['result']['errors']['errors_truncated'])
+
+
+class AsyncCompanyViewSet(AsyncViewSetMixin, CompanyViewSet):
+    pass
+
+
+class AsyncCompanyCatalogViewSet(AsyncCatalogViewSet):
+    queryset = Company.objects.all()
+    serializer_class = CompanySerializer
+    ordering = ['code']
+    ordering_fields = ['code', 'name']
+    search_fields = ['code', 'name']
+
+
+class AsyncViewSetTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        CatalogViewSet._active_list_snapshots.clear()
+        self.companies = self.create_companies(3, created_by=self.user)
+
+    def call(self, viewset, action, path='/', **kwargs):
+        request = APIRequestFactory().get(path)
+        force_authenticate(request, user=self.user)
+        response = async_to_sync(viewset.as_view({'get': action}))(request, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def test_list_paginates_with_async_orm(self):
+        response = self.call(AsyncCompanyViewSet, 'list', '/?page_size=2&ordering=code')
+
+        self.assertEqual(response.status_code, 200)
+        payload = json.loads(response.content)['data']
+        self.assertEqual([item['code'] for item in payload['results']], ['C0000', 'C0001'])
+        self.assertEqual(payload['pagination']['count'], 3)
+
+    def test_list_matches_sync_viewset(self):
+        sync_view = CompanyViewSet.as_view({'get': 'list'})
+        request = APIRequestFactory().get('/?ordering=code')
+        force_authenticate(request, user=self.user)
+        expected = sync_view(request)
+        expected.render()
+
+        response = self.call(AsyncCompanyViewSet, 'list', '/?ordering=code')
+        self.assertEqual(json.loads(response.content)['data'], json.loads(expected.content)['data'])
+
+    def test_retrieve_and_missing_object(self):
+        company = self.companies[1]
+        response = self.call(AsyncCompanyViewSet, 'retrieve', pk=str(company.pk))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['code'], 'C0001')
+
+        response = self.call(AsyncCompanyViewSet, 'retrieve', pk='0')
+        self.assertEqual(response.status_code, 404)
+
+    def test_unauthenticated_request_is_rejected(self):
+        request = APIRequestFactory().get('/')
+        response = async_to_sync(AsyncCompanyViewSet.as_view({'get': 'list'}))(request)
+        self.assertIn(response.status_code, (401, 403))
+
+    def test_active_list_uses_scoped_snapshot(self):
+        Company.objects.filter(code='C0001').update(is_active=False)
+
+        response = self.call(AsyncCompanyCatalogViewSet, 'active_list')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['code'] for item in json.loads(response.content)['data']], ['C0000', 'C0002'])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.call(AsyncCompanyCatalogViewSet, 'active_list')
+        self.assertEqual(len(queries), 0)
+
+
+class LabelledCompanySerializer(CompanySerializer):
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['label'] = str(instance)
+        return data
+
+
+class CompiledSerializerTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        editor = User.objects.create_user('editor')
+        self.create_companies(2, created_by=self.user)
+        Company.objects.create(code='NULOS', name='SIN DATOS', email=None, phone=None, address=None)
+        Company.objects.filter(code='C0001').update(updated_by=editor, phone='0999', address='Av. Siempre Viva')
+
+    def get_queryset(self):
+        return Company.objects.select_related('created_by', 'updated_by').order_by('code')
+
+    def assert_same_output(self):
+        companies = list(self.get_queryset())
+        expected = json.loads(json.dumps(CompanySerializer(companies, many=True).data))
+        compiled = CompiledSerializer(CompanySerializer)
+
+        self.assertEqual(compiled.serialize(CompanySerializer(), companies), expected)
+        rows = list(self.get_queryset().values(*compiled.value_fields))
+        self.assertEqual(compiled.serialize(CompanySerializer(), rows), expected)
+        return expected
+
+    def test_output_matches_drf_with_nulls_fks_and_source_fields(self):
+        expected = self.assert_same_output()
+        by_code = {item['code']: item for item in expected}
+
+        # DRF omite los campos de solo lectura con source punteado si la FK es nula
+        self.assertNotIn('updated_by_name', by_code['C0000'])
+        self.assertEqual(by_code['C0001']['updated_by_name'], 'editor')
+        self.assertNotIn('created_by_name', by_code['NULOS'])
+        self.assertIsNone(by_code['NULOS']['created_by'])
+        self.assertIsNone(by_code['NULOS']['email'])
+
+    @override_settings(USE_TZ=True, TIME_ZONE='America/Guayaquil')
+    def test_datetimes_match_drf_in_local_time(self):
+        Company.objects.filter(code='C0000').update(created_at=datetime(2024, 1, 1, 3, 30, tzinfo=dt_timezone.utc))
+        expected = self.assert_same_output()
+        self.assertEqual(
+            next(item for item in expected if item['code'] == 'C0000')['created_at'],
+            '2023-12-31 22:30:00'
+        )
+
+    @override_settings(USE_TZ=False)
+    def test_datetimes_match_drf_without_time_zone(self):
+        self.assert_same_output()
+
+    def test_unsupported_serializer_fails_loudly(self):
+        with self.assertRaises(CompilationError):
+            get_compiled_serializer(LabelledCompanySerializer)
+
+        viewset = type('LabelledCompanyViewSet', (CompanyViewSet,), {
+            'serializer_class': LabelledCompanySerializer,
+            'compiled_serialization': 'instances',
+        })
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=self.user)
+        with self.assertRaises(ImproperlyConfigured):
+            viewset.as_view({'get': 'list'})(request)
+
+
+class FastJSONRendererTests(TestCase):
+
+    def get_payload(self):
+        return {
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'utc': datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=dt_timezone.utc),
+            'offset': datetime(2024, 1, 2, 3, 4, 5, tzinfo=dt_timezone(timedelta(hours=-5))),
+            'naive': datetime(2024, 1, 2, 3, 4, 5),
+            'date': date(2024, 1, 2),
+            'time': dt_time(10, 30),
+            'duration': timedelta(minutes=90),
+            'amount': Decimal('10.50'),
+            'label': gettext_lazy('Activo'),
+            'text': 'Ñandú \u2028 fin',
+            'big': 2 ** 70,
+            'numbers': (1, 2.5, -0.0),
+            'nested': [{'ok': True, 'none': None}],
+            1: 'clave entera',
+        }
+
+    def render(self, renderer, data, media_type='application/json'):
+        return renderer.render(data, media_type, {})
+
+    def test_orjson_and_json_match_drf(self):
+        payload = self.get_payload()
+        expected = self.render(JSONRenderer(), payload)
+
+        self.assertIsNotNone(renderers.orjson)
+        self.assertEqual(self.render(FastJSONRenderer(), payload), expected)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(self.render(FastJSONRenderer(), payload), expected)
+
+        del payload['big']
+        self.assertEqual(self.render(FastJSONRenderer(), payload), self.render(JSONRenderer(), payload))
+
+    def test_indented_output_matches_drf(self):
+        payload = self.get_payload()
+        media_type = 'application/json; indent=2'
+        self.assertEqual(
+            self.render(FastJSONRenderer(), payload, media_type),
+            self.render(JSONRenderer(), payload, media_type),
+        )
+
+    def test_non_finite_floats_are_rejected_like_drf(self):
+        for value in (float('nan'), float('inf'), [{'x': float('-inf')}]):
+            with self.assertRaises(ValueError):
+                self.render(JSONRenderer(), {'value': value})
+            with self.assertRaises(ValueError):
+                self.render(FastJSONRenderer(), {'value': value})
+
+    def test_unserializable_objects_raise_the_drf_error(self):
+        with self.assertRaises(ValueError):
+            self.render(FastJSONRenderer(), {'time': dt_time(10, 30, tzinfo=dt_timezone.utc)})
+        with self.assertRaises(TypeError):
+            self.render(FastJSONRenderer(), {'object': object()})
+
+    def test_float_check_is_skipped_for_serializers_without_floats(self):
+        view = CompanyViewSet()
+        view.action = 'list'
+        rows = {'results': [{'code': 'C0000', 'name': 'EMPRESA'}]}
+        with mock.patch.object(renderers, 'has_non_finite_float', wraps=renderers.has_non_finite_float) as walk:
+            FastJSONRenderer().render(rows, 'application/json', {'view': view})
+            walk.assert_not_called()
+
+            view.action = 'statistics'
+            FastJSONRenderer().render(rows, 'application/json', {'view': view})
+            walk.assert_called_once()
+
+    def test_float_fields_keep_the_non_finite_check(self):
+        FloatSerializer = type('FloatSerializer', (serializers.Serializer,), {'ratio': serializers.FloatField()})
+        MethodSerializer = type('MethodSerializer', (CompanySerializer,), {
+            'extra': serializers.SerializerMethodField(),
+            'get_extra': lambda self, obj: None,
+        })
+        StringDecimalSerializer = type('StringDecimalSerializer', (serializers.Serializer,), {
+            'amount': serializers.DecimalField(max_digits=10, decimal_places=2),
+        })
+        self.assertTrue(renderers.serializer_may_emit_float(FloatSerializer))
+        self.assertTrue(renderers.serializer_may_emit_float(MethodSerializer))
+        self.assertFalse(renderers.serializer_may_emit_float(StringDecimalSerializer))
+        self.assertFalse(renderers.serializer_may_emit_float(CompanySerializer))
+
+        view = mock.Mock(action='list', get_serializer_class=lambda: FloatSerializer)
+        with self.assertRaises(ValueError):
+            FastJSONRenderer().render({'ratio': float('nan')}, 'application/json', {'view': view})
+
+    def test_encoded_fragments_are_inserted_verbatim(self):
+        fragment = EncodedJSON(b'[{"code":"C0000"}]')
+        content = self.render(FastJSONRenderer(), {'data': fragment, 'count': 1})
+        self.assertEqual(content, b'{"data":[{"code":"C0000"}],"count":1}')
+
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(self.render(FastJSONRenderer(), {'data': fragment, 'count': 1}), content)
+
+
+class GroupPermissionCacheTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.rrhh = Group.objects.create(name='RRHH')
+        self.sales = Group.objects.create(name='Ventas')
+        self.user.groups.add(self.rrhh)
+
+    def group_names(self):
+        # Instancia nueva en cada llamada: solo queda la caché compartida
+        return get_user_group_names(User.objects.get(pk=self.user.pk))
+
+    def test_group_names_are_cached_per_user(self):
+        self.assertEqual(self.group_names(), {'RRHH'})
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_group_names(user), {'RRHH'})
+            self.assertEqual(get_user_group_names(user), {'RRHH'})
+        self.assertEqual(get_user_group_names(AnonymousUser()), frozenset())
+
+    def test_membership_changes_invalidate_the_cache(self):
+        self.assertEqual(self.group_names(), {'RRHH'})
+
+        self.user.groups.add(self.sales)
+        self.assertEqual(self.group_names(), {'RRHH', 'Ventas'})
+
+        self.rrhh.user_set.remove(self.user)
+        self.assertEqual(self.group_names(), {'Ventas'})
+
+        self.sales.user_set.clear()
+        self.assertEqual(self.group_names(), frozenset())
+
+    def test_renaming_or_deleting_a_group_invalidates_the_cache(self):
+        self.assertEqual(self.group_names(), {'RRHH'})
+
+        self.rrhh.name = 'Talento'
+        self.rrhh.save()
+        self.assertEqual(self.group_names(), {'Talento'})
+
+        self.rrhh.delete()
+        self.assertEqual(self.group_names(), frozenset())
+
+    def test_invalidate_user_groups_drops_the_entry(self):
+        self.assertEqual(self.group_names(), {'RRHH'})
+        # Un cambio que no pasa por señales (SQL directo) se ve tras invalidar
+        User.groups.through.objects.filter(user=self.user).delete()
+        self.assertEqual(self.group_names(), {'RRHH'})
+
+        invalidate_user_groups([self.user.pk])
+        self.assertEqual(self.group_names(), frozenset())
+
+    def test_has_group_permission(self):
+        request = APIRequestFactory().get('/')
+        request.user = AnonymousUser()
+        self.assertFalse(IsRRHH().has_permission(request, None))
+
+        request.user = User.objects.get(pk=self.user.pk)
+        self.assertTrue(HasGroupPermission().has_permission(request, None))
+        self.assertTrue(IsRRHH().has_permission(request, None))
+
+        other = User.objects.create_user('otro')
+        other.groups.add(self.sales)
+        request.user = other
+        self.assertFalse(IsRRHH().has_permission(request, None))
+
+
+class TokenCacheTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.token = Token.objects.create(user=self.user)
+        self.key = self.token.key
+        self.cache_key = get_token_cache_key(self.key)
+        local_cache.delete(self.cache_key)
+
+    def authenticate(self):
+        return CachedTokenAuthentication().authenticate_credentials(self.key)
+
+    def test_cached_payload_is_a_plain_dict_and_builds_fresh_instances(self):
+        user, token = self.authenticate()
+        self.assertEqual((user.pk, token.key, token.user_id), (self.user.pk, self.token.key, self.user.pk))
+
+        payload = cache.get(self.cache_key)
+        self.assertEqual(payload['token']['key'], self.token.key)
+        self.assertEqual(payload['user']['username'], 'tester')
+
+        with self.assertNumQueries(0):
+            other_user, other_token = self.authenticate()
+            self.assertEqual(
+                (other_user.username, other_user.is_active, other_user.is_staff, other_user.is_superuser),
+                ('tester', True, True, False),
+            )
+        self.assertIsNot(other_user, user)
+        self.assertIs(other_token.user, other_user)
+        self.assertFalse(other_user._state.adding)
+
+    def test_password_hash_is_not_cached(self):
+        self.authenticate()
+        payload = cache.get(self.cache_key)
+        self.assertEqual(set(payload['user']), {'id', 'username', 'is_active', 'is_staff', 'is_superuser'})
+
+        # Los campos no guardados quedan diferidos y se leen de la BD al usarlos
+        user, _ = self.authenticate()
+        self.assertIn('password', user.get_deferred_fields())
+        with self.assertNumQueries(1):
+            self.assertEqual(user.password, self.user.password)
+
+    def test_last_login_saves_do_not_touch_tokens(self):
+        self.authenticate()
+        with self.assertNumQueries(1):
+            self.user.save(update_fields=['last_login'])
+        self.assertIsNotNone(cache.get(self.cache_key))
+
+    def test_creating_a_user_does_not_query_tokens(self):
+        with CaptureQueriesContext(connection) as queries:
+            User.objects.create_user('nuevo')
+        self.assertFalse([query for query in queries if 'authtoken_token' in query['sql']])
+
+    def test_deactivating_the_user_invalidates_the_token(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+
+        self.assertIsNone(cache.get(self.cache_key))
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deleting_the_token_invalidates_it(self):
+        self.authenticate()
+        self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+
+class SearchTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        Company.objects.create(code='ACME', name='ACME COMPANY', email='ventas@acme.com')
+        Company.objects.create(code='GLOBEX', name='GLOBEX CORPORATION', email='info@globex.com')
+        Company.objects.create(code='INITECH', name='INITECH', email='acme@initech.com')
+
+    def search(self, query, viewset=CompanyViewSet):
+        request = Request(APIRequestFactory().get('/', {'search': query}))
+        view = viewset(request=request, format_kwarg=None, action='list', kwargs={})
+        return IndexedSearchFilter().filter_queryset(request, Company.objects.order_by('code'), view)
+
+    def codes(self, query, viewset=CompanyViewSet):
+        return sorted(self.search(query, viewset).values_list('code', flat=True))
+
+    def test_substring_semantics_match_drf_search_filter(self):
+        self.assertEqual(self.codes('mpany'), ['ACME'])
+        self.assertEqual(self.codes('acme'), ['ACME', 'INITECH'])
+        self.assertEqual(self.codes('acme initech'), ['INITECH'])
+        self.assertEqual(self.codes('globex.com'), ['GLOBEX'])
+        # Menos de 3 caracteres: icontains sin índice
+        self.assertEqual(self.codes('ex'), ['GLOBEX'])
+        self.assertEqual(self.codes('ex corp'), ['GLOBEX'])
+
+    def test_rank_is_an_annotation_and_orders_by_relevance(self):
+        queryset = self.search('acme')
+        self.assertIn(SEARCH_RANK, queryset.query.annotations)
+        self.assertFalse(queryset.query.extra)
+
+        response = self.client.get(COMPANY_URL, {'search': 'acme'})
+        codes = [item['code'] for item in response.data['data']['results']]
+        self.assertEqual(codes[0], 'ACME')
+
+        response = self.client.get(COMPANY_URL, {'search': 'acme', 'ordering': '-code'})
+        self.assertEqual([item['code'] for item in response.data['data']['results']], ['INITECH', 'ACME'])
+
+    def test_search_fields_come_from_the_model(self):
+        self.assertIsNone(getattr(CompanyViewSet, 'search_fields', None))
+        # Otros campos en el viewset: SearchFilter de DRF, sin índice ni relevancia
+        queryset = self.search('acme', CompanyCatalogViewSet)
+        self.assertNotIn(SEARCH_RANK, queryset.query.annotations)
+        self.assertEqual(sorted(queryset.values_list('code', flat=True)), ['ACME'])
+
+    def test_index_follows_updates_of_indexed_columns(self):
+        Company.objects.filter(code='GLOBEX').update(name='HOOLI')
+        self.assertEqual(self.codes('hooli'), ['GLOBEX'])
+
+        company = Company.objects.get(code='ACME')
+        company.delete()
+        self.assertEqual(self.codes('acme'), ['INITECH'])
+
+    def test_update_trigger_only_fires_for_indexed_columns(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'business_company_search_au'")
+            self.assertIn('AFTER UPDATE OF "name", "code", "email" ON', cursor.fetchone()[0])
+
+    def test_outdated_sqlite_index_is_rebuilt(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER "business_company_search_au"')
+            cursor.execute(
+                'CREATE TRIGGER "business_company_search_au" AFTER UPDATE ON "business_company" BEGIN SELECT 1; END'
+            )
+        ensure_search_indexes([Company])
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'business_company_search_au'")
+            self.assertIn('AFTER UPDATE OF', cursor.fetchone()[0])
+        self.assertEqual(self.codes('mpany'), ['ACME'])
+
+    def test_postgresql_index_without_pg_trgm(self):
+        pg = mock.Mock(vendor='postgresql', ops=mock.Mock(quote_name=lambda name: f'"{name}"'))
+        with_trigram = get_create_search_index_sql(pg, 'company', ['name'])
+        without_trigram = get_create_search_index_sql(pg, 'company', ['name'], trigram=False)
+
+        self.assertFalse(any('EXTENSION' in sql for sql in with_trigram))
+        self.assertEqual(len(with_trigram), 1)
+        self.assertIn('gin_trgm_ops', with_trigram[0])
+        self.assertEqual(without_trigram, [])
+
+    def test_postgresql_filters_only_by_substring(self):
+        pg = mock.Mock(vendor='postgresql', ops=mock.Mock(quote_name=lambda name: f'"{name}"'))
+        queryset = IndexedSearchFilter().filter_postgresql(Company.objects.all(), ['foo-bar', '50%'], pg)
+
+        conditions = [child.lhs for child in queryset.query.where.children]
+        self.assertEqual([condition.params for condition in conditions], [['%foo-bar%'], ['%50\\%%']])
+        self.assertTrue(all('to_tsquery' not in condition.sql for condition in conditions))
+        self.assertEqual(queryset.query.annotations[SEARCH_RANK].params, ['foo:* | bar:* | 50:*'])
+
+    def test_sqlite_index_does_not_depend_on_rowids(self):
+        # Simula un VACUUM que renumera los rowid implícitos de la tabla
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE "business_company" SET rowid = rowid + 1000')
+        self.assertEqual(self.codes('mpany'), ['ACME'])
+
+        Company.objects.filter(code='ACME').update(name='HOOLI')
+        self.assertEqual(self.codes('hooli'), ['ACME'])
+        Company.objects.get(code='INITECH').delete()
+        self.assertEqual(self.codes('acme'), ['ACME'])
+        self.assertEqual(self.codes('initech'), [])
+
+    def test_pg_trgm_permission_error_is_not_fatal(self):
+        cursor = mock.MagicMock()
+        cursor.fetchone.return_value = None
+        cursor.execute.side_effect = [None, search.DatabaseError('permission denied to create extension')]
+        pg = mock.MagicMock(alias='default')
+        pg.cursor.return_value.__enter__.return_value = cursor
+
+        with mock.patch.object(search.transaction, 'atomic'), self.assertLogs('apps.core.search', 'WARNING'):
+            self.assertFalse(search.ensure_pg_trgm(pg))
+
+
+@override_settings(AUTOCOMPLETE={'REFRESH_INTERVAL': 0})
+class AutocompleteTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        Company.objects.create(code='N01', name='ÑANDÚ SUR')
+        Company.objects.create(code='P01', name='PANADERÍA CENTRAL')
+        Company.objects.create(code='P02', name='PAPELERA', is_active=False)
+        self.index = PrefixIndex(Company, ['code', 'name'])
+
+    def names(self, prefix):
+        return [item['name'] for item in self.index.search(prefix)]
+
+    def test_prefixes_match_words_without_accents(self):
+        self.assertEqual(self.names('nan'), ['ÑANDÚ SUR'])
+        self.assertEqual(self.names('sur'), ['ÑANDÚ SUR'])
+        self.assertEqual(self.names('pa'), ['PANADERÍA CENTRAL'])
+        self.assertEqual(self.names(''), [])
+
+    def test_index_is_reused_while_the_generation_is_unchanged(self):
+        self.names('pa')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names('central'), ['PANADERÍA CENTRAL'])
+
+    def test_queryset_update_rebuilds_the_index(self):
+        self.assertEqual(self.names('pap'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Company.objects.filter(code='P02').update(is_active=True)
+            Company.objects.filter(code='N01').update(name='AVESTRUZ')
+
+        self.assertEqual(self.names('pap'), ['PAPELERA'])
+        self.assertEqual(self.names('nan'), [])
+        self.assertEqual(self.names('ave'), ['AVESTRUZ'])
+
+    def test_bulk_create_and_delete_rebuild_the_index(self):
+        self.names('pa')
+        with self.captureOnCommitCallbacks(execute=True):
+            Company.objects.bulk_create([Company(code='P03', name='PALMERAS')])
+        self.assertEqual(self.names('pal'), ['PALMERAS'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Company.objects.get(code='P03').delete()
+        self.assertEqual(self.names('pal'), [])
+
+    def test_saves_are_applied_as_deltas(self):
+        self.names('pa')
+        with mock.patch.object(self.index, 'load', wraps=self.index.load) as load:
+            with self.captureOnCommitCallbacks(execute=True):
+                company = Company.objects.get(code='N01')
+                company.name = 'AVESTRUZ'
+                company.save()
+                Company.objects.create(code='P03', name='PALMERAS')
+            self.assertEqual(self.names('ave'), ['AVESTRUZ'])
+            self.assertEqual(self.names('nan'), [])
+            self.assertEqual(self.names('pal'), ['PALMERAS'])
+
+            with self.captureOnCommitCallbacks(execute=True):
+                company = Company.objects.get(code='P03')
+                company.is_active = False
+                company.save()
+            self.assertEqual(self.names('pal'), [])
+            load.assert_not_called()
+
+        # Mismo índice que una carga completa
+        index = PrefixIndex(Company, ['code', 'name'])
+        index.refresh()
+        self.assertEqual(self.index._keys, index._keys)
+        self.assertEqual(self.index._items, index._items)
+
+    def test_deletes_and_unseen_writes_fall_back_to_a_full_load(self):
+        self.names('pa')
+        with mock.patch.object(self.index, 'load', wraps=self.index.load) as load:
+            with self.captureOnCommitCallbacks(execute=True):
+                Company.objects.filter(code='P01').delete()
+            self.assertEqual(self.names('pa'), [])
+            self.assertEqual(load.call_count, 1)
+
+            # update() sin modified_at: no hay filas nuevas que aplicar
+            with self.captureOnCommitCallbacks(execute=True):
+                Company.objects.filter(code='N01').update(name='AVESTRUZ')
+            self.assertEqual(self.names('ave'), ['AVESTRUZ'])
+            self.assertEqual(load.call_count, 2)
+
+    def test_index_is_fully_reloaded_after_the_full_refresh_interval(self):
+        self.names('pa')
+        with mock.patch.object(self.index, 'load', wraps=self.index.load) as load:
+            with override_settings(AUTOCOMPLETE={'REFRESH_INTERVAL': 0, 'FULL_REFRESH_INTERVAL': 0}):
+                self.names('pa')
+            load.assert_called_once()
+
+    def test_autocomplete_action(self):
+        request = APIRequestFactory().get('/', {'q': 'n0', 'limit': 5})
+        force_authenticate(request, user=self.user)
+        response = CompanyCatalogViewSet.as_view({'get': 'autocomplete'})(request)
+        self.assertEqual([item['code'] for item in response.data['data']], ['N01'])
+
+
+class CompanyProxy(Company):
+
+    class Meta:
+        proxy = True
+        app_label = 'business'
+
+
+class DefaultIndexTests(TestCase):
+
+    def check_business(self):
+        return check_default_indexes([apps.get_app_config('business')])
+
+    def test_company_declares_the_default_indexes(self):
+        declared = {(index.name, tuple(index.fields), index.condition) for index in Company._meta.indexes}
+        expected = {(index.name, tuple(index.fields), index.condition) for index in get_default_indexes(Company)}
+        self.assertEqual(declared, expected)
+        self.assertIn(
+            (('name', 'id'), models.Q(is_active=True)),
+            {(tuple(index.fields), index.condition) for index in get_default_indexes(Company)},
+        )
+        self.assertEqual(self.check_business(), [])
+
+    def test_inherited_fields_are_considered(self):
+        # created_at y modified_at vienen de TimeStampedModel, no son campos locales
+        fields = [tuple(index.fields) for index in get_default_indexes(Company)]
+        self.assertIn(('created_at', 'id'), fields)
+        self.assertIn(('modified_at',), fields)
+        # code es único: el ordering no necesita otro índice
+        self.assertNotIn(('code', 'id'), fields)
+
+    def test_missing_indexes_are_reported_with_their_declaration(self):
+        with mock.patch.object(Company._meta, 'indexes', Company._meta.indexes[:1]):
+            warnings = self.check_business()
+
+        self.assertEqual([warning.id for warning in warnings], ['core.W001'])
+        self.assertIs(warnings[0].obj, Company)
+        self.assertIn("name='business_co_created_6fb200_act'", warnings[0].hint)
+        self.assertNotIn('business_co_name_83ccce_act', warnings[0].hint)
+
+    def test_proxy_models_are_not_modified_or_reported(self):
+        self.assertEqual(CompanyProxy._meta.indexes, [])
+        self.assertEqual(self.check_business(), [])
+
+
+class CompanyDateFilterSet(BaseFilterSet):
+
+    class Meta(BaseFilterSet.Meta):
+        model = Company
+
+
+class DateFilterTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.create_companies(2)
+
+    def codes(self, **data):
+        return sorted(CompanyDateFilterSet(data, queryset=Company.objects.all()).qs.values_list('code', flat=True))
+
+    def test_upper_bound_on_the_last_representable_day_is_dropped(self):
+        self.assertEqual(self.codes(created_date_to='9999-12-31'), ['C0000', 'C0001'])
+        self.assertEqual(self.codes(updated_date_to='9999-12-31'), ['C0000', 'C0001'])
+        self.assertEqual(self.codes(created_date_from='9999-12-31'), [])
+        self.assertEqual(self.codes(created_date_to='2000-01-01'), [])
+
+    def test_month_filter_on_the_last_month(self):
+        self.assertEqual(self.codes(created_month='9999-12'), [])
+        today = timezone.localdate()
+        self.assertEqual(self.codes(created_month=today.strftime('%Y-%m')), ['C0000', 'C0001'])
+
+    @override_settings(TIME_ZONE='Pacific/Kiritimati')
+    def test_lower_bound_that_underflows_in_utc_is_dropped(self):
+        self.assertEqual(self.codes(created_date_from='0001-01-01'), ['C0000', 'C0001'])
+        self.assertEqual(self.codes(created_month='0001-01'), [])
+
+
+class FilteredCompanyViewSet(CompanyViewSet):
+    filterset_class = CompanyDateFilterSet
+
+
+class ScopeTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.create_companies(2)
+        Company.objects.filter(code='C0001').update(is_active=False)
+
+    def codes(self, viewset, **params):
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=self.user)
+        response = viewset.as_view({'get': 'list'})(request)
+        return sorted(item['code'] for item in response.data['data']['results'])
+
+    def test_include_inactive_only_lifts_the_is_active_filter(self):
+        for viewset in (CompanyViewSet, FilteredCompanyViewSet):
+            self.assertEqual(self.codes(viewset), ['C0000'])
+            self.assertEqual(self.codes(viewset, include_inactive=1), ['C0000', 'C0001'])
+            self.assertEqual(self.codes(viewset, include_inactive=1, is_active='false'), ['C0001'])
+
+    def test_standalone_filterset_still_filters_active_records(self):
+        filterset = CompanyDateFilterSet({}, queryset=Company.objects.all())
+        self.assertEqual(list(filterset.qs.values_list('code', flat=True)), ['C0000'])
+        filterset = CompanyDateFilterSet({'is_active': 'false'}, queryset=Company.objects.all())
+        self.assertEqual(list(filterset.qs.values_list('code', flat=True)), ['C0001'])
+
+    def test_is_active_and_deleted_at_conditions_are_independent(self):
+        with mock.patch('apps.core.models.has_model_field', return_value=True):
+            self.assertEqual(
+                get_scope_condition(Company),
+                models.Q(is_active=True) & models.Q(deleted_at__isnull=True),
+            )
+            self.assertEqual(get_scope_condition(Company, include_inactive=True), models.Q(deleted_at__isnull=True))
+            self.assertEqual(get_scope_condition(Company, include_deleted=True), models.Q(is_active=True))
+
+    def test_scoping_a_scoped_queryset_never_widens_it(self):
+        alive = Company.objects.alive()
+        widened = alive.with_deleted()
+        self.assertEqual(list(widened.values_list('code', flat=True)), ['C0000'])
+        self.assertEqual(widened._scope, (False, False))
+        self.assertEqual(str(widened.query), str(alive.query))
+
+        everything = Company.objects.with_deleted()
+        self.assertEqual(everything.count(), 2)
+        narrowed = everything.alive()
+        self.assertEqual(list(narrowed.values_list('code', flat=True)), ['C0000'])
+        self.assertEqual(narrowed._scope, (False, False))
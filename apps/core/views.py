@@ -0,0 +1,25 @@
+from django.http import HttpResponse, HttpResponseForbidden, Http404
+from django.utils.crypto import constant_time_compare
+from apps.core.metrics import get_options, render_prometheus
+
+
+def has_metrics_access(request, options):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and user.is_staff:
+        return True
+
+    token = options.get('TOKEN')
+    authorization = request.headers.get('Authorization', '')
+    if token and authorization.startswith('Bearer ') and constant_time_compare(authorization[7:], token):
+        return True
+
+    return request.META.get('REMOTE_ADDR') in options.get('ALLOWED_IPS', ())
+
+
+def metrics_view(request):
+    options = get_options()
+    if not options.get('ENABLED'):
+        raise Http404
+    if not has_metrics_access(request, options):
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,15 +1,44 @@
 # apps/core/viewsets.py
-from rest_framework import viewsets, status, filters
+from rest_framework import viewsets, status, serializers
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db import transaction
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.core.cache import cache
 from django.utils import timezone
-from django.http import Http404
+from django.utils.cache import quote_etag
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from django.http import Http404, HttpResponseNotModified, StreamingHttpResponse
+from django.core.exceptions import ValidationError as DjangoValidationError
+from apps.common.renderers import EncodedJSON, encode_json, view_may_emit_float
 from apps.common.responses import StandardResponse
-from apps.core.pagination import StandardResultsSetPagination
+from apps.core.pagination import StandardResultsSetPagination, KeysetPagination, afetch
+from apps.core.cache import (
+    LocalLRU, aget_model_generation, bump_model_generation_on_commit, get_model_generation, get_queryset_digest,
+    get_request_digest,
+)
+from apps.core.optimizers import get_queryset_plan, get_value_columns, has_field
+from apps.core.compiled import CompilationError, CompiledListSerializer, get_compiled_serializer
+from apps.core.metrics import get_options as get_metrics_options, record_request
+from apps.core.queries import QueryRecorder
+from apps.core.jobs import create_job, get_job, public_job
+from apps.core.search import IndexedSearchFilter, RankedOrderingFilter
+from apps.core.serializers import BaseModelSerializer
+from apps.core.autocomplete import get_prefix_index
+from apps.core.models import AuditQuerySet, get_scope_condition
+from asgiref.sync import sync_to_async
+import asyncio
+import csv
+from datetime import datetime
+import functools
+import hashlib
+from itertools import chain, islice
+from contextlib import nullcontext
+import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -17,32 +46,141 @@ logger = logging.getLogger(__name__)
 class BaseViewSetMixin:
     permission_classes = [IsAuthenticated]
     pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_classes = {
+        'page': StandardResultsSetPagination,
+        'cursor': KeysetPagination,
+    }
+    pagination_query_param = 'pagination'
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, RankedOrderingFilter]
+    auto_optimize_queryset = True
+    # only() se limita a acciones de lectura para no guardar instancias con campos diferidos
+    auto_only_actions = ('list', 'retrieve')
+    # None, 'instances' o 'values': serialización compilada del listado (apps.core.compiled);
+    # con 'values' las filas se leen con values() sin instanciar modelos
+    compiled_serialization = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            mode = self.request.query_params.get(self.pagination_query_param) if self.request else None
+            pagination_class = self.pagination_classes.get(mode, self.pagination_class)
+            self._paginator = pagination_class() if pagination_class else None
+        return self._paginator
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = self.scope_queryset(super().get_queryset())
+
+        if self.auto_optimize_queryset:
+            queryset = self.optimize_queryset(queryset)
+
+        return queryset
+
+    def scope_queryset(self, queryset):
+        # Un único predicado de activos/no eliminados (apps.core.models.get_scope_condition)
+        scope = {
+            'include_inactive': bool(self.request.query_params.get('include_inactive')),
+            'include_deleted': bool(self.request.query_params.get('include_deleted')),
+        }
+        if isinstance(queryset, AuditQuerySet):
+            return queryset.scoped(**scope)
+        return queryset.filter(get_scope_condition(queryset.model, **scope))
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.compiled_serialization == 'values' and self.action == 'list':
+            compiled = get_compiled_serializer(self.get_serializer_class(), rows=True)
+            # Se añaden las columnas del ordering para el cursor de KeysetPagination
+            ordering = [
+                field.lstrip('-') for field in list(queryset.query.order_by) + list(queryset.model._meta.ordering)
+                if isinstance(field, str) and has_field(queryset.model, field.lstrip('-'))
+            ]
+            queryset = queryset.prefetch_related(None).values(*dict.fromkeys(compiled.value_fields + ordering))
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.compiled_serialization and self.action == 'list' and kwargs.get('many') and 'data' not in kwargs:
+            serializer_class = self.get_serializer_class()
+            compiled = get_compiled_serializer(serializer_class)
+            context = self.get_serializer_context()
+            return CompiledListSerializer(
+                *args,
+                child=serializer_class(context=context),
+                compiled=compiled,
+                context=context,
+            )
+        return super().get_serializer(*args, **kwargs)
 
-        if hasattr(queryset.model, 'is_active'):
-            if not self.request.query_params.get('include_inactive'):
-                queryset = queryset.filter(is_active=True)
+    def optimize_queryset(self, queryset):
+        plan = get_queryset_plan(self.get_serializer_class(), queryset.model)
+        applied = []
 
-        if hasattr(queryset.model, 'deleted_at'):
-            if not self.request.query_params.get('include_deleted'):
-                queryset = queryset.filter(deleted_at__isnull=True)
+        if plan['select_related']:
+            queryset = queryset.select_related(*plan['select_related'])
+            applied.append(f"select_related={','.join(plan['select_related'])}")
+        if plan['prefetch_related']:
+            queryset = queryset.prefetch_related(*plan['prefetch_related'])
+            applied.append(f"prefetch_related={','.join(plan['prefetch_related'])}")
+        if plan['only'] and self.action in self.auto_only_actions:
+            queryset = queryset.only(*plan['only'])
+            applied.append(f"only={len(plan['only'])}")
 
+        self._queryset_optimizations = '; '.join(applied)
         return queryset
 
+    def dispatch(self, request, *args, **kwargs):
+        if not get_metrics_options().get('ENABLED'):
+            return super().dispatch(request, *args, **kwargs)
+
+        start = time.perf_counter()
+        with QueryRecorder(count_only=True) as recorder:
+            response = super().dispatch(request, *args, **kwargs)
+        dispatched = time.perf_counter()
+
+        labels = {
+            'view': self.__class__.__name__,
+            'action': getattr(self, 'action', None) or request.method.lower(),
+        }
+
+        def record(rendered_response):
+            finished = time.perf_counter()
+            record_request(
+                labels,
+                status_code=rendered_response.status_code,
+                duration=finished - start,
+                query_count=recorder.count,
+                query_duration=recorder.duration,
+                serializer_duration=getattr(self.request, '_metrics_serializer_seconds', 0),
+                render_duration=finished - dispatched,
+                response_size=len(rendered_response.content) if not rendered_response.streaming else 0,
+            )
+
+        # El renderizado ocurre después de dispatch(), así que se mide en el callback
+        if hasattr(response, 'add_post_render_callback') and not response.is_rendered:
+            response.add_post_render_callback(record)
+        else:
+            record(response)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        optimizations = getattr(self, '_queryset_optimizations', None)
+        if settings.DEBUG and optimizations:
+            response['X-Queryset-Optimizations'] = optimizations
+        return response
+
     def perform_create(self, serializer):
         if hasattr(serializer.Meta.model, 'created_by'):
             serializer.save(created_by=self.request.user)
         else:
             serializer.save()
+        bump_model_generation_on_commit(serializer.Meta.model)
 
     def perform_update(self, serializer):
         if hasattr(serializer.Meta.model, 'updated_by'):
             serializer.save(updated_by=self.request.user)
         else:
             serializer.save()
+        bump_model_generation_on_commit(serializer.Meta.model)
 
 
 class StandardResponseMixin:
@@ -88,6 +226,7 @@ class StandardResponseMixin:
             else:
                 instance.delete()
                 message = "Registro eliminado permanentemente"
+            bump_model_generation_on_commit(type(instance))
 
             return StandardResponse.success(message=message)
         except Http404:
@@ -104,20 +243,126 @@ class StandardResponseMixin:
 
 
 class BulkOperationsMixin:
+    bulk_batch_size = 500
+    # None, 'ignore' o 'update' (upsert sobre los campos únicos del modelo)
+    bulk_create_on_conflict = None
+    bulk_conflict_fields = None
+    # Con ?async=true o más registros que el umbral la operación se encola como job
+    bulk_async_query_param = 'async'
+    bulk_async_threshold = None
+    bulk_progress_callback = None
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['bulk_batch_size'] = self.bulk_batch_size
+        context['bulk_on_conflict'] = self.bulk_create_on_conflict
+        context['bulk_conflict_fields'] = self.bulk_conflict_fields
+        return context
+
+    def _bulk_index_errors(self, errors):
+        if not isinstance(errors, list):
+            return [{'index': None, 'errors': errors}]
+        return [{'index': i, 'errors': item_errors} for i, item_errors in enumerate(errors) if item_errors]
+
+    def _bulk_errors_response(self, message, errors):
+        return StandardResponse.error(
+            message=message,
+            errors={'bulk_errors': errors},
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+
+    def should_enqueue_bulk(self, request, total):
+        if request.query_params.get(self.bulk_async_query_param, '').lower() in ('1', 'true'):
+            return True
+        return self.bulk_async_threshold is not None and total > self.bulk_async_threshold
+
+    def enqueue_bulk_job(self, operation, payload):
+        job = create_job(self, operation, payload, self.request)
+        return StandardResponse.success(
+            data={
+                'job_id': job['id'],
+                'status': job['status'],
+                'status_url': self.reverse_action(self.bulk_job_status.url_name, kwargs={'job_id': job['id']}),
+            },
+            message="Operación en lote encolada",
+            status_code=status.HTTP_202_ACCEPTED
+        )
+
+    def report_bulk_progress(self, processed):
+        if self.bulk_progress_callback is not None:
+            self.bulk_progress_callback(processed)
+
+    def run_bulk_operation(self, operation, payload):
+        handlers = {
+            'bulk_create': self.perform_bulk_create,
+            'bulk_update': self.perform_bulk_update,
+            'bulk_delete': self.perform_bulk_delete,
+        }
+        return handlers[operation](payload)
 
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
+        if isinstance(request.data, list) and self.should_enqueue_bulk(request, len(request.data)):
+            return self.enqueue_bulk_job('bulk_create', request.data)
+        return self.perform_bulk_create(request.data)
+
+    @action(detail=False, methods=['patch'])
+    def bulk_update(self, request):
+        if isinstance(request.data, list) and self.should_enqueue_bulk(request, len(request.data)):
+            return self.enqueue_bulk_job('bulk_update', request.data)
+        return self.perform_bulk_update(request.data)
+
+    @action(detail=False, methods=['delete'])
+    def bulk_delete(self, request):
+        ids = request.data.get('ids', []) if isinstance(request.data, dict) else []
+        if isinstance(ids, list) and ids and self.should_enqueue_bulk(request, len(ids)):
+            return self.enqueue_bulk_job('bulk_delete', {'ids': ids})
+        return self.perform_bulk_delete(request.data)
+
+    @action(detail=False, methods=['get'], url_path=r'jobs/(?P<job_id>[0-9a-f]{32})')
+    def bulk_job_status(self, request, job_id=None):
+        job = get_job(job_id)
+        if job is None or job['model'] != self.get_queryset().model._meta.label:
+            return StandardResponse.error(
+                message="Job no encontrado",
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        if job['user_id'] != request.user.pk and not request.user.is_staff:
+            return StandardResponse.error(
+                message="No tiene permiso para consultar este job",
+                status_code=status.HTTP_403_FORBIDDEN
+            )
+        return StandardResponse.success(data=public_job(job))
+
+    def perform_bulk_create(self, data):
+        request = self.request
         try:
             with transaction.atomic():
-                serializer = self.get_serializer(data=request.data, many=True)
-                serializer.is_valid(raise_exception=True)
-                instances = serializer.save()
+                serializer = self.get_serializer(data=data, many=True)
+                if not serializer.is_valid():
+                    return self._bulk_errors_response(
+                        "Error en la creación en lote",
+                        self._bulk_index_errors(serializer.errors)
+                    )
+
+                self.report_bulk_progress(0)
+                if hasattr(serializer.child.Meta.model, 'created_by'):
+                    instances = serializer.save(created_by=request.user)
+                else:
+                    instances = serializer.save()
+                bump_model_generation_on_commit(serializer.child.Meta.model)
+                self.report_bulk_progress(len(instances))
 
                 return StandardResponse.success(
                     data=serializer.data,
                     message=f"{len(instances)} registros creados exitosamente",
                     status_code=status.HTTP_201_CREATED
                 )
+        except serializers.ValidationError as e:
+            return self._bulk_errors_response(
+                "Error en la creación en lote",
+                self._bulk_index_errors(e.detail)
+            )
         except Exception as e:
             logger.error(f"Error in bulk_create: {str(e)}")
             return StandardResponse.error(
@@ -125,21 +370,68 @@ class BulkOperationsMixin:
                 status_code=status.HTTP_400_BAD_REQUEST
             )
 
-    @action(detail=False, methods=['patch'])
-    def bulk_update(self, request):
+    def perform_bulk_update(self, data):
+        request = self.request
         try:
+            items = data
+            if not isinstance(items, list) or not items:
+                return StandardResponse.error(
+                    message="Debe proporcionar una lista de registros",
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+
+            queryset = self.get_queryset()
+            pk_field = queryset.model._meta.pk
+            errors = []
+            ids = []
+            seen = set()
+
+            for i, item in enumerate(items):
+                if not isinstance(item, dict) or 'id' not in item:
+                    errors.append({'index': i, 'errors': {'id': ["Este campo es requerido."]}})
+                    continue
+                try:
+                    pk = pk_field.to_python(item['id'])
+                except DjangoValidationError:
+                    errors.append({'index': i, 'errors': {'id': ["Identificador inválido."]}})
+                    continue
+                # Cada registro solo puede aparecer una vez en el lote
+                if pk in seen:
+                    errors.append({'index': i, 'errors': {'id': ["Identificador duplicado en el lote."]}})
+                    continue
+                seen.add(pk)
+                ids.append(pk)
+
+            if errors:
+                return self._bulk_errors_response("Error en la actualización en lote", errors)
+
             with transaction.atomic():
-                updated_count = 0
-                for item in request.data:
-                    if 'id' in item:
-                        instance = self.get_queryset().get(id=item['id'])
-                        serializer = self.get_serializer(instance, data=item, partial=True)
-                        serializer.is_valid(raise_exception=True)
-                        serializer.save()
-                        updated_count += 1
+                instances = list(queryset.filter(id__in=ids))
+                found_ids = {str(instance.pk) for instance in instances}
+                errors = [
+                    {'index': i, 'errors': {'id': ["Registro no encontrado."]}}
+                    for i, item in enumerate(items)
+                    if str(pk_field.to_python(item['id'])) not in found_ids
+                ]
+                if errors:
+                    return self._bulk_errors_response("Error en la actualización en lote", errors)
+
+                serializer = self.get_serializer(instances, data=items, many=True, partial=True)
+                if not serializer.is_valid():
+                    return self._bulk_errors_response(
+                        "Error en la actualización en lote",
+                        self._bulk_index_errors(serializer.errors)
+                    )
+
+                if hasattr(queryset.model, 'updated_by'):
+                    updated_instances = serializer.save(updated_by=request.user)
+                else:
+                    updated_instances = serializer.save()
+                bump_model_generation_on_commit(queryset.model)
+                self.report_bulk_progress(len(updated_instances))
 
                 return StandardResponse.success(
-                    message=f"{updated_count} registros actualizados exitosamente"
+                    message=f"{len(updated_instances)} registros actualizados exitosamente"
                 )
         except Exception as e:
             logger.error(f"Error in bulk_update: {str(e)}")
@@ -148,28 +440,41 @@ class BulkOperationsMixin:
                 status_code=status.HTTP_400_BAD_REQUEST
             )
 
-    @action(detail=False, methods=['delete'])
-    def bulk_delete(self, request):
+    def perform_bulk_delete(self, data):
+        request = self.request
         try:
-            ids = request.data.get('ids', [])
+            ids = data.get('ids', [])
             if not ids:
                 return StandardResponse.error(
                     message="Debe proporcionar una lista de IDs",
                     status_code=status.HTTP_400_BAD_REQUEST
                 )
 
+            ids = list(dict.fromkeys(ids))
+            queryset = self.get_queryset().order_by()
+            model = queryset.model
+            deleted_count = 0
+
             with transaction.atomic():
-                queryset = self.get_queryset().filter(id__in=ids)
-                deleted_count = 0
+                for start in range(0, len(ids), self.bulk_batch_size):
+                    chunk = queryset.filter(id__in=ids[start:start + self.bulk_batch_size])
 
-                for instance in queryset:
-                    if hasattr(instance, 'soft_delete'):
-                        instance.soft_delete(user=request.user)
+                    if isinstance(chunk, AuditQuerySet) and has_field(model, 'deleted_at'):
+                        deleted_count += chunk.soft_delete(request.user)
+                    elif has_field(model, 'deleted_at'):
+                        deleted_count += chunk.update(
+                            deleted_at=timezone.now(),
+                            deleted_by=request.user,
+                            is_active=False
+                        )
                     else:
-                        instance.delete()
-                    deleted_count += 1
+                        _, deleted_per_model = chunk.delete()
+                        deleted_count += deleted_per_model.get(model._meta.label, 0)
+                    self.report_bulk_progress(min(start + self.bulk_batch_size, len(ids)))
+                bump_model_generation_on_commit(model)
 
                 return StandardResponse.success(
+                    data={'deleted_count': deleted_count},
                     message=f"{deleted_count} registros eliminados exitosamente"
                 )
         except Exception as e:
@@ -180,6 +485,182 @@ class BulkOperationsMixin:
             )
 
 
+class ImportMixin:
+    import_chunk_size = 1000
+    import_max_errors = 1000
+    import_content_types = {
+        'text/csv': 'csv',
+        'application/csv': 'csv',
+        'application/x-ndjson': 'ndjson',
+        'application/jsonl': 'ndjson',
+    }
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        content_type = request.content_type.split(';')[0].strip().lower()
+        import_format = request.query_params.get('import_format') or self.import_content_types.get(content_type)
+        if import_format not in ('csv', 'ndjson'):
+            return StandardResponse.error(
+                message="Formato no soportado. Envíe text/csv o application/x-ndjson",
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+
+        # Con atomic=true toda la importación se revierte si alguna línea falla
+        atomic = request.query_params.get('atomic', '').lower() in ('1', 'true')
+        summary = {'inserted': 0, 'failed': 0, 'errors': [], 'errors_truncated': False}
+
+        try:
+            with transaction.atomic() if atomic else nullcontext():
+                chunk = []
+                for line, data, error in self.iter_import_rows(request, import_format):
+                    if error:
+                        self.add_import_error(summary, line, error)
+                        continue
+                    chunk.append((line, data))
+                    if len(chunk) >= self.import_chunk_size:
+                        self.import_chunk(chunk, summary, insert=not (atomic and summary['failed']))
+                        chunk = []
+                if chunk:
+                    self.import_chunk(chunk, summary, insert=not (atomic and summary['failed']))
+
+                if atomic and summary['failed']:
+                    transaction.set_rollback(True)
+                    summary['inserted'] = 0
+        except serializers.ValidationError as e:
+            # Encabezado CSV ilegible: no se puede interpretar ninguna fila
+            return StandardResponse.error(
+                message="Importación rechazada",
+                errors=e.detail,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            logger.error(f"Error in bulk_import: {str(e)}")
+            # Sin atomic los lotes anteriores ya quedaron guardados
+            if not atomic and summary['inserted']:
+                bump_model_generation_on_commit(self.get_queryset().model)
+            return StandardResponse.error(
+                message="Error en la importación",
+                errors=None if atomic else summary,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        if summary['inserted']:
+            bump_model_generation_on_commit(self.get_queryset().model)
+
+        if atomic and summary['failed']:
+            return StandardResponse.error(
+                message="Importación revertida por errores",
+                errors=summary,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        return StandardResponse.success(
+            data=summary,
+            message=f"{summary['inserted']} registros importados, {summary['failed']} con errores"
+        )
+
+    def iter_request_lines(self, request, invalid_lines):
+        # Una línea que no es UTF-8 se reemplaza por una vacía y su número se anota en
+        # invalid_lines para informarla sin detener la importación
+        stream = request.stream
+        if stream is None:
+            return
+        for number, line in enumerate(iter(stream.readline, b''), start=1):
+            try:
+                text = line.decode('utf-8')
+            except UnicodeDecodeError:
+                invalid_lines.append(number)
+                text = '\n'
+            yield text.lstrip('\ufeff') if number == 1 else text
+
+    def iter_import_rows(self, request, import_format):
+        # Genera (línea, datos, error) leyendo el cuerpo de forma incremental
+        invalid_lines = []
+        lines = self.iter_request_lines(request, invalid_lines)
+        encoding_error = {'non_field_errors': ["Codificación inválida, se esperaba UTF-8."]}
+
+        if import_format == 'csv':
+            reader = csv.DictReader(lines)
+            # Con un encabezado que no es UTF-8, DictReader tomaría la primera fila de datos
+            # como encabezado: se rechaza la importación completa
+            if reader.fieldnames is not None and 1 in invalid_lines:
+                raise serializers.ValidationError({
+                    'non_field_errors': ["Codificación inválida en el encabezado (línea 1), se esperaba UTF-8."]
+                })
+            for row in reader:
+                while invalid_lines:
+                    yield invalid_lines.pop(0), None, encoding_error
+                data = {key: value for key, value in row.items() if key and value not in ('', None)}
+                yield reader.line_num, data, None
+            for number in invalid_lines:
+                yield number, None, encoding_error
+            return
+
+        for number, line in enumerate(lines, start=1):
+            if invalid_lines:
+                yield invalid_lines.pop(), None, encoding_error
+                continue
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                yield number, None, {'non_field_errors': ["JSON inválido."]}
+                continue
+            if not isinstance(data, dict):
+                yield number, None, {'non_field_errors': ["Se esperaba un objeto JSON."]}
+                continue
+            yield number, data, None
+
+    def import_chunk(self, rows, summary, insert=True):
+        serializer = self.get_serializer(data=[data for _, data in rows], many=True)
+        if not serializer.is_valid():
+            failed = {i for i, item_errors in enumerate(serializer.errors) if item_errors}
+            for i in sorted(failed):
+                self.add_import_error(summary, rows[i][0], serializer.errors[i])
+            rows = [row for i, row in enumerate(rows) if i not in failed]
+            if not rows:
+                return
+
+            # Se revalida el resto para obtener validated_data sin los items con error
+            serializer = self.get_serializer(data=[data for _, data in rows], many=True)
+            if not serializer.is_valid():
+                for i, item_errors in enumerate(serializer.errors):
+                    self.add_import_error(summary, rows[i][0], item_errors or {'non_field_errors': ["Lote inválido."]})
+                return
+
+        if not insert:
+            return
+
+        try:
+            with transaction.atomic():
+                if hasattr(serializer.child.Meta.model, 'created_by'):
+                    serializer.save(created_by=self.request.user)
+                else:
+                    serializer.save()
+        except serializers.ValidationError as e:
+            errors = e.detail if isinstance(e.detail, list) else [e.detail] * len(rows)
+            for i, item_errors in enumerate(errors):
+                self.add_import_error(summary, rows[i][0], item_errors or {'non_field_errors': ["Lote inválido."]})
+            return
+        except IntegrityError as e:
+            # Otra escritura concurrente ganó un valor único: el lote se revierte entero
+            logger.error(f"Error in bulk_import chunk: {str(e)}")
+            for line, _ in rows:
+                self.add_import_error(summary, line, {'non_field_errors': ["Conflicto al guardar el lote."]})
+            return
+
+        summary['inserted'] += len(rows)
+
+    def add_import_error(self, summary, line, errors):
+        summary['failed'] += 1
+        if len(summary['errors']) < self.import_max_errors:
+            summary['errors'].append({'line': line, 'errors': errors})
+        else:
+            summary['errors_truncated'] = True
+
+
 class StatusToggleMixin:
 
     @action(detail=True, methods=['patch'])
@@ -189,6 +670,7 @@ class StatusToggleMixin:
             if hasattr(instance, 'is_active'):
                 instance.is_active = not instance.is_active
                 instance.save()
+                bump_model_generation_on_commit(type(instance))
                 status_text = "activado" if instance.is_active else "desactivado"
                 return StandardResponse.success(
                     message=f"Registro {status_text} exitosamente"
@@ -206,15 +688,282 @@ class StatusToggleMixin:
             )
 
 
+class AutocompleteMixin:
+    # Prefijos sobre un índice en memoria del proceso (apps.core.autocomplete): no aplica
+    # get_queryset ni filtros, solo registros activos
+    autocomplete_fields = ('code', 'name')
+    autocomplete_query_param = 'q'
+    autocomplete_limit = 10
+    autocomplete_max_limit = 50
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        model = self.get_queryset().model
+        fields = [field for field in self.autocomplete_fields if has_field(model, field)]
+        if not fields:
+            return StandardResponse.error(
+                message="Este modelo no soporta autocompletado",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limit = int(request.query_params.get('limit', self.autocomplete_limit))
+        except ValueError:
+            limit = self.autocomplete_limit
+        limit = max(1, min(limit, self.autocomplete_max_limit))
+
+        prefix = request.query_params.get(self.autocomplete_query_param, '')
+        try:
+            results = get_prefix_index(model, fields).search(prefix, limit)
+        except Exception as e:
+            logger.error(f"Error in autocomplete: {str(e)}")
+            return StandardResponse.error(
+                message="Error al obtener sugerencias",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        return StandardResponse.success(data=results)
+
+
+class ResponseCacheMixin:
+    # Opcional: con un timeout (segundos) list y retrieve se sirven desde la caché
+    cache_response_timeout = None
+    # Por defecto cada usuario tiene su propia entrada; False comparte la respuesta entre
+    # todos los autenticados y solo es seguro si get_queryset no depende de request.user
+    cache_response_per_user = True
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_object(self):
+        instance = super().get_object()
+        self._response_object = instance
+        return instance
+
+    def get_response_cache_key(self, request):
+        model = self.get_queryset().model
+        user = request.user
+        if self.cache_response_per_user:
+            scope = f"user:{user.pk}"
+        else:
+            scope = 'auth' if user and user.is_authenticated else 'anon'
+        digest = get_request_digest(request, extra=f"{self.action}|{scope}")
+        return f"response:{model._meta.label_lower}:{get_model_generation(model)}:{digest}"
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if self.cache_response_timeout is None or request.method not in ('GET', 'HEAD'):
+            return handler(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+        entry = cache.get(key)
+        cache_status = 'HIT'
+
+        # check_permissions ya corrió en initial(); en el detalle se obtiene el objeto para
+        # aplicar también los permisos por objeto antes de servir la copia cacheada
+        if entry is not None and (self.lookup_url_kwarg or self.lookup_field) in self.kwargs:
+            self.get_object()
+
+        if entry is None or 'content' not in entry:
+            cache_status = 'MISS'
+            self._response_object = None
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+            entry = self.build_cache_entry(response.data)
+            cache.set(key, entry, self.cache_response_timeout)
+
+        if self.is_not_modified(request, entry):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            timestamp = entry['timestamp'] if cache_status == 'MISS' else datetime.now().isoformat()
+            response = Response(self.build_cached_data(entry, timestamp), status=status.HTTP_200_OK)
+
+        response['ETag'] = entry['etag']
+        if entry['last_modified'] is not None:
+            response['Last-Modified'] = http_date(entry['last_modified'])
+        response['X-Cache'] = cache_status
+        return response
+
+    def build_cache_entry(self, data):
+        # Se guarda el payload ya codificado; en cada respuesta el renderer lo inserta en
+        # el sobre de StandardResponse con un timestamp nuevo, sin volver a serializarlo.
+        envelope = None
+        timestamp = None
+        payload = data
+        if isinstance(data, dict) and 'timestamp' in data and 'data' in data:
+            envelope = {key: None if key in ('timestamp', 'data') else value for key, value in data.items()}
+            timestamp = data['timestamp']
+            payload = data['data']
+
+        content = encode_json(payload, check_floats=view_may_emit_float(self))
+        return {
+            'envelope': envelope,
+            'content': content,
+            'timestamp': timestamp,
+            'etag': self.build_etag(envelope, content),
+            'last_modified': self.get_last_modified(),
+        }
+
+    def build_cached_data(self, entry, timestamp):
+        if entry['envelope'] is None:
+            return EncodedJSON(entry['content'])
+        return {**entry['envelope'], 'timestamp': timestamp, 'data': EncodedJSON(entry['content'])}
+
+    def build_etag(self, envelope, content):
+        digest = hashlib.md5(encode_json(envelope))
+        digest.update(content)
+        return quote_etag(digest.hexdigest())
+
+    def get_last_modified(self):
+        # Solo en el detalle: en un listado el máximo modified_at de la página no cambia
+        # con un borrado o con registros que entran o salen de ella; ahí vale el ETag
+        instance = getattr(self, '_response_object', None)
+        modified_at = getattr(instance, 'modified_at', None)
+        return int(modified_at.timestamp()) if modified_at is not None else None
+
+    def is_not_modified(self, request, entry):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return '*' in etags or entry['etag'] in etags or entry['etag'].strip('"') in etags
+
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since') or '')
+        return (
+            if_modified_since is not None
+            and entry['last_modified'] is not None
+            and entry['last_modified'] <= if_modified_since
+        )
+
+
+class EchoBuffer:
+
+    def write(self, value):
+        return value
+
+
+class ExportMixin:
+    export_chunk_size = 2000
+    export_formats = ('csv', 'ndjson')
+    export_format_query_param = 'export_format'
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        export_format = request.query_params.get(self.export_format_query_param, 'csv')
+        if export_format not in self.export_formats:
+            return StandardResponse.error(
+                message=f"Formato no soportado. Opciones: {', '.join(self.export_formats)}",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer_class = self.get_serializer_class()
+        columns = get_value_columns(serializer_class, queryset.model)
+        if self.can_export_values(serializer_class, columns):
+            names = [name for name, _, _ in columns]
+            rows = self.iter_export_rows(queryset, columns)
+        else:
+            names, rows = self.iter_serialized_rows(queryset, serializer_class)
+
+        if export_format == 'csv':
+            content = self.stream_csv(rows, names)
+            content_type = 'text/csv; charset=utf-8'
+        else:
+            content = self.stream_ndjson(rows, names)
+            content_type = 'application/x-ndjson'
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{queryset.model._meta.model_name}.{export_format}"'
+        return response
+
+    def iter_export_rows(self, queryset, columns):
+        # values() + iterator() evita instanciar modelos y serializers: la memoria se
+        # mantiene constante y solo se formatean los campos que lo requieren.
+        lookups = [lookup for _, lookup, _ in columns]
+        formatters = [
+            field.to_representation if isinstance(field, serializers.DateTimeField) else None
+            for _, _, field in columns
+        ]
+        values = queryset.values_list(*lookups).iterator(chunk_size=self.export_chunk_size)
+        for row in values:
+            yield [
+                formatter(value) if formatter and value is not None else value
+                for formatter, value in zip(formatters, row)
+            ]
+
+    def can_export_values(self, serializer_class, columns):
+        # values() solo reproduce la salida de la API si cada campo legible tiene columna y
+        # ningún to_representation (salvo el de BaseModelSerializer) añade claves
+        mapped = {name for name, _, _ in columns}
+        if any(field.field_name not in mapped for field in serializer_class()._readable_fields):
+            return False
+        for klass in serializer_class.__mro__:
+            if klass is BaseModelSerializer:
+                return True
+            if 'to_representation' in klass.__dict__:
+                return False
+        return False
+
+    def iter_serialized_rows(self, queryset, serializer_class):
+        # Propiedades, métodos y claves de los mixins (status_display, *_formatted) se
+        # exportan con el serializer compilado por bloques, o con DRF si no es compilable
+        serializer = serializer_class(context=self.get_serializer_context())
+        try:
+            compiled = get_compiled_serializer(serializer_class)
+        except CompilationError:
+            compiled = None
+
+        if compiled is not None and compiled.supports_rows:
+            queryset = queryset.prefetch_related(None).values(*compiled.value_fields)
+        objects = queryset.iterator(chunk_size=self.export_chunk_size)
+
+        def iter_chunks():
+            while chunk := list(islice(objects, self.export_chunk_size)):
+                if compiled is not None:
+                    yield from compiled.serialize(serializer, chunk)
+                else:
+                    yield from serializer_class(chunk, many=True, context=serializer.context).data
+
+        # Cabecera: campos legibles del serializer más las claves extra de la primera fila
+        items = iter_chunks()
+        first = next(items, None)
+        names = [field.field_name for field in serializer._readable_fields]
+        names.extend(key for key in first or () if key not in names)
+
+        def iter_rows():
+            if first is None:
+                return
+            for item in chain([first], items):
+                yield [item.get(name) for name in names]
+
+        return names, iter_rows()
+
+    def stream_csv(self, rows, header):
+        writer = csv.writer(EchoBuffer())
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    def stream_ndjson(self, rows, names):
+        for row in rows:
+            yield encode_json(dict(zip(names, row))) + b'\n'
+
+
 class BaseModelViewSet(BaseViewSetMixin,
                        StandardResponseMixin,
                        BulkOperationsMixin,
+                       ImportMixin,
                        StatusToggleMixin,
+                       AutocompleteMixin,
+                       ResponseCacheMixin,
+                       ExportMixin,
                        viewsets.ModelViewSet):
     pass
 
 
-class ReadOnlyBaseViewSet(BaseViewSetMixin, viewsets.ReadOnlyModelViewSet):
+class ReadOnlyBaseViewSet(BaseViewSetMixin, ResponseCacheMixin, ExportMixin, viewsets.ReadOnlyModelViewSet):
     pass
 
 
@@ -224,19 +973,200 @@ class CatalogViewSet(BaseModelViewSet):
     search_fields = ['name', 'code', 'description']
     filterset_fields = ['is_active', 'code']
 
+    active_list_fields = ('id', 'code', 'name')
+    active_list_timeout = None
+    # Copia local de los últimos snapshots (por catálogo y alcance) para no leerlos de la
+    # caché compartida en cada petición; acotada porque el alcance puede ser por usuario
+    _active_list_snapshots = LocalLRU(max_size=256)
+
     @action(detail=False, methods=['get'])
     def active_list(self, request):
         try:
-            queryset = self.get_queryset().filter(is_active=True)
-            data = [
-                {
-                    'id': item.id,
-                    'code': item.code,
-                    'name': item.name
-                }
-                for item in queryset
-            ]
-            return StandardResponse.success(data=data)
+            return self.get_active_list_response(request, self.get_active_list_snapshot())
+        except Exception as e:
+            logger.error(f"Error in active_list: {str(e)}")
+            return StandardResponse.error(
+                message="Error al obtener la lista activa",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+    def get_active_list_snapshot(self):
+        # Snapshot con el JSON ya codificado por catálogo y alcance; se reconstruye solo
+        # cuando cambia la generación del modelo (cualquier escritura sobre el catálogo).
+        queryset = self.get_active_list_queryset()
+        label = queryset.model._meta.label_lower
+        scope = self.get_active_list_scope(queryset)
+        generation = get_model_generation(queryset.model)
+
+        local = self._active_list_snapshots.get((label, scope))
+        if local is not None and local[0] == generation:
+            return local[1]
+
+        cache_key = f"active_list:{label}:{generation}:{scope}"
+        snapshot = cache.get(cache_key)
+        if snapshot is None:
+            snapshot = self.encode_active_list(queryset)
+            cache.set(cache_key, snapshot, self.active_list_timeout)
+
+        self._active_list_snapshots.set((label, scope), (generation, snapshot))
+        return snapshot
+
+    def get_active_list_response(self, request, snapshot):
+        if snapshot['etag'] in parse_etags(request.headers.get('If-None-Match') or ''):
+            response = HttpResponseNotModified()
+        else:
+            response = StandardResponse.encoded(snapshot['content'])
+        response['ETag'] = snapshot['etag']
+        return response
+
+    def get_active_list_queryset(self):
+        # Parte de get_queryset() para respetar los filtros de la subclase (usuario, tenant)
+        queryset = self.get_queryset()
+        if isinstance(queryset, AuditQuerySet):
+            queryset = queryset.alive()
+        else:
+            queryset = queryset.filter(get_scope_condition(queryset.model))
+        return queryset.prefetch_related(None).order_by(*self.ordering).values_list(*self.active_list_fields)
+
+    def get_active_list_scope(self, queryset):
+        return get_queryset_digest(queryset)
+
+    def encode_active_list(self, values_list):
+        rows = [dict(zip(self.active_list_fields, values)) for values in values_list]
+        content = encode_json(rows)
+        return {'content': content, 'etag': quote_etag(hashlib.md5(content).hexdigest())}
+
+
+class AsyncViewSetMixin:
+    # Vista async para ASGI: list, retrieve y active_list usan el ORM async; el resto de
+    # acciones (escrituras, bulk, import/export) se ejecutan en un hilo con sync_to_async.
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            return await view(request, *args, **kwargs)
+
+        functools.update_wrapper(async_view, view)
+        async_view.csrf_exempt = True
+        return async_view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if asyncio.iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        # Autenticación y throttling pueden consultar la base de datos o la caché
+        await sync_to_async(self.perform_authentication)(request)
+        await self.acheck_permissions(request)
+        await sync_to_async(self.check_throttles)(request)
+
+    async def acall_permission(self, method, *args):
+        if asyncio.iscoroutinefunction(method):
+            return await method(*args)
+        return await sync_to_async(method)(*args)
+
+    async def acheck_permissions(self, request):
+        for permission in self.get_permissions():
+            if not await self.acall_permission(permission.has_permission, request, self):
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, 'message', None),
+                    code=getattr(permission, 'code', None)
+                )
+
+    async def acheck_object_permissions(self, request, obj):
+        for permission in self.get_permissions():
+            if not await self.acall_permission(permission.has_object_permission, request, self, obj):
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, 'message', None),
+                    code=getattr(permission, 'code', None)
+                )
+
+    async def afilter_queryset(self, queryset):
+        # Los filtersets validan en formularios que pueden consultar la base de datos
+        return await sync_to_async(self.filter_queryset)(queryset)
+
+    async def aget_object(self):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (queryset.model.DoesNotExist, TypeError, ValueError, DjangoValidationError):
+            raise Http404
+
+        await self.acheck_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+
+    # La serialización corre en el event loop: las relaciones deben venir resueltas por
+    # select_related/prefetch_related (optimize_queryset se encarga de ello).
+    async def list(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(await afetch(queryset), many=True)
+        return Response(serializer.data)
+
+    async def retrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
+
+class AsyncBaseModelViewSet(AsyncViewSetMixin, BaseModelViewSet):
+    pass
+
+
+class AsyncReadOnlyBaseViewSet(AsyncViewSetMixin, ReadOnlyBaseViewSet):
+    pass
+
+
+class AsyncCatalogViewSet(AsyncViewSetMixin, CatalogViewSet):
+
+    @action(detail=False, methods=['get'])
+    async def active_list(self, request):
+        try:
+            return self.get_active_list_response(request, await self.aget_active_list_snapshot())
         except Exception as e:
             logger.error(f"Error in active_list: {str(e)}")
             return StandardResponse.error(
@@ -244,3 +1174,27 @@ class CatalogViewSet(BaseModelViewSet):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
 
+    async def aget_active_list_snapshot(self):
+        queryset = self.get_active_list_queryset()
+        label = queryset.model._meta.label_lower
+        scope = self.get_active_list_scope(queryset)
+        generation = await aget_model_generation(queryset.model)
+
+        local = self._active_list_snapshots.get((label, scope))
+        if local is not None and local[0] == generation:
+            return local[1]
+
+        cache_key = f"active_list:{label}:{generation}:{scope}"
+        snapshot = await cache.aget(cache_key)
+        if snapshot is None:
+            snapshot = await self.abuild_active_list_snapshot(queryset)
+            await cache.aset(cache_key, snapshot, self.active_list_timeout)
+
+        self._active_list_snapshots.set((label, scope), (generation, snapshot))
+        return snapshot
+
+    async def abuild_active_list_snapshot(self, queryset):
+        # En Django 4.2 aiterator() de values_list() ejecuta la consulta dentro del event
+        # loop; iterar el queryset la resuelve en un hilo.
+        values_list = [values async for values in queryset]
+        return self.encode_active_list(values_list)